@@ -56,6 +56,8 @@ def main() -> None:
             port=settings.port,
             workers=settings.workers_count,
             factory=True,
+            # Leave the workers time to drain their voice sessions.
+            graceful_timeout=settings.voice_drain_timeout + 5,
             accesslog="-",
             loglevel=settings.log_level.value.lower(),
             access_log_format='%r "-" %s "-" %Tf',
@@ -0,0 +1,56 @@
+from typing import Any, Dict, List, Sequence
+
+from fastapi import Depends
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bananavoice.db.dependencies import get_db_session
+from bananavoice.db.models.conversation import Conversation, ConversationTurn
+
+
+class ConversationDAO:
+    """Class for accessing conversation tables."""
+
+    def __init__(self, session: AsyncSession = Depends(get_db_session)) -> None:
+        self.session = session
+
+    async def add_conversations(self, rows: Sequence[Dict[str, Any]]) -> None:
+        """
+        Insert conversations with a single multi-row statement.
+
+        :param rows: column values of the conversations.
+        """
+        if rows:
+            await self.session.execute(insert(Conversation).values(list(rows)))
+
+    async def add_turns(self, rows: Sequence[Dict[str, Any]]) -> None:
+        """
+        Insert turns with a single multi-row statement.
+
+        :param rows: column values of the turns.
+        """
+        if rows:
+            await self.session.execute(insert(ConversationTurn).values(list(rows)))
+
+    async def end_conversations(self, rows: Sequence[Dict[str, Any]]) -> None:
+        """
+        Set the end time of conversations.
+
+        :param rows: ids and end times of the conversations.
+        """
+        if rows:
+            await self.session.execute(update(Conversation), list(rows))
+
+    async def get_turns(self, conversation_id: str) -> List[ConversationTurn]:
+        """
+        Get the transcript of a conversation.
+
+        :param conversation_id: id of the conversation.
+        :return: turns in conversation order.
+        """
+        rows = await self.session.execute(
+            select(ConversationTurn)
+            .where(ConversationTurn.conversation_id == conversation_id)
+            .order_by(ConversationTurn.position),
+        )
+        return list(rows.scalars().fetchall())
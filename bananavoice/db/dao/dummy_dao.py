@@ -1,7 +1,7 @@
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Sequence
 
 from fastapi import Depends
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bananavoice.db.dependencies import get_db_session
@@ -22,6 +22,23 @@ class DummyDAO:
         """
         self.session.add(DummyModel(name=name))
 
+    async def bulk_create(self, names: Sequence[str], chunk_size: int = 1000) -> int:
+        """
+        Insert dummies with one multi-row statement per chunk.
+
+        Rows skip the ORM unit of work, no objects are kept in the session.
+
+        :param names: names of the dummies.
+        :param chunk_size: rows per statement.
+        :return: number of dummies inserted.
+        """
+        for start in range(0, len(names), chunk_size):
+            chunk = names[start : start + chunk_size]
+            await self.session.execute(
+                insert(DummyModel).values([{"name": name} for name in chunk]),
+            )
+        return len(names)
+
     async def get_all_dummies(self, limit: int, offset: int) -> List[DummyModel]:
         """
         Get all dummy models with limit/offset pagination.
@@ -36,10 +53,59 @@ class DummyDAO:
 
         return list(raw_dummies.scalars().fetchall())
 
+    async def get_dummies_after(
+        self,
+        limit: int,
+        after: Optional[int] = None,
+    ) -> List[DummyModel]:
+        """
+        Get dummy models with keyset pagination on id.
+
+        Unlike an offset, the id seeks straight to the page in the
+        primary key index, so deep pages are as fast as the first one.
+
+        :param limit: limit of dummies.
+        :param after: id of the last dummy of the previous page.
+        :return: dummies ordered by id.
+        """
+        query = select(DummyModel).order_by(DummyModel.id).limit(limit)
+        if after is not None:
+            query = query.where(DummyModel.id > after)
+        rows = await self.session.execute(query)
+        return list(rows.scalars().fetchall())
+
+    async def stream_dummies(
+        self,
+        name: Optional[str] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[DummyModel]:
+        """
+        Iterate over dummy models without loading them all.
+
+        Rows are read from a server-side cursor in batches.
+
+        :param name: name of dummy instances, all of them by default.
+        :param batch_size: rows fetched at once.
+        :yield: dummies ordered by id.
+        """
+        query = (
+            select(DummyModel)
+            .order_by(DummyModel.id)
+            .execution_options(yield_per=batch_size)
+        )
+        if name:
+            query = query.where(DummyModel.name == name)
+        dummies = await self.session.stream_scalars(query)
+        async for dummy in dummies:
+            yield dummy
+
     async def filter(self, name: Optional[str] = None) -> List[DummyModel]:
         """
         Get specific dummy model.
 
+        Without a name the whole table is loaded, use
+        :meth:`stream_dummies` to export it.
+
         :param name: name of dummy instance.
         :return: dummy models.
         """
@@ -0,0 +1,38 @@
+from typing import Any, Dict, List, Sequence
+
+from fastapi import Depends
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bananavoice.db.dependencies import get_db_session
+from bananavoice.db.models.voice_usage import VoiceUsage
+
+
+class VoiceUsageDAO:
+    """Class for accessing voice usage table."""
+
+    def __init__(self, session: AsyncSession = Depends(get_db_session)) -> None:
+        self.session = session
+
+    async def add_usage(self, rows: Sequence[Dict[str, Any]]) -> None:
+        """
+        Insert a batch of usage rows with a single statement.
+
+        :param rows: column values of the rows.
+        """
+        if rows:
+            await self.session.execute(insert(VoiceUsage), list(rows))
+
+    async def get_session_usage(self, session_id: str) -> List[VoiceUsage]:
+        """
+        Get the usage rows of a voice session.
+
+        :param session_id: id of the voice session.
+        :return: usage rows in insertion order.
+        """
+        rows = await self.session.execute(
+            select(VoiceUsage)
+            .where(VoiceUsage.session_id == session_id)
+            .order_by(VoiceUsage.id),
+        )
+        return list(rows.scalars().fetchall())
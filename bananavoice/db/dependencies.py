@@ -1,9 +1,52 @@
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session, SessionTransaction
 from starlette.requests import Request
 from taskiq import TaskiqDepends
 
+# Session info keys.
+READ_ONLY = "read_only"
+WRITES = "writes"
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement(orm_execute_state: ORMExecuteState) -> None:
+    if orm_execute_state.is_select:
+        return
+    session = orm_execute_state.session
+    if session.info.get(READ_ONLY):
+        raise InvalidRequestError("Read-only database session can't write")
+    session.info[WRITES] = True
+
+
+@event.listens_for(Session, "before_flush")
+def _track_flush(session: Session, flush_context: Any, instances: Any) -> None:
+    if session.info.get(READ_ONLY):
+        raise InvalidRequestError("Read-only database session can't flush")
+    session.info[WRITES] = True
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _reset_writes(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(WRITES, None)
+
+
+def has_writes(session: AsyncSession) -> bool:
+    """
+    Whether a session has changes to commit.
+
+    :param session: database session.
+    :return: True if it flushed, executed a statement other than a
+        select or holds pending objects.
+    """
+    return session.in_transaction() and bool(
+        session.info.get(WRITES) or session.new or session.dirty or session.deleted,
+    )
+
 
 async def get_db_session(
     request: Request = TaskiqDepends(),
@@ -11,6 +54,9 @@ async def get_db_session(
     """
     Create and get database session.
 
+    The session checks a connection out of the pool on first use only,
+    and is committed only if something was written.
+
     :param request: current request.
     :yield: database session.
     """
@@ -19,5 +65,27 @@ async def get_db_session(
     try:
         yield session
     finally:
-        await session.commit()
+        if has_writes(session):
+            await session.commit()
+        await session.close()
+
+
+async def get_db_read_session(
+    request: Request = TaskiqDepends(),
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Create and get a read-only database session.
+
+    Flushes and statements other than selects raise, the transaction
+    is never committed.
+
+    :param request: current request.
+    :yield: database session.
+    """
+    session: AsyncSession = request.app.state.db_session_factory(autoflush=False)
+    session.info[READ_ONLY] = True
+
+    try:
+        yield session
+    finally:
         await session.close()
@@ -0,0 +1,57 @@
+"""Add voice usage table.
+
+Revision ID: 5c2f8e41d7a9
+Revises: 3809eb8b55a6
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5c2f8e41d7a9"
+down_revision = "3809eb8b55a6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.create_table(
+        "voice_usage",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("session_id", sa.String(length=64), nullable=False),
+        sa.Column("pipeline", sa.String(length=16), nullable=False),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("model", sa.String(length=128), nullable=False),
+        sa.Column("unit", sa.String(length=32), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("cost", sa.Float(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_voice_usage_session_id"),
+        "voice_usage",
+        ["session_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_voice_usage_created_at"),
+        "voice_usage",
+        ["created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_index(op.f("ix_voice_usage_created_at"), table_name="voice_usage")
+    op.drop_index(op.f("ix_voice_usage_session_id"), table_name="voice_usage")
+    op.drop_table("voice_usage")
@@ -0,0 +1,47 @@
+"""Add user to voice usage.
+
+Revision ID: 8d41b7c0e2f3
+Revises: 5c2f8e41d7a9
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from fastapi_users_db_sqlalchemy.generics import GUID
+
+# revision identifiers, used by Alembic.
+revision = "8d41b7c0e2f3"
+down_revision = "5c2f8e41d7a9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.add_column("voice_usage", sa.Column("user_id", GUID(), nullable=True))
+    op.create_foreign_key(
+        op.f("fk_voice_usage_user_id_user"),
+        "voice_usage",
+        "user",
+        ["user_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+    op.create_index(
+        op.f("ix_voice_usage_user_id"),
+        "voice_usage",
+        ["user_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_index(op.f("ix_voice_usage_user_id"), table_name="voice_usage")
+    op.drop_constraint(
+        op.f("fk_voice_usage_user_id_user"),
+        "voice_usage",
+        type_="foreignkey",
+    )
+    op.drop_column("voice_usage", "user_id")
@@ -0,0 +1,81 @@
+"""Add conversation and conversation turn tables.
+
+Revision ID: b71e5d93a4c6
+Revises: 8d41b7c0e2f3
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from fastapi_users_db_sqlalchemy.generics import GUID
+
+# revision identifiers, used by Alembic.
+revision = "b71e5d93a4c6"
+down_revision = "8d41b7c0e2f3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.create_table(
+        "conversation",
+        sa.Column("id", sa.String(length=64), nullable=False),
+        sa.Column("pipeline", sa.String(length=16), nullable=False),
+        sa.Column("user_id", GUID(), nullable=True),
+        sa.Column(
+            "started_at",
+            sa.DateTime(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("ended_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_conversation_user_id"),
+        "conversation",
+        ["user_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_conversation_started_at"),
+        "conversation",
+        ["started_at"],
+        unique=False,
+    )
+    op.create_table(
+        "conversation_turn",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("conversation_id", sa.String(length=64), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("role", sa.String(length=16), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["conversation_id"],
+            ["conversation.id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_conversation_turn_conversation_id"),
+        "conversation_turn",
+        ["conversation_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_index(
+        op.f("ix_conversation_turn_conversation_id"),
+        table_name="conversation_turn",
+    )
+    op.drop_table("conversation_turn")
+    op.drop_index(op.f("ix_conversation_started_at"), table_name="conversation")
+    op.drop_index(op.f("ix_conversation_user_id"), table_name="conversation")
+    op.drop_table("conversation")
@@ -0,0 +1,48 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, ForeignKey, Integer, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql.sqltypes import String
+
+from bananavoice.db.base import Base
+
+
+class Conversation(Base):
+    """A voice session with its transcript."""
+
+    __tablename__ = "conversation"
+
+    # Session id of the voice pipeline.
+    id: Mapped[str] = mapped_column(String(length=64), primary_key=True)
+    pipeline: Mapped[str] = mapped_column(String(length=16))
+    user_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        ForeignKey("user.id", ondelete="SET NULL"),
+        index=True,
+    )
+    started_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        server_default=func.now(),
+        index=True,
+    )
+    ended_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+
+class ConversationTurn(Base):
+    """A message of a conversation, as kept in the LLM context."""
+
+    __tablename__ = "conversation_turn"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    conversation_id: Mapped[str] = mapped_column(
+        ForeignKey(Conversation.id, ondelete="CASCADE"),
+        index=True,
+    )
+    # Position of the turn in the conversation.
+    position: Mapped[int] = mapped_column(Integer)
+    # user or assistant.
+    role: Mapped[str] = mapped_column(String(length=16))
+    content: Mapped[str] = mapped_column(Text)
+    # When the turn entered the context, not when it was written.
+    created_at: Mapped[datetime] = mapped_column(DateTime)
@@ -94,3 +94,4 @@ backends = [
 api_users = FastAPIUsers[User, uuid.UUID](get_user_manager, backends)
 
 current_active_user = api_users.current_user(active=True)
+current_superuser = api_users.current_user(active=True, superuser=True)
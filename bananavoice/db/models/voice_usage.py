@@ -0,0 +1,36 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Float, ForeignKey, func
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql.sqltypes import String
+
+from bananavoice.db.base import Base
+
+
+class VoiceUsage(Base):
+    """Usage metered in a voice session since the previous flush."""
+
+    __tablename__ = "voice_usage"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    session_id: Mapped[str] = mapped_column(String(length=64), index=True)
+    pipeline: Mapped[str] = mapped_column(String(length=16))
+    user_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        ForeignKey("user.id", ondelete="SET NULL"),
+        index=True,
+    )
+    # llm, stt, tts or transport.
+    kind: Mapped[str] = mapped_column(String(length=16))
+    model: Mapped[str] = mapped_column(String(length=128))
+    # input_tokens, cached_input_tokens, output_tokens, characters or seconds.
+    unit: Mapped[str] = mapped_column(String(length=32))
+    quantity: Mapped[float] = mapped_column(Float)
+    # USD, priced when metered.
+    cost: Mapped[float] = mapped_column(Float)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        server_default=func.now(),
+        index=True,
+    )
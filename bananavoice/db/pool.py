@@ -0,0 +1,117 @@
+"""Connection pool of the database engine: options, metrics and warm-up."""
+
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Any, Dict
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import (
+    AsyncAdaptedQueuePool,
+    ConnectionPoolEntry,
+    Pool,
+    QueuePool,
+)
+
+from bananavoice.settings import settings
+
+logger = logging.getLogger(__name__)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Database connections checked out of the pool.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Database connections open beyond the pool size.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds",
+    "Time to get a connection from the pool, connecting included.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool of async engines that measures how long checkouts wait."""
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - started)
+
+
+def pool_options() -> Dict[str, Any]:
+    """
+    Engine arguments of the configured connection pool.
+
+    :return: keyword arguments of create_async_engine.
+    """
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def instrument_pool(engine: AsyncEngine) -> None:
+    """
+    Export the checked out and overflow connections of an engine's pool.
+
+    Only queue pools count their connections, other pools are left alone.
+
+    :param engine: database engine.
+    """
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, QueuePool):
+        return
+
+    def update(*args: Any) -> None:
+        DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+    for name in ("checkout", "checkin", "close_detached", "invalidate"):
+        event.listen(pool, name, update)
+
+
+async def warm_up_pool(engine: AsyncEngine, connections: int) -> int:
+    """
+    Open pool connections ahead of the first requests.
+
+    Connections are opened concurrently and returned to the pool. The
+    application starts anyway if the database can't be reached.
+
+    :param engine: database engine.
+    :param connections: connections to open, bounded by the pool size.
+    :return: number of connections opened.
+    """
+    pool: Pool = engine.sync_engine.pool
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        connections = min(connections, pool.size())
+    if connections <= 0:
+        return 0
+    started = time.perf_counter()
+    async with contextlib.AsyncExitStack() as stack:
+        results = await asyncio.gather(
+            *(stack.enter_async_context(engine.connect()) for _ in range(connections)),
+            return_exceptions=True,
+        )
+    opened = sum(1 for result in results if not isinstance(result, BaseException))
+    if opened < connections:
+        error = next(result for result in results if isinstance(result, BaseException))
+        logger.warning(f"Failed to warm up database connections: {error}")
+    logger.info(
+        f"Warmed up {opened} database connections "
+        f"in {time.perf_counter() - started:.2f}s",
+    )
+    return opened
@@ -0,0 +1,192 @@
+"""Admission control and load shedding for voice sessions."""
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from bananavoice.services.voice.metrics import (
+    VOICE_DRAINING,
+    VOICE_SESSIONS_ACTIVE,
+    VOICE_SESSIONS_QUEUED,
+    VOICE_SESSIONS_REJECTED,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a new voice session can't be admitted."""
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(f"Voice session rejected: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Limits concurrent voice sessions on a worker.
+
+    Sessions are admitted while there are free slots and the worker
+    is not overloaded. When all slots are taken, offers wait in a short
+    FIFO queue until a slot frees up or their deadline passes.
+    Overload is detected by sampling process CPU usage and
+    event loop lag in a background probe. A draining controller
+    rejects every new session.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int,
+        *,
+        queue_size: int = 0,
+        queue_timeout: float = 5.0,
+        max_cpu_percent: float = 85.0,
+        max_loop_lag: float = 0.1,
+        retry_after: int = 5,
+        probe_interval: float = 0.5,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.max_cpu_percent = max_cpu_percent
+        self.max_loop_lag = max_loop_lag
+        self.retry_after = retry_after
+        self.probe_interval = probe_interval
+        self.active = 0
+        self.rejected = 0
+        self.cpu_percent = 0.0
+        self.loop_lag = 0.0
+        self.draining = False
+        self._waiters: Deque[asyncio.Future[None]] = deque()
+        self._probe_task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def queued(self) -> int:
+        """Number of offers waiting for admission."""
+        return len(self._waiters)
+
+    @property
+    def overloaded(self) -> bool:
+        """Whether the worker is too busy to take new sessions."""
+        return (
+            self.cpu_percent > self.max_cpu_percent or self.loop_lag > self.max_loop_lag
+        )
+
+    def start(self) -> None:
+        """Start the background load probe."""
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(self._probe())
+
+    async def stop(self) -> None:
+        """Stop the load probe and reject everyone still waiting."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._probe_task
+            self._probe_task = None
+        while self._waiters:
+            self._waiters.popleft().cancel()
+        VOICE_SESSIONS_QUEUED.set(0)
+
+    def drain(self) -> None:
+        """Stop admitting sessions and reject the queued offers."""
+        if self.draining:
+            return
+        self.draining = True
+        VOICE_DRAINING.set(1)
+        for waiter in self._waiters:
+            waiter.cancel()
+
+    async def acquire(self) -> None:
+        """
+        Take a session slot, waiting in the queue if needed.
+
+        :raises AdmissionRejectedError: if the session can't be admitted.
+        """
+        self.start()
+        if self.draining:
+            self._reject("draining")
+        if self.overloaded:
+            self._reject("overload")
+        if self.active < self.max_sessions and not self._waiters:
+            self._admit()
+            return
+        if len(self._waiters) >= self.queue_size:
+            self._reject("capacity")
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        VOICE_SESSIONS_QUEUED.set(len(self._waiters))
+        try:
+            await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # The slot may already have been handed over to us.
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            self._forget(waiter)
+
+        if not waiter.done() or waiter.cancelled():
+            waiter.cancel()
+            self._reject("draining" if self.draining else "timeout")
+
+    def release(self) -> None:
+        """Free a session slot and hand it to the next waiter."""
+        self.active = max(self.active - 1, 0)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._admit()
+                break
+        VOICE_SESSIONS_QUEUED.set(len(self._waiters))
+        VOICE_SESSIONS_ACTIVE.set(self.active)
+
+    def stats(self) -> Dict[str, float]:
+        """Current admission counters."""
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "cpu_percent": self.cpu_percent,
+            "loop_lag": self.loop_lag,
+            "draining": self.draining,
+        }
+
+    def _admit(self) -> None:
+        self.active += 1
+        VOICE_SESSIONS_ACTIVE.set(self.active)
+
+    def _forget(self, waiter: "asyncio.Future[None]") -> None:
+        with contextlib.suppress(ValueError):
+            self._waiters.remove(waiter)
+        VOICE_SESSIONS_QUEUED.set(len(self._waiters))
+
+    def _reject(self, reason: str) -> None:
+        self.rejected += 1
+        VOICE_SESSIONS_REJECTED.labels(reason=reason).inc()
+        logger.warning(
+            f"Rejecting voice session ({reason}): active={self.active} "
+            f"queued={self.queued} cpu={self.cpu_percent:.0f}% "
+            f"lag={self.loop_lag * 1000:.0f}ms",
+        )
+        raise AdmissionRejectedError(reason, self.retry_after)
+
+    async def _probe(self) -> None:
+        """Periodically sample CPU usage and event loop lag."""
+        loop = asyncio.get_running_loop()
+        last_wall = loop.time()
+        last_cpu = time.process_time()
+        while True:
+            expected = loop.time() + self.probe_interval
+            await asyncio.sleep(self.probe_interval)
+            now = loop.time()
+            cpu = time.process_time()
+            self.loop_lag = max(now - expected, 0.0)
+            self.cpu_percent = (cpu - last_cpu) / max(now - last_wall, 1e-6) * 100
+            last_wall, last_cpu = now, cpu
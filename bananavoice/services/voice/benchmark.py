@@ -0,0 +1,374 @@
+"""
+Load benchmark of voice pipelines with offline fake providers.
+
+Runs N concurrent sessions shaped like the Daily bot (STT, LLM and TTS)
+or the WebRTC agent (speech-to-speech) on a loopback transport and
+reports sessions per core, per-stage latency percentiles and memory
+per session::
+
+    python -m bananavoice.services.voice.benchmark --sessions 50 --shape daily
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger as pipecat_logger
+from pipecat.frames.frames import EndFrame
+from pipecat.pipeline.pipeline import Pipeline
+from pipecat.pipeline.runner import PipelineRunner
+from pipecat.pipeline.task import PipelineParams, PipelineTask
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+
+from bananavoice.services.voice.context import ContextBudgetProcessor
+from bananavoice.services.voice.fakes import (
+    FakeLLMService,
+    FakeSTTService,
+    FakeTTSService,
+    LatencyDistribution,
+    LoopbackTransport,
+)
+from bananavoice.services.voice.observers import LatencyObserver
+from bananavoice.services.voice.text_aggregator import ClauseTextAggregator
+
+SHAPES = ("daily", "webrtc")
+PERCENTILES = (50, 90, 99)
+
+
+@dataclass
+class BenchmarkConfig:
+    """Parameters of a benchmark run."""
+
+    sessions: int = 10
+    shape: str = "daily"
+    turns: int = 3
+    # Length of each caller utterance in seconds.
+    utterance_seconds: float = 1.5
+    # Seconds between session starts, to avoid a thundering herd.
+    ramp: float = 0.05
+    # Answer of the fake LLM, its default when not set.
+    answer: Optional[str] = None
+    stt_latency: LatencyDistribution = field(
+        default_factory=lambda: LatencyDistribution(0.3, 0.1),
+    )
+    llm_ttfb: LatencyDistribution = field(
+        default_factory=lambda: LatencyDistribution(0.4, 0.15),
+    )
+    llm_token_interval: LatencyDistribution = field(
+        default_factory=lambda: LatencyDistribution(0.02, 0.01),
+    )
+    tts_ttfb: LatencyDistribution = field(
+        default_factory=lambda: LatencyDistribution(0.2, 0.08),
+    )
+    seed: int = 0
+
+
+@dataclass
+class BenchmarkReport:
+    """Results of a benchmark run."""
+
+    config: BenchmarkConfig
+    wall_seconds: float
+    cpu_seconds: float
+    # Wall and CPU time while every session was live at once.
+    steady_wall_seconds: float
+    steady_cpu_seconds: float
+    rss_per_session: float
+    turns: int
+    timeouts: int
+    stages: Dict[str, List[float]]
+
+    @property
+    def cores_used(self) -> float:
+        """Average number of busy cores during the run."""
+        return self.cpu_seconds / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def sessions_per_core(self) -> float:
+        """
+        Concurrent sessions one fully busy core can serve.
+
+        Measured only while every session was live, so neither the ramp
+        nor the tail of the run dilute the load. Zero if the sessions
+        never all ran at once.
+        """
+        if not self.steady_cpu_seconds:
+            return 0.0
+        return self.config.sessions * self.steady_wall_seconds / self.steady_cpu_seconds
+
+    def percentiles(self) -> Dict[str, Dict[int, float]]:
+        """Latency percentiles of each stage, in seconds."""
+        return {
+            stage: dict(
+                zip(PERCENTILES, np.percentile(values, PERCENTILES), strict=True),
+            )
+            for stage, values in self.stages.items()
+            if values
+        }
+
+    def format(self) -> str:
+        """Human readable report."""
+        lines = [
+            (
+                f"shape={self.config.shape} sessions={self.config.sessions} "
+                f"turns={self.turns} timeouts={self.timeouts}"
+            ),
+            (
+                f"wall={self.wall_seconds:.1f}s cpu={self.cpu_seconds:.1f}s "
+                f"cores_used={self.cores_used:.2f} of {os.cpu_count()}"
+            ),
+            (
+                f"steady_wall={self.steady_wall_seconds:.1f}s "
+                f"steady_cpu={self.steady_cpu_seconds:.1f}s"
+            ),
+            f"sessions_per_core={self.sessions_per_core:.1f}",
+            f"rss_per_session={self.rss_per_session / 2**20:.2f}MiB",
+            "stage latency (s): " + " ".join(f"p{p}" for p in PERCENTILES),
+        ]
+        for stage, values in self.percentiles().items():
+            columns = " ".join(f"{values[p]:.3f}" for p in PERCENTILES)
+            lines.append(f"  {stage:<9} {columns}")
+        return "\n".join(lines)
+
+
+def rss_bytes() -> int:
+    """Resident memory of the process."""
+    try:
+        statm = Path("/proc/self/statm").read_text()
+        return int(statm.split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Peak instead of current RSS, in KiB on Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class StageCollector:
+    """Collects the stage latencies of all turns of all sessions."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, List[float]] = {}
+
+    def add_turn(self, turn: Dict[str, float]) -> None:
+        """Add the stage latencies of a finished turn."""
+        for stage, seconds in turn.items():
+            self.stages.setdefault(stage, []).append(seconds)
+        self.stages.setdefault("response", []).append(sum(turn.values()))
+
+
+def build_pipeline(
+    config: BenchmarkConfig,
+    transport: LoopbackTransport,
+    seed: int,
+) -> Pipeline:
+    """
+    Build a session pipeline shaped like one of the voice bots.
+
+    :param config: benchmark parameters.
+    :param transport: loopback transport of the session.
+    :param seed: random seed of the fake services.
+    :return: pipeline of the session.
+    """
+    context = OpenAILLMContext(
+        [{"role": "system", "content": "You are a benchmark assistant."}],
+    )
+    if config.shape == "webrtc":
+        llm = FakeLLMService(
+            ttfb=config.llm_ttfb,
+            token_interval=config.llm_token_interval,
+            audio_out=True,
+            answer=config.answer,
+            seed=seed,
+        )
+        aggregator = llm.create_context_aggregator(context)
+        return Pipeline(
+            [
+                transport.input(),
+                aggregator.user(),
+                ContextBudgetProcessor(),
+                llm,
+                transport.output(),
+                aggregator.assistant(),
+            ],
+        )
+
+    stt = FakeSTTService(latency=config.stt_latency, seed=seed)
+    llm = FakeLLMService(
+        ttfb=config.llm_ttfb,
+        token_interval=config.llm_token_interval,
+        answer=config.answer,
+        seed=seed,
+    )
+    tts = FakeTTSService(
+        ttfb=config.tts_ttfb,
+        text_aggregator=ClauseTextAggregator(),
+        seed=seed,
+    )
+    aggregator = llm.create_context_aggregator(context)
+    return Pipeline(
+        [
+            transport.input(),
+            stt,
+            aggregator.user(),
+            ContextBudgetProcessor(),
+            llm,
+            tts,
+            transport.output(),
+            aggregator.assistant(),
+        ],
+    )
+
+
+async def run_session(
+    config: BenchmarkConfig,
+    index: int,
+    collector: StageCollector,
+) -> Tuple[int, int]:
+    """
+    Run one session until its caller is done.
+
+    :param config: benchmark parameters.
+    :param index: session number, used to seed the fakes.
+    :param collector: collector of stage latencies.
+    :return: answered turns and turns that timed out.
+    """
+    transport = LoopbackTransport(
+        turns=config.turns,
+        utterance_seconds=config.utterance_seconds,
+    )
+    task = PipelineTask(
+        build_pipeline(config, transport, seed=config.seed + index),
+        params=PipelineParams(
+            allow_interruptions=True,
+            enable_metrics=True,
+            enable_usage_metrics=True,
+            audio_in_sample_rate=16000,
+            audio_out_sample_rate=24000,
+        ),
+        observers=[
+            LatencyObserver(
+                pipeline=f"benchmark-{config.shape}",
+                providers={"stt": "fake", "llm": "fake", "tts": "fake"},
+                on_turn=collector.add_turn,
+            ),
+        ],
+    )
+    runner = PipelineRunner(handle_sigint=False)
+    run = asyncio.create_task(runner.run(task))
+    done = asyncio.create_task(transport.done.wait())
+    await asyncio.wait([run, done], return_when=asyncio.FIRST_COMPLETED)
+    if not run.done():
+        await task.queue_frame(EndFrame())
+    done.cancel()
+    await run
+    return config.turns - transport.timeouts, transport.timeouts
+
+
+async def run_benchmark(config: BenchmarkConfig) -> BenchmarkReport:
+    """
+    Run concurrent sessions and measure them.
+
+    :param config: benchmark parameters.
+    :return: benchmark report.
+    """
+    if config.shape not in SHAPES:
+        raise ValueError(f"Unknown pipeline shape: {config.shape}")
+    collector = StageCollector()
+    peak_rss = baseline_rss = rss_bytes()
+    started_wall = time.monotonic()
+    started_cpu = time.process_time()
+
+    # Wall and CPU clocks when the last session starts and the first ends.
+    steady: List[Tuple[float, float]] = []
+    started = finished = 0
+
+    def clocks() -> Tuple[float, float]:
+        return time.monotonic(), time.process_time()
+
+    async def start(index: int) -> Tuple[int, int]:
+        nonlocal started, finished
+        await asyncio.sleep(index * config.ramp)
+        started += 1
+        if started == config.sessions and not finished:
+            steady.append(clocks())
+        try:
+            return await run_session(config, index, collector)
+        finally:
+            finished += 1
+            if len(steady) == 1:
+                steady.append(clocks())
+
+    sessions = asyncio.gather(*(start(i) for i in range(config.sessions)))
+    while True:
+        try:
+            results = await asyncio.wait_for(asyncio.shield(sessions), 0.5)
+            break
+        except asyncio.TimeoutError:
+            peak_rss = max(peak_rss, rss_bytes())
+
+    steady_wall = steady_cpu = 0.0
+    if len(steady) == 2:
+        (wall_from, cpu_from), (wall_to, cpu_to) = steady
+        steady_wall, steady_cpu = wall_to - wall_from, cpu_to - cpu_from
+    return BenchmarkReport(
+        config=config,
+        wall_seconds=time.monotonic() - started_wall,
+        cpu_seconds=time.process_time() - started_cpu,
+        steady_wall_seconds=steady_wall,
+        steady_cpu_seconds=steady_cpu,
+        rss_per_session=max(peak_rss - baseline_rss, 0) / max(config.sessions, 1),
+        turns=sum(answered for answered, _ in results),
+        timeouts=sum(timeouts for _, timeouts in results),
+        stages=collector.stages,
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Entrypoint of the benchmark command."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--shape", choices=SHAPES, default="daily")
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--utterance", type=float, default=1.5)
+    parser.add_argument("--ramp", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    latency = LatencyDistribution.parse
+    parser.add_argument(
+        "--stt",
+        type=latency,
+        default="0.3:0.1",
+        help="STT latency as mean[:jitter[:normal|lognormal|uniform]]",
+    )
+    parser.add_argument("--llm-ttfb", type=latency, default="0.4:0.15")
+    parser.add_argument("--llm-token", type=latency, default="0.02:0.01")
+    parser.add_argument("--tts-ttfb", type=latency, default="0.2:0.08")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    # Pipecat logs every turn at debug level, which would dominate the CPU time.
+    pipecat_logger.remove()
+    pipecat_logger.add(sys.stderr, level=args.log_level)
+
+    config = BenchmarkConfig(
+        sessions=args.sessions,
+        shape=args.shape,
+        turns=args.turns,
+        utterance_seconds=args.utterance,
+        ramp=args.ramp,
+        seed=args.seed,
+        stt_latency=args.stt,
+        llm_ttfb=args.llm_ttfb,
+        llm_token_interval=args.llm_token,
+        tts_ttfb=args.tts_ttfb,
+    )
+    report = asyncio.run(run_benchmark(config))
+    print(report.format())  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
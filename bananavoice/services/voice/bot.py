@@ -3,16 +3,59 @@
 import asyncio
 import logging
 import os
-from typing import Optional
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Union
 
-from pipecat.audio.vad.silero import SileroVADAnalyzer
+from pipecat.frames.frames import TTSSpeakFrame
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
 from pipecat.pipeline.task import PipelineParams, PipelineTask
 from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
-from pipecat.services.openai.llm import OpenAILLMService
-from pipecat.services.openai.stt import OpenAISTTService
+from pipecat.processors.frame_processor import FrameProcessor
+from pipecat.services.ai_service import AIService
 from pipecat.transports.services.daily import DailyParams, DailyTransport
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from bananavoice.db.pool import pool_options
+from bananavoice.services.voice.context import ContextBudgetProcessor, OpenAISummarizer
+from bananavoice.services.voice.metering import SessionUsage, UsageMeter, UsageWriter
+from bananavoice.services.voice.observers import (
+    InboundAudioObserver,
+    InterruptionObserver,
+    LatencyObserver,
+)
+from bananavoice.services.voice.phrase_cache import (
+    CachedOpenAITTSService,
+    PhraseAudioCache,
+)
+from bananavoice.services.voice.quota import VoiceQuota
+from bananavoice.services.voice.reaper import SessionReaper
+from bananavoice.services.voice.response_cache import ResponseCache
+from bananavoice.services.voice.router import (
+    ProviderRouter,
+    RoutedOpenAILLMService,
+    RoutedOpenAISTTService,
+    create_router,
+)
+from bananavoice.services.voice.startup import (
+    DeferredSileroVADAnalyzer,
+    StartupTimeline,
+    warm_openai_service,
+)
+from bananavoice.services.voice.text_aggregator import ClauseTextAggregator
+from bananavoice.services.voice.transcripts import (
+    TranscriptRecorder,
+    TranscriptWriter,
+)
+from bananavoice.services.voice.turn import create_vad_analyzer
+from bananavoice.services.voice.usage_aggregator import UsageAggregator
+from bananavoice.settings import settings
 
 # Optional imports
 try:
@@ -22,6 +65,8 @@ except (ImportError, Exception):
 
 logger = logging.getLogger(__name__)
 
+GREETING = "Hello! I'm BananaVoice, your AI assistant. How can I help you today?"
+
 
 class VoiceBot:
     """Voice bot that handles real-time conversation using Pipecat."""
@@ -33,9 +78,12 @@ class VoiceBot:
         daily_api_key: str,
         openai_api_key: str,
         cartesia_api_key: Optional[str] = None,
+        *,
+        user_id: Optional[uuid.UUID] = None,
     ) -> None:
         """Initialize the voice bot."""
         self.room_url = room_url
+        self.user_id = user_id
         self.token = token
         self.daily_api_key = daily_api_key
         self.openai_api_key = openai_api_key
@@ -44,9 +92,28 @@ class VoiceBot:
         self.runner: Optional[PipelineRunner] = None
         self.task: Optional[PipelineTask] = None
         self.transport: Optional[DailyTransport] = None
+        self.redis: Optional[Redis] = None
+        self.db_engine: Optional[AsyncEngine] = None
+        self.usage_writer: Optional[UsageWriter] = None
+        self.transcript_writer: Optional[TranscriptWriter] = None
+        self.vad: Optional[DeferredSileroVADAnalyzer] = None
+        self.services: List[AIService] = []
+        self.routers: Dict[str, ProviderRouter] = {}
+        self.joined = asyncio.Event()
+        self.reaper = SessionReaper(
+            "daily",
+            idle_timeout=settings.voice_session_idle_timeout,
+            max_duration=settings.voice_session_max_duration,
+            interval=settings.voice_reaper_interval,
+        )
+        self._bootstrap_task: Optional[asyncio.Task[None]] = None
 
     async def setup_pipeline(self) -> None:
         """Set up the Pipecat pipeline for voice processing."""
+        # The VAD model is loaded while the bot joins the room,
+        # its stop time adapts to the caller's pauses
+        self.vad = create_vad_analyzer("daily")
+
         # Daily transport for WebRTC (following the instant-voice example)
         self.transport = DailyTransport(
             self.room_url,
@@ -55,30 +122,52 @@ class VoiceBot:
             DailyParams(
                 audio_in_enabled=True,
                 audio_out_enabled=True,
-                vad_analyzer=SileroVADAnalyzer(),
+                vad_analyzer=self.vad,
             ),
         )
 
-        # STT service - Using GPT-4o Mini for 50% cost reduction ($0.003/min vs $0.006/min)
-        stt = OpenAISTTService(
+        # Every stage is routed between the providers configured in settings,
+        # by default GPT-4o Mini transcription, GPT-4.1 mini and OpenAI TTS
+        self.routers = {
+            "stt": create_router("stt", settings.voice_stt_providers),
+            "llm": create_router("llm", settings.voice_llm_providers),
+            "tts": create_router("tts", settings.voice_tts_providers),
+        }
+
+        # STT service
+        stt = RoutedOpenAISTTService(
             api_key=self.openai_api_key,
-            model="gpt-4o-mini-transcribe",
+            router=self.routers["stt"],
         )
 
-        # LLM service - Using GPT-4.1 mini for optimal balance of cost and performance
-        llm = OpenAILLMService(
+        # LLM service - the completion request is closed as soon as the user interrupts
+        llm = RoutedOpenAILLMService(
             api_key=self.openai_api_key,
-            model="gpt-4.1-mini-2025-04-14",
+            router=self.routers["llm"],
         )
 
-        # TTS service - using OpenAI TTS for reliability
-        from pipecat.services.openai.tts import OpenAITTSService
-
-        tts = OpenAITTSService(
+        # TTS service - the greeting and recurring phrases are served from
+        # the phrase audio cache and LLM text is spoken in clause sized chunks
+        # to start audio early
+        tts = CachedOpenAITTSService(
             api_key=self.openai_api_key,
-            voice="nova",
+            router=self.routers["tts"],
+            text_aggregator=ClauseTextAggregator(
+                first_min_chars=settings.voice_tts_first_chunk_chars,
+                min_chars=settings.voice_tts_chunk_chars,
+                max_chars=settings.voice_tts_max_chunk_chars,
+            ),
+            phrase_cache=PhraseAudioCache(
+                settings.voice_phrase_cache_dir,
+                phrases=[GREETING],
+                min_hits=settings.voice_phrase_cache_min_hits,
+                max_chars=settings.voice_phrase_cache_max_chars,
+                max_files=settings.voice_phrase_cache_max_files,
+            ),
         )
 
+        self.services = [stt, llm, tts]
+
         # TODO: Add Cartesia support once voice ID is configured properly
         # if self.cartesia_api_key and CartesiaTTSService is not None:
         #     tts = CartesiaTTSService(
@@ -90,22 +179,110 @@ class VoiceBot:
         context = OpenAILLMContext()
         context_aggregator = llm.create_context_aggregator(context)
 
+        # Keep the prompt size flat by summarizing old turns
+        context_budget = ContextBudgetProcessor(
+            max_tokens=settings.voice_context_max_tokens,
+            keep_messages=settings.voice_context_keep_messages,
+            summarizer=OpenAISummarizer(
+                api_key=self.openai_api_key,
+                model=settings.voice_summary_model,
+            ),
+        )
+
+        # Redis holds the answer cache and the rolling usage totals
+        if settings.voice_llm_cache_enabled or settings.voice_usage_metering:
+            self.redis = Redis.from_url(str(settings.redis_url))
+
+        # Optional cache of answers to common questions
+        cache_lookup: List[FrameProcessor] = []
+        cache_capture: List[FrameProcessor] = []
+        if settings.voice_llm_cache_enabled and self.redis:
+            response_cache = ResponseCache(
+                self.redis,
+                ttl=settings.voice_llm_cache_ttl,
+                allow_patterns=settings.voice_llm_cache_allow,
+                max_words=settings.voice_llm_cache_max_words,
+            )
+            cache_lookup = [response_cache.lookup()]
+            cache_capture = [response_cache.capture()]
+
+        # Usage and transcripts are written to the database
+        session_id = uuid.uuid4().hex
+        session_factory = self._create_session_factory()
+
+        # Meter the provider usage of the session
+        metering: List[FrameProcessor] = []
+        if settings.voice_usage_metering:
+            quota = None
+            if self.redis and self.user_id and settings.voice_quota_enabled:
+                quota = VoiceQuota(
+                    self.redis,
+                    minutes=settings.voice_quota_minutes,
+                    period=settings.voice_quota_period,
+                )
+            self.usage_writer = UsageWriter(
+                session_factory,
+                interval=settings.voice_usage_flush_interval,
+                max_pending=settings.voice_usage_max_pending_rows,
+                aggregator=UsageAggregator(self.redis) if self.redis else None,
+                quota=quota,
+            )
+            metering = [
+                UsageMeter(
+                    SessionUsage(session_id, "daily", user_id=self.user_id),
+                    self.usage_writer,
+                    stt=stt,
+                    transport="daily",
+                ),
+            ]
+
+        # Keep the transcript, written behind the pipeline
+        transcript: List[FrameProcessor] = []
+        if settings.voice_transcripts_enabled:
+            self.transcript_writer = TranscriptWriter(
+                session_factory,
+                batch_size=settings.voice_transcripts_batch_size,
+                interval=settings.voice_transcripts_flush_interval,
+                max_pending=settings.voice_transcripts_max_pending,
+            )
+            transcript = [
+                TranscriptRecorder(
+                    context,
+                    self.transcript_writer,
+                    session_id,
+                    "daily",
+                    user_id=self.user_id,
+                ),
+            ]
+
         # Build the pipeline with STT
         self.pipeline = Pipeline(
             [
                 self.transport.input(),  # Audio input from Daily
                 stt,  # Speech-to-Text
                 context_aggregator.user(),  # User context aggregation
+                *cache_lookup,  # Cached answers skip the LLM
+                context_budget,  # Context token budget
                 llm,  # LLM processing
+                *cache_capture,  # Fill the answer cache
                 tts,  # Text-to-Speech
                 self.transport.output(),  # Audio output to Daily
                 context_aggregator.assistant(),  # Assistant context aggregation
+                *transcript,  # Conversation transcript
+                *metering,  # Usage metering
             ],
         )
 
         # Set up event handlers
+        @self.transport.event_handler("on_joined")
+        async def on_joined(transport: DailyTransport, data: Dict[str, Any]) -> None:
+            self.joined.set()
+
         @self.transport.event_handler("on_first_participant_joined")
-        async def on_first_participant_joined(transport, participant) -> None:
+        async def on_first_participant_joined(
+            transport: DailyTransport,
+            participant: Dict[str, Any],
+        ) -> None:
             logger.info(f"First participant joined: {participant['id']}")
             # Send initial context to start conversation
             initial_messages = [
@@ -115,44 +292,139 @@ class VoiceBot:
                 },
                 {
                     "role": "assistant",
-                    "content": "Hello! I'm BananaVoice, your AI assistant. How can I help you today?",
+                    "content": GREETING,
                 },
             ]
             context.set_messages(initial_messages)
-            await self.task.queue_frames(
-                [context_aggregator.user().get_context_frame()],
-            )
+            # Speak the fixed greeting directly, it doesn't need the LLM
+            await self.task.queue_frames([TTSSpeakFrame(GREETING)])
 
         @self.transport.event_handler("on_participant_left")
-        async def on_participant_left(transport, participant, reason) -> None:
+        async def on_participant_left(
+            transport: DailyTransport,
+            participant: Dict[str, Any],
+            reason: str,
+        ) -> None:
             logger.info(f"Participant left: {participant}")
             if self.task:
                 await self.task.cancel()
 
     async def run(self) -> None:
         """Run the voice bot pipeline."""
+        timeline = StartupTimeline("daily")
         if not self.pipeline:
-            await self.setup_pipeline()
+            await timeline.track("setup", self.setup_pipeline())
 
         if not self.pipeline:
             raise RuntimeError("Pipeline not initialized")
 
+        activity = InboundAudioObserver()
+        # Stages are labelled with the provider that answered last
+        providers: Dict[str, Union[str, Callable[[], str]]] = {
+            kind: router.current_provider for kind, router in self.routers.items()
+        }
+        providers["transport"] = "daily"
         self.task = PipelineTask(
             self.pipeline,
             params=PipelineParams(
+                allow_interruptions=True,
                 enable_metrics=True,
                 enable_usage_metrics=True,
             ),
+            observers=[
+                LatencyObserver(pipeline="daily", providers=providers),
+                InterruptionObserver(pipeline="daily"),
+                activity,
+            ],
         )
+        # Leave rooms nobody talks in, even if no one was seen leaving
+        self.reaper.track(self.room_url, activity, self._teardown)
+        self.reaper.start()
+        if self.usage_writer:
+            self.usage_writer.start()
+        if self.transcript_writer:
+            self.transcript_writer.start()
 
         self.runner = PipelineRunner(handle_sigint=False)
+        # The runner joins the room while the rest of the bootstrap runs
+        self._bootstrap_task = asyncio.create_task(self.bootstrap(timeline))
         await self.runner.run(self.task)
 
+    async def bootstrap(self, timeline: StartupTimeline) -> None:
+        """
+        Load the VAD model, warm up providers and wait for the room join.
+
+        All phases run concurrently and are recorded in the timeline.
+        A bot whose VAD model can't be loaded would never hear the user,
+        so it leaves the room instead.
+
+        :param timeline: startup timeline of the bot.
+        """
+        phases = [
+            timeline.track("join", self.joined.wait()),
+            timeline.track(
+                "providers",
+                asyncio.gather(*(warm_openai_service(s) for s in self.services)),
+            ),
+        ]
+        if self.vad:
+            phases.append(timeline.track("vad", self._load_vad(self.vad)))
+        ready = False
+        try:
+            await asyncio.gather(*phases)
+            ready = True
+        except Exception as e:
+            logger.error(f"Bot bootstrap failed, leaving the room: {e}")
+            if self.task:
+                await self.task.cancel()
+        finally:
+            timeline.finish(ready=ready)
+
+    @staticmethod
+    async def _load_vad(vad: DeferredSileroVADAnalyzer) -> None:
+        try:
+            await vad.load()
+        except Exception as e:
+            logger.warning(f"Failed to load the VAD model, retrying: {e}")
+            await vad.load()
+
+    def _create_session_factory(
+        self,
+    ) -> Optional[async_sessionmaker[AsyncSession]]:
+        if not (settings.voice_usage_metering or settings.voice_transcripts_enabled):
+            return None
+        self.db_engine = create_async_engine(
+            str(settings.db_url),
+            echo=settings.db_echo,
+            **pool_options(),
+        )
+        return async_sessionmaker(self.db_engine, expire_on_commit=False)
+
+    async def _teardown(self, reason: str) -> None:
+        if self.task:
+            await self.task.cancel()
+
     async def stop(self) -> None:
         """Stop the voice bot."""
+        await self.reaper.stop()
         if self.runner:
             # await self.runner.stop()  # API may vary
             pass
+        if self._bootstrap_task:
+            self._bootstrap_task.cancel()
+            self._bootstrap_task = None
+        if self.usage_writer:
+            await self.usage_writer.stop()
+            self.usage_writer = None
+        if self.transcript_writer:
+            await self.transcript_writer.stop()
+            self.transcript_writer = None
+        if self.redis:
+            await self.redis.aclose()
+            self.redis = None
+        if self.db_engine:
+            await self.db_engine.dispose()
+            self.db_engine = None
 
 
 async def run_bot(
@@ -161,6 +433,8 @@ async def run_bot(
     daily_api_key: Optional[str] = None,
     openai_api_key: Optional[str] = None,
     cartesia_api_key: Optional[str] = None,
+    *,
+    user_id: Optional[uuid.UUID] = None,
 ) -> None:
     """Run the voice bot with the given configuration."""
     # Get API keys from environment if not provided (BananaVoice format)
@@ -191,6 +465,7 @@ async def run_bot(
         daily_api_key=daily_key,
         openai_api_key=openai_key,
         cartesia_api_key=cartesia_key,
+        user_id=user_id,
     )
 
     try:
@@ -210,11 +485,12 @@ if __name__ == "__main__":
     import sys
 
     if len(sys.argv) < 2:
-        msg = "Usage: python bot.py <room_url> [token]"
+        msg = "Usage: python bot.py <room_url> [token] [user_id]"
         logger.error(msg)
         sys.exit(1)
 
     room_url = sys.argv[1]
     token = sys.argv[2] if len(sys.argv) > 2 else ""
+    user_id = uuid.UUID(sys.argv[3]) if len(sys.argv) > 3 else None
 
-    asyncio.run(run_bot(room_url, token))
+    asyncio.run(run_bot(room_url, token, user_id=user_id))
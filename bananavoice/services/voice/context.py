@@ -0,0 +1,241 @@
+"""Token budget for LLM conversation contexts."""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletionMessageParam
+from pipecat.frames.frames import Frame
+from pipecat.processors.aggregators.openai_llm_context import (
+    OpenAILLMContext,
+    OpenAILLMContextFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+logger = logging.getLogger(__name__)
+
+Message = ChatCompletionMessageParam
+Summarizer = Callable[[Sequence[Message]], Awaitable[str]]
+
+SUMMARY_PREFIX = "Summary of the conversation so far: "
+
+
+def estimate_tokens(message: Message) -> int:
+    """
+    Roughly estimate the number of tokens in a message.
+
+    Uses the common 4 characters per token rule plus a small
+    per-message overhead, which is good enough for budgeting.
+
+    :param message: chat message.
+    :return: estimated token count.
+    """
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        content = " ".join(
+            str(part.get("text", "")) for part in content if isinstance(part, dict)
+        )
+    return len(str(content)) // 4 + 4
+
+
+class TokenCounter:
+    """Keeps a running token estimate of a growing message list."""
+
+    def __init__(self) -> None:
+        self.tokens = 0
+        self._counted = 0
+        self._last: Optional[Message] = None
+
+    def update(self, messages: Sequence[Message]) -> int:
+        """
+        Count messages appended since the last call.
+
+        Falls back to a full recount if earlier messages were replaced.
+
+        :param messages: current context messages.
+        :return: estimated tokens of all messages.
+        """
+        if (
+            not self._counted
+            or self._counted > len(messages)
+            or messages[self._counted - 1] is not self._last
+        ):
+            self.tokens = 0
+            self._counted = 0
+        for message in messages[self._counted :]:
+            self.tokens += estimate_tokens(message)
+        self._counted = len(messages)
+        self._last = messages[-1] if messages else None
+        return self.tokens
+
+    def set(self, messages: Sequence[Message], tokens: int) -> None:
+        """
+        Take a token estimate of messages that is already known.
+
+        :param messages: current context messages.
+        :param tokens: estimated tokens of all messages.
+        """
+        self.tokens = tokens
+        self._counted = len(messages)
+        self._last = messages[-1] if messages else None
+
+
+def turn_end(messages: Sequence[Message], index: int) -> int:
+    """
+    End of the turn starting at an index.
+
+    Tool replies belong to the turn before them, so a tool call is never
+    separated from its replies.
+
+    :param messages: context messages.
+    :param index: index of the first message of the turn.
+    :return: index after the last message of the turn.
+    """
+    end = index + 1
+    while end < len(messages) and messages[end].get("role") == "tool":
+        end += 1
+    return end
+
+
+class OpenAISummarizer:
+    """Summarizes old conversation turns with an OpenAI chat model."""
+
+    def __init__(self, api_key: str, model: str) -> None:
+        self.client = AsyncOpenAI(api_key=api_key)
+        self.model = model
+
+    async def __call__(self, messages: Sequence[Message]) -> str:
+        """
+        Summarize messages.
+
+        :param messages: messages to summarize.
+        :return: summary text.
+        """
+        transcript = "\n".join(
+            f"{message['role']}: {message.get('content', '')}" for message in messages
+        )
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "Summarize this voice conversation in a few short "
+                    "sentences. Keep names, facts and open questions.",
+                },
+                {"role": "user", "content": transcript},
+            ],
+        )
+        return response.choices[0].message.content or ""
+
+
+class ContextBudgetProcessor(FrameProcessor):
+    """
+    Keeps the LLM context within a token budget.
+
+    Sits between the user context aggregator and the LLM. When the
+    context grows past `max_tokens`, the oldest turns are summarized in
+    a background task while the current turn goes on unchanged; once the
+    summary is ready it replaces those turns. If no summarizer is set, or
+    the context reaches `hard_limit` before a summary arrives, the oldest
+    turns are dropped instead so the prompt size stays flat.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 2000,
+        keep_messages: int = 6,
+        summarizer: Optional[Summarizer] = None,
+        hard_limit: Optional[int] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.max_tokens = max_tokens
+        self.keep_messages = keep_messages
+        self.summarizer = summarizer
+        self.hard_limit = hard_limit or int(max_tokens * 1.5)
+        self.counter = TokenCounter()
+        self._summary_task: Optional[asyncio.Task[None]] = None
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection) -> None:
+        """Check the context budget before it reaches the LLM."""
+        await super().process_frame(frame, direction)
+        if isinstance(frame, OpenAILLMContextFrame):
+            self.enforce_budget(frame.context)
+        await self.push_frame(frame, direction)
+
+    async def cleanup(self) -> None:
+        """Stop a summary still in progress."""
+        await super().cleanup()
+        if self._summary_task is not None:
+            await self.cancel_task(self._summary_task)
+            self._summary_task = None
+
+    def enforce_budget(self, context: OpenAILLMContext) -> None:
+        """
+        Start summarizing or trim the context if it is over budget.
+
+        :param context: LLM context shared with the aggregators.
+        """
+        messages = context.messages
+        if self.counter.update(messages) <= self.max_tokens:
+            return
+        if self.summarizer is not None and self._summary_task is None:
+            end = len(messages) - self.keep_messages
+            # Keep tool replies with their call.
+            while 0 < end < len(messages) and messages[end].get("role") == "tool":
+                end -= 1
+            old = messages[self._history_start(messages) : end]
+            if old:
+                self._summary_task = self.create_task(
+                    self._summarize(self.summarizer, context, old),
+                )
+        if self.summarizer is None or self.counter.tokens > self.hard_limit:
+            self._trim(context)
+
+    def _history_start(self, messages: Sequence[Message]) -> int:
+        """Index of the first message that may be summarized or dropped."""
+        start = 0
+        while (
+            start < len(messages)
+            and messages[start].get("role") == "system"
+            and not str(messages[start].get("content", "")).startswith(SUMMARY_PREFIX)
+        ):
+            start += 1
+        return start
+
+    def _trim(self, context: OpenAILLMContext) -> None:
+        messages = list(context.messages)
+        start = end = self._history_start(messages)
+        tokens = self.counter.update(messages)
+        while tokens > self.max_tokens:
+            next_end = turn_end(messages, end)
+            if len(messages) - next_end < self.keep_messages:
+                break
+            tokens -= sum(estimate_tokens(m) for m in messages[end:next_end])
+            end = next_end
+        del messages[start:end]
+        context.set_messages(messages)
+        self.counter.set(context.messages, tokens)
+
+    async def _summarize(
+        self,
+        summarizer: Summarizer,
+        context: OpenAILLMContext,
+        old: List[Message],
+    ) -> None:
+        try:
+            summary = await summarizer(old)
+        except Exception as e:
+            logger.warning(f"Context summarization failed: {e}")
+            return
+        finally:
+            self._summary_task = None
+
+        old_ids = {id(message) for message in old}
+        messages = [m for m in context.messages if id(m) not in old_ids]
+        start = self._history_start(messages)
+        messages.insert(start, {"role": "system", "content": SUMMARY_PREFIX + summary})
+        context.set_messages(messages)
+        self.counter.update(context.messages)
+        logger.info(f"Summarized {len(old)} messages, ~{self.counter.tokens} tokens")
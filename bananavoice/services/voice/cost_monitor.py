@@ -2,7 +2,44 @@
 
 import time
 from dataclasses import dataclass
-from typing import Dict, Optional
+from typing import Dict, Mapping, Optional, Tuple
+
+# Metered usage is keyed by (kind, model, unit), see services.voice.metering.
+UsageKey = Tuple[str, str, str]
+
+# USD per unit of metered usage, keyed by model name prefix.
+USAGE_PRICES: Dict[str, Dict[str, float]] = {
+    "gpt-4.1-mini": {
+        "input_tokens": 0.40 / 1e6,
+        "cached_input_tokens": 0.10 / 1e6,
+        "output_tokens": 1.60 / 1e6,
+    },
+    "gpt-4o-mini-transcribe": {"seconds": 0.003 / 60},
+    # Billed per audio token, about $0.015 per minute of speech.
+    "gpt-4o-mini-tts": {"characters": 15.0 / 1e6},
+    "tts-1": {"characters": 15.0 / 1e6},
+    # Gemini Live reports no modality split, audio rates are used.
+    "models/gemini-2.0-flash-live": {
+        "input_tokens": 2.10 / 1e6,
+        "output_tokens": 8.50 / 1e6,
+    },
+    "daily": {"seconds": 0.00099 / 60},
+    "small_webrtc": {"seconds": 0.0},
+}
+
+
+def unit_price(model: str, unit: str) -> float:
+    """
+    Price of one unit of usage of a model.
+
+    :param model: model or transport name.
+    :param unit: usage unit.
+    :return: USD per unit, zero for unknown models.
+    """
+    prefixes = [prefix for prefix in USAGE_PRICES if model.startswith(prefix)]
+    if not prefixes:
+        return 0.0
+    return USAGE_PRICES[max(prefixes, key=len)].get(unit, 0.0)
 
 
 @dataclass
@@ -16,6 +53,31 @@ class CostBreakdown:
     )
     tts_cost: float = 0.012  # OpenAI TTS per minute (estimated)
 
+    @classmethod
+    def from_usage(
+        cls,
+        usage: Mapping[UsageKey, float],
+        minutes: float,
+    ) -> "CostBreakdown":
+        """
+        Per-minute costs of metered usage.
+
+        :param usage: metered quantities keyed by kind, model and unit.
+        :param minutes: minutes the usage was metered over.
+        :return: cost breakdown of the usage.
+        """
+        costs = {"transport": 0.0, "stt": 0.0, "llm": 0.0, "tts": 0.0}
+        for (kind, model, unit), quantity in usage.items():
+            if kind in costs:
+                costs[kind] += quantity * unit_price(model, unit)
+        minutes = max(minutes, 1e-6)
+        return cls(
+            daily_audio=costs["transport"] / minutes,
+            stt_cost=costs["stt"] / minutes,
+            llm_cost=costs["llm"] / minutes,
+            tts_cost=costs["tts"] / minutes,
+        )
+
     @property
     def total_per_minute(self) -> float:
         """Calculate total cost per minute."""
@@ -48,11 +110,23 @@ class CostTracker:
         self.costs = CostBreakdown()
         self.start_time: Optional[float] = None
         self.participants: int = 0
-
-    def start_session(self, participants: int = 1) -> None:
-        """Start tracking a voice session."""
+        self.usage: Optional[Mapping[UsageKey, float]] = None
+
+    def start_session(
+        self,
+        participants: int = 1,
+        usage: Optional[Mapping[UsageKey, float]] = None,
+    ) -> None:
+        """
+        Start tracking a voice session.
+
+        :param participants: participants of the session.
+        :param usage: live metered usage of the session, the flat
+            per-minute estimates are used without it.
+        """
         self.start_time = time.time()
         self.participants = participants
+        self.usage = usage
 
     def get_current_cost(self) -> Dict[str, float]:
         """Get current accumulated cost."""
@@ -60,7 +134,14 @@ class CostTracker:
             return {"error": "No active session"}
 
         elapsed_minutes = (time.time() - self.start_time) / 60
-        total_cost = self.costs.total_per_minute * elapsed_minutes * self.participants
+        if self.usage is not None:
+            # Metered usage already covers every participant.
+            self.costs = CostBreakdown.from_usage(self.usage, elapsed_minutes)
+            total_cost = self.costs.total_per_minute * elapsed_minutes
+        else:
+            total_cost = (
+                self.costs.total_per_minute * elapsed_minutes * self.participants
+            )
 
         return {
             "elapsed_minutes": elapsed_minutes,
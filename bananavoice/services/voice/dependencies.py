@@ -1,7 +1,10 @@
 """Voice service dependencies."""
 
-from typing import Generator
+from typing import Generator, Optional
 
+from starlette.requests import Request
+
+from bananavoice.services.voice.quota import VoiceQuota
 from bananavoice.services.voice.service import VoiceService
 
 
@@ -21,3 +24,16 @@ def get_voice_service() -> Generator[VoiceService, None, None]:
     finally:
         # Cleanup if needed (currently no cleanup required)
         pass
+
+
+def get_voice_quota(request: Request) -> Optional[VoiceQuota]:
+    """
+    Get the voice minute quotas of the application.
+
+    The quotas keep a cached balance per user, so a single instance
+    is shared by all requests.
+
+    :param request: current request.
+    :return: voice minute quotas, None when they are disabled.
+    """
+    return getattr(request.app.state, "voice_quota", None)
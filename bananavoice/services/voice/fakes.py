@@ -0,0 +1,583 @@
+"""
+Offline fake voice services and a loopback transport.
+
+They stand in for the STT, LLM, TTS and transport providers so voice
+pipelines can be load tested without provider accounts. Every fake
+waits for a latency drawn from a configurable distribution, while audio
+moves through the pipeline at real-time pace like it does in production.
+"""
+
+import asyncio
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, List, Optional
+
+import numpy as np
+from pipecat.frames.frames import (
+    BotStoppedSpeakingFrame,
+    CancelFrame,
+    EndFrame,
+    Frame,
+    InputAudioRawFrame,
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    LLMTextFrame,
+    OutputAudioRawFrame,
+    StartFrame,
+    StartInterruptionFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.metrics.metrics import LLMTokenUsage
+from pipecat.processors.aggregators.llm_response import (
+    LLMAssistantAggregatorParams,
+    LLMUserAggregatorParams,
+)
+from pipecat.processors.aggregators.openai_llm_context import (
+    OpenAILLMContext,
+    OpenAILLMContextFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection
+from pipecat.services.llm_service import LLMService
+from pipecat.services.openai.llm import (
+    OpenAIAssistantContextAggregator,
+    OpenAIContextAggregatorPair,
+    OpenAIUserContextAggregator,
+)
+from pipecat.services.stt_service import SegmentedSTTService
+from pipecat.services.tts_service import TTSService
+from pipecat.transports.base_input import BaseInputTransport
+from pipecat.transports.base_output import BaseOutputTransport
+from pipecat.transports.base_transport import BaseTransport, TransportParams
+from pipecat.utils.time import time_now_iso8601
+
+from bananavoice.services.voice.llm_pool import WarmLLMService
+
+LATENCY_KINDS = ("normal", "lognormal", "uniform")
+
+
+@dataclass
+class LatencyDistribution:
+    """
+    Latency of a fake provider, in seconds.
+
+    :param mean: mean latency.
+    :param jitter: standard deviation for "normal" and "lognormal",
+        half the range for "uniform".
+    :param kind: "normal", "lognormal" or "uniform".
+    """
+
+    mean: float
+    jitter: float = 0.0
+    kind: str = "lognormal"
+
+    def __post_init__(self) -> None:
+        if self.kind not in LATENCY_KINDS:
+            raise ValueError(f"Unknown latency distribution: {self.kind}")
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw a latency, never negative."""
+        if self.jitter <= 0 or self.mean <= 0:
+            return max(self.mean, 0.0)
+        if self.kind == "normal":
+            return max(rng.gauss(self.mean, self.jitter), 0.0)
+        if self.kind == "uniform":
+            low, high = self.mean - self.jitter, self.mean + self.jitter
+            return max(rng.uniform(low, high), 0.0)
+        # Lognormal with the requested mean and standard deviation,
+        # the usual shape of network service latencies.
+        sigma2 = math.log(1 + (self.jitter / self.mean) ** 2)
+        mu = math.log(self.mean) - sigma2 / 2
+        return rng.lognormvariate(mu, math.sqrt(sigma2))
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """
+        Parse a "mean[:jitter[:kind]]" specification, e.g. "0.3:0.1:normal".
+
+        :param spec: distribution specification.
+        :return: parsed distribution.
+        :raises ValueError: if the specification is invalid.
+        """
+        parts = spec.split(":")
+        return cls(
+            mean=float(parts[0]),
+            jitter=float(parts[1]) if len(parts) > 1 else 0.0,
+            kind=parts[2] if len(parts) > 2 else "lognormal",
+        )
+
+
+def synthetic_audio(
+    seconds: float,
+    sample_rate: int,
+    frequency: float = 220.0,
+) -> bytes:
+    """
+    A sine tone as 16-bit mono PCM.
+
+    :param seconds: duration of the tone.
+    :param sample_rate: audio sample rate.
+    :param frequency: tone frequency in Hz.
+    :return: raw PCM audio.
+    """
+    samples = np.arange(int(seconds * sample_rate))
+    tone = 8000 * np.sin(2 * np.pi * frequency * samples / sample_rate)
+    return tone.astype(np.int16).tobytes()
+
+
+class FakeSTTService(SegmentedSTTService):
+    """
+    Speech-to-text that answers every utterance with a fixed transcript.
+
+    :param latency: time from the end of speech to the transcript.
+    :param transcript: transcript of every utterance.
+    :param seed: random seed of the latency samples.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: LatencyDistribution,
+        transcript: str = "What is the weather like today?",
+        seed: Optional[int] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.transcript = transcript
+        self._rng = random.Random(seed)  # noqa: S311
+
+    def can_generate_metrics(self) -> bool:
+        """Fakes report metrics like the real services."""
+        return True
+
+    # pipecat declares run_stt as a coroutine, its services implement it
+    # as an async generator.
+    async def run_stt(  # type: ignore[override]
+        self,
+        audio: bytes,
+    ) -> AsyncGenerator[Frame, None]:
+        """Transcribe an utterance after a sampled latency."""
+        await self.start_processing_metrics()
+        await self.start_ttfb_metrics()
+        await asyncio.sleep(self.latency.sample(self._rng))
+        await self.stop_ttfb_metrics()
+        await self.stop_processing_metrics()
+        yield TranscriptionFrame(self.transcript, "", time_now_iso8601())
+
+
+class FakeLLMService(LLMService):
+    """
+    LLM that streams a canned answer.
+
+    With ``audio_out`` it behaves like a speech-to-speech model
+    (e.g. Gemini Live): it answers when the user stops speaking
+    and streams audio instead of text.
+
+    :param ttfb: time to the first token.
+    :param token_interval: time between tokens.
+    :param answer: streamed answer, split into words, a weather report if unset.
+    :param audio_out: stream audio (0.1s per word) instead of text.
+    :param seed: random seed of the latency samples.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttfb: LatencyDistribution,
+        token_interval: LatencyDistribution,
+        answer: Optional[str] = None,
+        audio_out: bool = False,
+        sample_rate: int = 24000,
+        seed: Optional[int] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.ttfb = ttfb
+        self.token_interval = token_interval
+        self.answer = answer or (
+            "It looks sunny and mild today, with a light breeze in the "
+            "afternoon. You won't need an umbrella, but a light jacket "
+            "might be nice in the evening."
+        )
+        self.audio_out = audio_out
+        self.audio_sample_rate = sample_rate
+        self._word_audio = synthetic_audio(0.1, sample_rate)
+        self._rng = random.Random(seed)  # noqa: S311
+
+    def can_generate_metrics(self) -> bool:
+        """Fakes report metrics like the real services."""
+        return True
+
+    def create_context_aggregator(
+        self,
+        context: OpenAILLMContext,
+        *,
+        user_params: Optional[LLMUserAggregatorParams] = None,
+        assistant_params: Optional[LLMAssistantAggregatorParams] = None,
+    ) -> OpenAIContextAggregatorPair:
+        """
+        Create the user and assistant context aggregators.
+
+        :param context: conversation context.
+        :param user_params: parameters of the user aggregator.
+        :param assistant_params: parameters of the assistant aggregator.
+        :return: aggregator pair, as for OpenAI services.
+        """
+        return OpenAIContextAggregatorPair(
+            _user=OpenAIUserContextAggregator(
+                context,
+                params=user_params or LLMUserAggregatorParams(),
+            ),
+            _assistant=OpenAIAssistantContextAggregator(
+                context,
+                params=assistant_params or LLMAssistantAggregatorParams(),
+            ),
+        )
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection) -> None:
+        """Answer context frames, pass everything else on."""
+        await super().process_frame(frame, direction)
+        if isinstance(frame, OpenAILLMContextFrame) and not self.audio_out:
+            await self._respond(frame.context)
+            return
+        await self.push_frame(frame, direction)
+        if isinstance(frame, UserStoppedSpeakingFrame) and self.audio_out:
+            await self._respond(None)
+
+    async def _respond(self, context: Optional[OpenAILLMContext]) -> None:
+        words = self.answer.split(" ")
+        await self.push_frame(LLMFullResponseStartFrame())
+        await self.start_processing_metrics()
+        await self.start_ttfb_metrics()
+        await asyncio.sleep(self.ttfb.sample(self._rng))
+        await self.stop_ttfb_metrics()
+        if self.audio_out:
+            await self.push_frame(TTSStartedFrame())
+        for index, word in enumerate(words):
+            if index:
+                await asyncio.sleep(self.token_interval.sample(self._rng))
+            if self.audio_out:
+                await self.push_frame(
+                    TTSAudioRawFrame(self._word_audio, self.audio_sample_rate, 1),
+                )
+            else:
+                await self.push_frame(LLMTextFrame(word if not index else f" {word}"))
+        if self.audio_out:
+            await self.push_frame(TTSStoppedFrame())
+        prompt_tokens = sum(
+            len(str(message.get("content", ""))) // 4
+            for message in (context.get_messages() if context else [])
+        )
+        await self.start_llm_usage_metrics(
+            LLMTokenUsage(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=len(words),
+                total_tokens=prompt_tokens + len(words),
+            ),
+        )
+        await self.stop_processing_metrics()
+        await self.push_frame(LLMFullResponseEndFrame())
+
+
+class FakeGeminiLiveLLMService(FakeLLMService, WarmLLMService):
+    """
+    Offline stand-in for the Gemini Live service of the WebRTC agent.
+
+    Like Gemini it answers the initial context, detects the end of user
+    turns itself from the energy of the input audio and streams audio
+    answers that are cancelled when the user barges in. It can also be
+    prewarmed by the LLM service pool.
+
+    :param connect_latency: time to open the fake upstream session.
+    :param silence_secs: silence that ends a user turn.
+    :param threshold: RMS amplitude of 16-bit samples that counts as speech.
+    """
+
+    def __init__(
+        self,
+        *,
+        connect_latency: Optional[LatencyDistribution] = None,
+        ttfb: Optional[LatencyDistribution] = None,
+        token_interval: Optional[LatencyDistribution] = None,
+        silence_secs: float = 0.5,
+        threshold: float = 500.0,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(
+            ttfb=ttfb or LatencyDistribution(0.5, 0.15),
+            token_interval=token_interval or LatencyDistribution(0.08, 0.02),
+            audio_out=True,
+            **kwargs,
+        )
+        self.connect_latency = connect_latency or LatencyDistribution(0.3, 0.1)
+        self.silence_secs = silence_secs
+        self.threshold = threshold
+        self._warm = False
+        self._speaking = False
+        self._last_voice = 0.0
+        self._response: Optional[asyncio.Task[None]] = None
+
+    @property
+    def is_warm(self) -> bool:
+        """Whether the fake upstream session is open."""
+        return self._warm
+
+    async def prewarm(self) -> bool:
+        """
+        Open the fake upstream session.
+
+        :return: always True.
+        """
+        await asyncio.sleep(self.connect_latency.sample(self._rng))
+        self._warm = True
+        return True
+
+    async def discard(self) -> None:
+        """Close a warm session that will never be used."""
+        self._warm = False
+
+    async def stop(self, frame: EndFrame) -> None:
+        """Stop answering."""
+        await super().stop(frame)
+        await self._cancel_response()
+
+    async def cancel(self, frame: CancelFrame) -> None:
+        """Stop answering right away."""
+        await super().cancel(frame)
+        await self._cancel_response()
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection) -> None:
+        """Consume input audio and answer user turns in the background."""
+        # Skip the turn handling of the parent, Gemini detects turns itself.
+        await LLMService.process_frame(self, frame, direction)
+        if isinstance(frame, InputAudioRawFrame):
+            if self._is_end_of_turn(frame):
+                await self._start_response(None)
+        elif isinstance(frame, OpenAILLMContextFrame):
+            await self._start_response(frame.context)
+        else:
+            await self.push_frame(frame, direction)
+
+    async def _handle_interruptions(self, frame: StartInterruptionFrame) -> None:
+        await super()._handle_interruptions(frame)
+        await self._cancel_response()
+
+    def _is_end_of_turn(self, frame: InputAudioRawFrame) -> bool:
+        samples = np.frombuffer(frame.audio, dtype=np.int16).astype(np.float32)
+        now = time.monotonic()
+        if samples.size and np.sqrt(np.mean(samples**2)) >= self.threshold:
+            self._speaking = True
+            self._last_voice = now
+            return False
+        if self._speaking and now - self._last_voice >= self.silence_secs:
+            self._speaking = False
+            return True
+        return False
+
+    async def _start_response(self, context: Optional[OpenAILLMContext]) -> None:
+        await self._cancel_response()
+        self._response = self.create_task(self._respond(context))
+
+    async def _cancel_response(self) -> None:
+        response, self._response = self._response, None
+        if response is not None and not response.done():
+            await self.cancel_task(response)
+
+
+class FakeTTSService(TTSService):
+    """
+    Text-to-speech producing a tone as long as speaking the text would take.
+
+    :param ttfb: time to the first audio chunk.
+    :param chars_per_second: speaking rate.
+    :param realtime_factor: how much faster than real time audio is made.
+    :param seed: random seed of the latency samples.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttfb: LatencyDistribution,
+        chars_per_second: float = 15.0,
+        realtime_factor: float = 10.0,
+        seed: Optional[int] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.ttfb = ttfb
+        self.chars_per_second = chars_per_second
+        self.realtime_factor = realtime_factor
+        self._rng = random.Random(seed)  # noqa: S311
+
+    def can_generate_metrics(self) -> bool:
+        """Fakes report metrics like the real services."""
+        return True
+
+    # pipecat declares run_tts as a coroutine, its services implement it
+    # as an async generator.
+    async def run_tts(  # type: ignore[override]
+        self,
+        text: str,
+    ) -> AsyncGenerator[Frame, None]:
+        """Synthesize a tone for the text after a sampled latency."""
+        await self.start_ttfb_metrics()
+        await asyncio.sleep(self.ttfb.sample(self._rng))
+        await self.start_tts_usage_metrics(text)
+        yield TTSStartedFrame()
+        await self.stop_ttfb_metrics()
+        chunk_seconds = self.chunk_size / (2 * self.sample_rate)
+        audio = synthetic_audio(len(text) / self.chars_per_second, self.sample_rate)
+        for start in range(0, len(audio), self.chunk_size):
+            yield TTSAudioRawFrame(
+                audio[start : start + self.chunk_size],
+                self.sample_rate,
+                1,
+            )
+            await asyncio.sleep(chunk_seconds / self.realtime_factor)
+        yield TTSStoppedFrame()
+
+
+class LoopbackInputTransport(BaseInputTransport):
+    """Plays a scripted caller into the pipeline."""
+
+    def __init__(self, transport: "LoopbackTransport", params: TransportParams) -> None:
+        super().__init__(params)
+        self._loopback = transport
+        self._caller_task: Optional[asyncio.Task[None]] = None
+
+    async def start(self, frame: StartFrame) -> None:
+        """Start the caller once the pipeline is running."""
+        await super().start(frame)
+        await self.set_transport_ready(frame)
+        self._caller_task = self.create_task(self._caller())
+
+    async def stop(self, frame: EndFrame) -> None:
+        """Stop the caller."""
+        await self._cancel_caller()
+        await super().stop(frame)
+
+    async def cancel(self, frame: CancelFrame) -> None:
+        """Stop the caller."""
+        await self._cancel_caller()
+        await super().cancel(frame)
+
+    async def _cancel_caller(self) -> None:
+        if self._caller_task:
+            await self.cancel_task(self._caller_task)
+            self._caller_task = None
+
+    async def _caller(self) -> None:
+        loopback = self._loopback
+        frame_bytes = int(self.sample_rate / 50) * 2
+        speech = synthetic_audio(loopback.utterance_seconds, self.sample_rate)
+        for _ in range(loopback.turns):
+            loopback.bot_finished.clear()
+            await self._handle_user_interruption(UserStartedSpeakingFrame())
+            for start in range(0, len(speech), frame_bytes):
+                await self.push_audio_frame(
+                    InputAudioRawFrame(
+                        speech[start : start + frame_bytes],
+                        self.sample_rate,
+                        1,
+                    ),
+                )
+                await asyncio.sleep(0.02)
+            loopback.turn_started_at.append(time.monotonic())
+            await self._handle_user_interruption(UserStoppedSpeakingFrame())
+            try:
+                await asyncio.wait_for(
+                    loopback.bot_finished.wait(),
+                    loopback.turn_timeout,
+                )
+            except asyncio.TimeoutError:
+                loopback.timeouts += 1
+            await asyncio.sleep(loopback.think_seconds)
+        loopback.done.set()
+
+
+class LoopbackOutputTransport(BaseOutputTransport):
+    """Consumes bot audio at real-time speed, like a remote peer."""
+
+    def __init__(self, transport: "LoopbackTransport", params: TransportParams) -> None:
+        super().__init__(params)
+        self._loopback = transport
+
+    async def start(self, frame: StartFrame) -> None:
+        """Start the media sender."""
+        await super().start(frame)
+        await self.set_transport_ready(frame)
+
+    async def write_audio_frame(self, frame: OutputAudioRawFrame) -> None:
+        """Play an audio chunk."""
+        self._loopback.audio_bytes += len(frame.audio)
+        await asyncio.sleep(len(frame.audio) / (2 * frame.sample_rate))
+
+    async def push_frame(
+        self,
+        frame: Frame,
+        direction: FrameDirection = FrameDirection.DOWNSTREAM,
+    ) -> None:
+        """Let the caller know when the bot is done talking."""
+        if isinstance(frame, BotStoppedSpeakingFrame):
+            self._loopback.bot_finished.set()
+        await super().push_frame(frame, direction)
+
+
+class LoopbackTransport(BaseTransport):
+    """
+    In-process transport with a scripted caller.
+
+    The caller speaks a synthetic utterance, waits for the bot to finish
+    its answer, thinks for a moment and speaks again, ``turns`` times.
+    Speech start and end are signalled directly, so no VAD is needed.
+
+    :param turns: utterances of the caller.
+    :param utterance_seconds: length of each utterance.
+    :param think_seconds: pause after the bot answered.
+    :param turn_timeout: longest wait for an answer.
+    """
+
+    def __init__(
+        self,
+        *,
+        params: Optional[TransportParams] = None,
+        turns: int = 3,
+        utterance_seconds: float = 1.5,
+        think_seconds: float = 0.5,
+        turn_timeout: float = 15.0,
+    ) -> None:
+        super().__init__()
+        self.params = params or TransportParams(
+            audio_in_enabled=True,
+            audio_out_enabled=True,
+        )
+        self.turns = turns
+        self.utterance_seconds = utterance_seconds
+        self.think_seconds = think_seconds
+        self.turn_timeout = turn_timeout
+        self.audio_bytes = 0
+        self.timeouts = 0
+        self.turn_started_at: List[float] = []
+        self.bot_finished = asyncio.Event()
+        self.done = asyncio.Event()
+        self._input: Optional[LoopbackInputTransport] = None
+        self._output: Optional[LoopbackOutputTransport] = None
+
+    def input(self) -> LoopbackInputTransport:
+        """Input side of the transport."""
+        if self._input is None:
+            self._input = LoopbackInputTransport(self, self.params)
+        return self._input
+
+    def output(self) -> LoopbackOutputTransport:
+        """Output side of the transport."""
+        if self._output is None:
+            self._output = LoopbackOutputTransport(self, self.params)
+        return self._output
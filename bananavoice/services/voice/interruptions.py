@@ -0,0 +1,49 @@
+"""Barge-in support for voice pipelines."""
+
+import logging
+from typing import Any, List, Optional
+
+from openai import AsyncStream
+from openai.types.chat import ChatCompletionChunk, ChatCompletionMessageParam
+from pipecat.frames.frames import StartInterruptionFrame
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+from pipecat.services.openai.llm import OpenAILLMService
+
+logger = logging.getLogger(__name__)
+
+
+class InterruptibleOpenAILLMService(OpenAILLMService):
+    """
+    OpenAI LLM that closes its completion stream on interruption.
+
+    Pipecat cancels the task reading the stream when the user starts
+    speaking, but the HTTP response stays open until it is garbage
+    collected and OpenAI keeps generating (and billing) tokens nobody
+    will hear. Closing the stream ends the request right away.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._stream: Optional[AsyncStream[ChatCompletionChunk]] = None
+
+    async def get_chat_completions(
+        self,
+        context: OpenAILLMContext,
+        messages: List[ChatCompletionMessageParam],
+    ) -> AsyncStream[ChatCompletionChunk]:
+        """Start a completion stream and keep it to close it on interruption."""
+        self._stream = await super().get_chat_completions(context, messages)
+        return self._stream
+
+    async def _handle_interruptions(self, frame: StartInterruptionFrame) -> None:
+        await super()._handle_interruptions(frame)
+        await self._close_stream()
+
+    async def _close_stream(self) -> None:
+        stream, self._stream = self._stream, None
+        if stream is None:
+            return
+        try:
+            await stream.close()
+        except Exception as e:
+            logger.debug(f"Failed to close completion stream: {e}")
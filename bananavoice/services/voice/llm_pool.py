@@ -0,0 +1,236 @@
+"""Pool of pre-warmed Gemini Live LLM services."""
+
+import asyncio
+import contextlib
+import logging
+import math
+import time
+from abc import abstractmethod
+from collections import deque
+from typing import Any, Callable, Coroutine, Deque, Optional, Set, Tuple
+
+from pipecat.services.gemini_multimodal_live import GeminiMultimodalLiveLLMService
+from pipecat.services.llm_service import LLMService
+
+logger = logging.getLogger(__name__)
+
+
+class WarmLLMService(LLMService):
+    """LLM service whose upstream session can be opened before it is used."""
+
+    @property
+    @abstractmethod
+    def is_warm(self) -> bool:
+        """Whether the upstream session is already open."""
+
+    @abstractmethod
+    async def prewarm(self) -> bool:
+        """
+        Open the upstream session.
+
+        :return: whether the session was opened.
+        """
+
+    @abstractmethod
+    async def discard(self) -> None:
+        """Close a warm session that will never be used."""
+
+
+class WarmGeminiLiveLLMService(GeminiMultimodalLiveLLMService, WarmLLMService):
+    """
+    Gemini Live service whose upstream session can be opened ahead of time.
+
+    `prewarm` opens the websocket and sends the session setup before the
+    service is part of any pipeline. The receive loop can only run under the
+    pipeline's task manager, so it is deferred until the pipeline starts
+    the service; the setup reply simply waits in the socket until then.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._prewarming = False
+        self._deferred_receive: Optional[Coroutine[Any, Any, None]] = None
+        self._handover: Optional[asyncio.Future[asyncio.Task[Any]]] = None
+
+    @property
+    def is_warm(self) -> bool:
+        """Whether the upstream session is already open."""
+        return self._websocket is not None and self._deferred_receive is not None
+
+    async def prewarm(self) -> bool:
+        """
+        Open the upstream session.
+
+        :return: whether the session was opened.
+        """
+        self._prewarming = True
+        try:
+            await super()._connect()
+        finally:
+            self._prewarming = False
+        return self.is_warm
+
+    async def discard(self) -> None:
+        """Close a warm session that will never be used."""
+        if self._deferred_receive is not None:
+            self._deferred_receive.close()
+            self._deferred_receive = None
+        if self._receive_task is not None:
+            self._receive_task.cancel()
+            self._receive_task = None
+        if self._websocket is not None:
+            with contextlib.suppress(Exception):
+                await self._websocket.close()
+            self._websocket = None
+
+    def create_task(
+        self,
+        coroutine: Coroutine[Any, Any, Any],
+        name: Optional[str] = None,
+        **kwargs: Any,
+    ) -> asyncio.Task[Any]:
+        """
+        Create a task, deferring the receive loop while prewarming.
+
+        The task returned while prewarming waits for the pipeline to start
+        the service, then follows the receive loop its task manager runs.
+        """
+        if self._prewarming:
+            self._deferred_receive = coroutine
+            self._handover = asyncio.get_running_loop().create_future()
+            return asyncio.create_task(self._follow(self._handover), name=name)
+        return super().create_task(coroutine, name, **kwargs)
+
+    async def _connect(self) -> None:
+        if self._websocket is not None and self._deferred_receive is not None:
+            receive, self._deferred_receive = self._deferred_receive, None
+            self._receive_task = self.create_task(receive)
+            if self._handover is not None:
+                self._handover.set_result(self._receive_task)
+                self._handover = None
+            return
+        await super()._connect()
+
+    @staticmethod
+    async def _follow(handover: "asyncio.Future[asyncio.Task[Any]]") -> None:
+        await (await handover)
+
+
+class LLMServicePool:
+    """
+    Keeps a few warm LLM services ready to be claimed by new sessions.
+
+    The pool is refilled in the background. Its target size follows the
+    recent arrival rate: it holds roughly as many services as are expected
+    to be claimed while a replacement is being warmed up, within
+    `min_size` and `max_size`.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], WarmLLMService],
+        min_size: int = 1,
+        max_size: int = 4,
+        max_age: float = 60.0,
+        rate_window: float = 60.0,
+    ) -> None:
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_age = max_age
+        self.rate_window = rate_window
+        self.warmup_seconds = 1.0
+        self._idle: Deque[Tuple[float, WarmLLMService]] = deque()
+        self._arrivals: Deque[float] = deque()
+        self._warming = 0
+        self._wakeup = asyncio.Event()
+        self._refill_task: Optional[asyncio.Task[None]] = None
+        self._discards: Set[asyncio.Task[None]] = set()
+
+    @property
+    def size(self) -> int:
+        """Number of warm services ready to be claimed."""
+        return len(self._idle)
+
+    @property
+    def target_size(self) -> int:
+        """Desired number of warm services for the current arrival rate."""
+        now = time.monotonic()
+        while self._arrivals and self._arrivals[0] < now - self.rate_window:
+            self._arrivals.popleft()
+        rate = len(self._arrivals) / self.rate_window
+        wanted = math.ceil(rate * self.warmup_seconds)
+        return min(max(wanted, self.min_size), self.max_size)
+
+    def start(self) -> None:
+        """Start background refilling."""
+        if self.max_size <= 0:
+            return
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self) -> None:
+        """Stop refilling and close all warm services."""
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._refill_task
+            self._refill_task = None
+        while self._idle:
+            _, service = self._idle.popleft()
+            await service.discard()
+
+    def claim(self) -> Optional[WarmLLMService]:
+        """
+        Take a warm service out of the pool.
+
+        :return: warm service or None if the pool is empty.
+        """
+        self._arrivals.append(time.monotonic())
+        service = None
+        while self._idle and service is None:
+            created_at, candidate = self._idle.popleft()
+            if self._is_fresh(created_at, candidate):
+                service = candidate
+            else:
+                task = asyncio.create_task(candidate.discard())
+                self._discards.add(task)
+                task.add_done_callback(self._discards.discard)
+        self._wakeup.set()
+        return service
+
+    def _is_fresh(self, created_at: float, service: WarmLLMService) -> bool:
+        return time.monotonic() - created_at < self.max_age and service.is_warm
+
+    async def _warm_one(self) -> None:
+        self._warming += 1
+        started = time.monotonic()
+        try:
+            service = self.factory()
+            if await service.prewarm():
+                elapsed = time.monotonic() - started
+                self.warmup_seconds = 0.8 * self.warmup_seconds + 0.2 * elapsed
+                self._idle.append((time.monotonic(), service))
+            else:
+                await service.discard()
+        except Exception as e:
+            logger.warning(f"Failed to prewarm LLM service: {e}")
+        finally:
+            self._warming -= 1
+
+    async def _refill_loop(self) -> None:
+        while True:
+            stale = [
+                item for item in self._idle if not self._is_fresh(item[0], item[1])
+            ]
+            for item in stale:
+                self._idle.remove(item)
+                await item[1].discard()
+
+            missing = self.target_size - len(self._idle) - self._warming
+            if missing > 0:
+                await asyncio.gather(*(self._warm_one() for _ in range(missing)))
+
+            self._wakeup.clear()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.max_age / 4)
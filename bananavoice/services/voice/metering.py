@@ -0,0 +1,352 @@
+"""Usage metering of voice sessions from pipeline usage metrics."""
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from pipecat.frames.frames import (
+    CancelFrame,
+    EndFrame,
+    Frame,
+    MetricsFrame,
+    StartFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.metrics.metrics import LLMUsageMetricsData, TTSUsageMetricsData
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from pipecat.services.ai_service import AIService
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bananavoice.db.dao.voice_usage_dao import VoiceUsageDAO
+from bananavoice.services.voice.cost_monitor import (
+    CostBreakdown,
+    UsageKey,
+    unit_price,
+)
+from bananavoice.services.voice.quota import VoiceQuota
+from bananavoice.services.voice.usage_aggregator import UsageAggregator
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SessionUsage:
+    """
+    Usage metered in one session.
+
+    Quantities are summed per kind, model and unit, so the record stays
+    a handful of numbers however long the session runs. Quantities not
+    flushed yet are kept apart from the totals. With a transport, the
+    session time is metered as it elapses.
+    """
+
+    session_id: str
+    pipeline: str
+    user_id: Optional[uuid.UUID] = None
+    transport: Optional[str] = None
+    started_at: float = field(default_factory=time.monotonic)
+    ended_at: Optional[float] = None
+    metered_until: Optional[float] = None
+    totals: Dict[UsageKey, float] = field(default_factory=dict)
+    pending: Dict[UsageKey, float] = field(default_factory=dict)
+
+    @property
+    def minutes(self) -> float:
+        """Minutes from the session start to its end or now."""
+        return ((self.ended_at or time.monotonic()) - self.started_at) / 60
+
+    def add(self, kind: str, model: str, unit: str, quantity: float) -> None:
+        """
+        Meter usage of a model.
+
+        :param kind: llm, stt, tts or transport.
+        :param model: model or transport name.
+        :param unit: usage unit.
+        :param quantity: used quantity.
+        """
+        if quantity <= 0:
+            return
+        key = (kind, model, unit)
+        self.totals[key] = self.totals.get(key, 0) + quantity
+        self.pending[key] = self.pending.get(key, 0) + quantity
+
+    def meter_time(self) -> None:
+        """Meter the transport time elapsed since the previous call."""
+        if self.transport is None:
+            return
+        now = self.ended_at or time.monotonic()
+        since = self.metered_until or self.started_at
+        self.add("transport", self.transport, "seconds", now - since)
+        self.metered_until = now
+
+    def take_rows(self) -> List[Dict[str, Any]]:
+        """
+        Usage rows of the quantities metered since the previous call.
+
+        :return: column values of the voice usage rows.
+        """
+        self.meter_time()
+        pending, self.pending = self.pending, {}
+        return [
+            {
+                "session_id": self.session_id,
+                "pipeline": self.pipeline,
+                "user_id": self.user_id,
+                "kind": kind,
+                "model": model,
+                "unit": unit,
+                "quantity": quantity,
+                "cost": quantity * unit_price(model, unit),
+            }
+            for (kind, model, unit), quantity in pending.items()
+        ]
+
+    @property
+    def cost(self) -> float:
+        """USD cost of the session so far."""
+        return sum(
+            quantity * unit_price(model, unit)
+            for (_, model, unit), quantity in self.totals.items()
+        )
+
+    def breakdown(self) -> CostBreakdown:
+        """Per-minute costs of the session so far."""
+        return CostBreakdown.from_usage(self.totals, self.minutes)
+
+
+class UsageWriter:
+    """
+    Writes the usage of all sessions of the process in batches.
+
+    Every interval the usage metered by live sessions since the previous
+    flush is written with a single insert, ended sessions are flushed
+    right away. Rows that fail to be written are retried on the next
+    flush; beyond ``max_pending`` rows the oldest ones are dropped. A
+    batch the database refuses is dropped rather than retried.
+    New rows are also added, once, to the rolling totals in Redis.
+
+    :param session_factory: database session factory, without one the
+        usage is only logged.
+    :param interval: seconds between periodic flushes.
+    :param max_pending: rows kept while the database is unavailable.
+    :param aggregator: rolling totals the usage is added to, if any.
+    :param quota: voice minute quotas debited with the usage, if any.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[async_sessionmaker[AsyncSession]],
+        interval: float = 30.0,
+        max_pending: int = 10000,
+        aggregator: Optional[UsageAggregator] = None,
+        quota: Optional[VoiceQuota] = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.aggregator = aggregator
+        self.quota = quota
+        self.interval = interval
+        self.max_pending = max_pending
+        self.sessions: Dict[str, SessionUsage] = {}
+        self.dropped = 0
+        self._retry: List[Dict[str, Any]] = []
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task[None]] = None
+        self._flushes: Set[asyncio.Task[int]] = set()
+
+    @property
+    def backlog(self) -> int:
+        """Rows waiting to be written again."""
+        return len(self._retry)
+
+    def track(self, usage: SessionUsage) -> None:
+        """
+        Flush the usage of a live session periodically.
+
+        :param usage: usage of the session.
+        """
+        self.sessions[usage.session_id] = usage
+
+    def start(self) -> None:
+        """Start the periodic flush if it isn't running."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    def close(self, usage: SessionUsage) -> None:
+        """
+        Stop tracking an ended session and flush its remaining usage.
+
+        The flush runs in the background so the pipeline shutdown doesn't
+        wait for the database.
+
+        :param usage: usage of the session.
+        """
+        self.sessions.pop(usage.session_id, None)
+        usage.ended_at = usage.ended_at or time.monotonic()
+        logger.info(
+            f"Voice session {usage.session_id} used ${usage.cost:.5f} "
+            f"in {usage.minutes:.1f}min",
+        )
+        task = asyncio.create_task(self.flush(usage.take_rows()))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def flush(self, rows: Optional[List[Dict[str, Any]]] = None) -> int:
+        """
+        Write the usage metered since the previous flush.
+
+        :param rows: extra rows to write in the batch.
+        :return: number of rows written.
+        """
+        async with self._lock:
+            new = list(rows or [])
+            for usage in list(self.sessions.values()):
+                new.extend(usage.take_rows())
+            if new and self.aggregator is not None:
+                try:
+                    await self.aggregator.add(new)
+                except Exception as e:
+                    logger.warning(f"Failed to aggregate voice usage: {e}")
+            if new and self.quota is not None:
+                try:
+                    await self.quota.debit(new)
+                except Exception as e:
+                    logger.warning(f"Failed to debit voice quotas: {e}")
+            batch, self._retry = self._retry + new, []
+            if not batch:
+                return 0
+            if self.session_factory is None:
+                logger.debug(f"Discarding {len(batch)} voice usage rows")
+                return 0
+            try:
+                async with self.session_factory() as session:
+                    await VoiceUsageDAO(session).add_usage(batch)
+                    await session.commit()
+            except (IntegrityError, DataError) as e:
+                # Retrying can't fix rows the database refuses.
+                self.dropped += len(batch)
+                logger.error(f"Database refused {len(batch)} voice usage rows: {e}")
+                return 0
+            except Exception as e:
+                logger.warning(f"Failed to write {len(batch)} voice usage rows: {e}")
+                self._keep(batch)
+                return 0
+            return len(batch)
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+    def _keep(self, rows: List[Dict[str, Any]]) -> None:
+        overflow = len(rows) - self.max_pending
+        if overflow > 0:
+            self.dropped += overflow
+            logger.error(f"Dropped {overflow} voice usage rows")
+            rows = rows[overflow:]
+        self._retry = rows
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+
+class UsageMeter(FrameProcessor):
+    """
+    Meters the usage of a session from the frames reaching the pipeline end.
+
+    LLM tokens and TTS characters come from the usage metrics of the
+    services. Pipecat has no STT usage metric, so transcription is
+    metered as the time the user spoke, which is the audio sent to a
+    segmented STT service. The session time is metered as transport
+    usage. Place the meter last in the pipeline.
+
+    :param usage: usage record of the session.
+    :param writer: writer flushing the record, if any.
+    :param stt: STT service billed per second, if any.
+    :param transport: transport name used to price the session time,
+        defaults to the transport of the record.
+    """
+
+    def __init__(
+        self,
+        usage: SessionUsage,
+        writer: Optional[UsageWriter] = None,
+        *,
+        stt: Optional[AIService] = None,
+        transport: Optional[str] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.usage = usage
+        self.writer = writer
+        self.stt = stt
+        if transport is not None:
+            self.usage.transport = transport
+        self._speaking_since: Optional[float] = None
+        self._closed = False
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection) -> None:
+        """Meter usage carried by the frame and pass it on."""
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, StartFrame):
+            self.usage.started_at = time.monotonic()
+            self.usage.metered_until = None
+            if self.writer is not None:
+                self.writer.track(self.usage)
+        elif isinstance(frame, MetricsFrame):
+            self._meter(frame)
+        elif isinstance(frame, UserStartedSpeakingFrame):
+            self._speaking_since = time.monotonic()
+        elif isinstance(frame, UserStoppedSpeakingFrame):
+            self._meter_speech()
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            await self._close()
+
+        await self.push_frame(frame, direction)
+
+    async def cleanup(self) -> None:
+        """Flush the usage if the session ended without an end frame."""
+        await super().cleanup()
+        await self._close()
+
+    def _meter(self, frame: MetricsFrame) -> None:
+        for data in frame.data:
+            if isinstance(data, LLMUsageMetricsData):
+                tokens = data.value
+                cached = tokens.cache_read_input_tokens or 0
+                model = data.model or ""
+                prompt = tokens.prompt_tokens - cached
+                self.usage.add("llm", model, "input_tokens", prompt)
+                self.usage.add("llm", model, "cached_input_tokens", cached)
+                self.usage.add("llm", model, "output_tokens", tokens.completion_tokens)
+            elif isinstance(data, TTSUsageMetricsData):
+                self.usage.add("tts", data.model or "", "characters", data.value)
+
+    def _meter_speech(self) -> None:
+        if self._speaking_since is None:
+            return
+        seconds = time.monotonic() - self._speaking_since
+        self._speaking_since = None
+        if self.stt is not None:
+            self.usage.add("stt", self.stt.model_name, "seconds", seconds)
+
+    async def _close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._meter_speech()
+        self.usage.ended_at = time.monotonic()
+        self.usage.meter_time()
+        if self.writer is not None:
+            self.writer.close(self.usage)
@@ -0,0 +1,139 @@
+"""Prometheus metrics for voice sessions."""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+VOICE_SESSIONS_ACTIVE = Gauge(
+    "voice_sessions_active",
+    "Voice sessions currently running.",
+    multiprocess_mode="livesum",
+)
+VOICE_SESSIONS_QUEUED = Gauge(
+    "voice_sessions_queued",
+    "Voice session offers waiting for admission.",
+    multiprocess_mode="livesum",
+)
+VOICE_DRAINING = Gauge(
+    "voice_draining",
+    "Workers draining their voice sessions.",
+    multiprocess_mode="livesum",
+)
+VOICE_SESSIONS_REJECTED = Counter(
+    "voice_sessions_rejected",
+    "Voice session offers rejected by admission control.",
+    ["reason"],
+)
+VOICE_TIME_TO_FIRST_AUDIO = Histogram(
+    "voice_time_to_first_audio_seconds",
+    "Time from accepting an offer to the first audio frame sent to the client.",
+    ["prewarmed"],
+    buckets=(0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0),
+)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0)
+
+VOICE_STAGE_LATENCY = Histogram(
+    "voice_stage_latency_seconds",
+    "Per-turn latency of each voice pipeline stage.",
+    ["pipeline", "stage", "provider"],
+    buckets=LATENCY_BUCKETS,
+)
+VOICE_SERVICE_TTFB = Histogram(
+    "voice_service_ttfb_seconds",
+    "Time to first byte reported by pipeline services.",
+    ["pipeline", "processor", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+VOICE_LLM_CACHE_REQUESTS = Counter(
+    "voice_llm_cache_requests",
+    "LLM response cache lookups by result.",
+    ["result"],
+)
+VOICE_PHRASE_CACHE_REQUESTS = Counter(
+    "voice_phrase_cache_requests",
+    "Phrase audio cache lookups by result.",
+    ["result"],
+)
+VOICE_STARTUP_PHASE = Histogram(
+    "voice_startup_phase_seconds",
+    "Duration of each bot startup phase.",
+    ["pipeline", "phase"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0),
+)
+VOICE_TTS_CHUNK_CHARS = Histogram(
+    "voice_tts_chunk_chars",
+    "Length of the text chunks sent to speech synthesis.",
+    ["position"],
+    buckets=(10, 20, 40, 80, 120, 160, 250, 400),
+)
+VOICE_TURN_STOP_SECONDS = Histogram(
+    "voice_turn_stop_seconds",
+    "VAD stop time in effect when a user turn ended.",
+    ["pipeline"],
+    buckets=(0.2, 0.3, 0.4, 0.5, 0.6, 0.8, 1.0, 1.2, 1.6, 2.0),
+)
+VOICE_TURN_DECISIONS = Counter(
+    "voice_turn_decisions",
+    "Adaptive end-of-turn decisions.",
+    ["pipeline", "decision"],
+)
+VOICE_INTERRUPTION_LATENCY = Histogram(
+    "voice_interruption_latency_seconds",
+    "Time from a user interruption until the bot stopped speaking.",
+    ["pipeline"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
+VOICE_PROVIDER_LATENCY = Histogram(
+    "voice_provider_latency_seconds",
+    "Time to the first response of routed provider requests.",
+    ["kind", "provider"],
+    buckets=LATENCY_BUCKETS,
+)
+VOICE_PROVIDER_REQUESTS = Counter(
+    "voice_provider_requests",
+    "Routed provider requests by result (win, lost, error).",
+    ["kind", "provider", "result"],
+)
+VOICE_SESSIONS_REAPED = Counter(
+    "voice_sessions_reaped",
+    "Voice sessions torn down by the reaper, by reason (idle, max_duration).",
+    ["pipeline", "reason"],
+)
+VOICE_SESSION_CPU_SECONDS = Histogram(
+    "voice_session_cpu_seconds",
+    "Event loop CPU time attributed to each voice session.",
+    ["pipeline"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0),
+)
+VOICE_SESSION_TASKS = Gauge(
+    "voice_session_tasks",
+    "Asyncio tasks running on behalf of voice sessions.",
+    ["pipeline"],
+    multiprocess_mode="livesum",
+)
+VOICE_MEMORY_UNRECLAIMED = Gauge(
+    "voice_memory_unreclaimed_bytes",
+    "Traced memory allocated by voice sessions and not freed once idle.",
+    ["pipeline"],
+    multiprocess_mode="livemax",
+)
+VOICE_USAGE_COST = Gauge(
+    "voice_usage_cost_dollars",
+    "Spend on voice providers in a rolling window.",
+    ["window", "kind", "model"],
+    multiprocess_mode="mostrecent",
+)
+VOICE_USAGE_QUANTITY = Gauge(
+    "voice_usage_quantity",
+    "Usage of voice providers in a rolling window, in the given unit.",
+    ["window", "kind", "model", "unit"],
+    multiprocess_mode="mostrecent",
+)
+VOICE_QUOTA_REJECTED = Counter(
+    "voice_quota_rejected",
+    "Voice sessions rejected because the user had no voice minutes left.",
+)
+VOICE_TRANSCRIPT_TURNS_DROPPED = Counter(
+    "voice_transcript_turns_dropped",
+    "Conversation turns dropped because the transcript queue was full or the "
+    "database refused them.",
+)
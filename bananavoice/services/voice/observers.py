@@ -0,0 +1,197 @@
+"""Pipeline observers for voice metrics."""
+
+import re
+import time
+from typing import Callable, Dict, Optional, Union
+
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    InputAudioRawFrame,
+    LLMTextFrame,
+    MetricsFrame,
+    StartInterruptionFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.metrics.metrics import TTFBMetricsData
+from pipecat.observers.base_observer import BaseObserver, FramePushed
+
+from bananavoice.services.voice.metrics import (
+    VOICE_INTERRUPTION_LATENCY,
+    VOICE_SERVICE_TTFB,
+    VOICE_STAGE_LATENCY,
+    VOICE_TIME_TO_FIRST_AUDIO,
+)
+
+# Turn milestones in the order they happen and the stage each one closes.
+# A stage is measured from the previous milestone to its own.
+TURN_STAGES = (
+    (UserStoppedSpeakingFrame, ""),
+    (TranscriptionFrame, "stt"),
+    (LLMTextFrame, "llm"),
+    (TTSAudioRawFrame, "tts"),
+    (BotStartedSpeakingFrame, "output"),
+)
+
+
+class FirstAudioObserver(BaseObserver):
+    """Records the time from session start to the first audio sent out."""
+
+    def __init__(self, started_at: float, prewarmed: bool) -> None:
+        super().__init__()
+        self.started_at = started_at
+        self.prewarmed = prewarmed
+        self.elapsed: float = 0.0
+
+    async def on_push_frame(self, data: FramePushed) -> None:
+        """Observe the first time the bot starts speaking."""
+        if self.elapsed or not isinstance(data.frame, BotStartedSpeakingFrame):
+            return
+        self.elapsed = time.monotonic() - self.started_at
+        VOICE_TIME_TO_FIRST_AUDIO.labels(
+            prewarmed=str(self.prewarmed).lower(),
+        ).observe(self.elapsed)
+
+
+class InterruptionObserver(BaseObserver):
+    """
+    Records the time from a user interruption until the bot is silent.
+
+    Only interruptions while the bot is speaking are measured. The bot
+    is silent once the output transport flushed its queued audio and
+    reported that the bot stopped speaking.
+
+    :param pipeline: pipeline type used as a metric label.
+    """
+
+    def __init__(self, pipeline: str) -> None:
+        super().__init__()
+        self.pipeline = pipeline
+        self.last_latency: float = 0.0
+        self._bot_speaking = False
+        self._interrupted_at: Optional[float] = None
+
+    async def on_push_frame(self, data: FramePushed) -> None:
+        """Observe bot speech and interruptions."""
+        frame = data.frame
+        if isinstance(frame, BotStartedSpeakingFrame):
+            self._bot_speaking = True
+        elif isinstance(frame, StartInterruptionFrame):
+            if self._bot_speaking and self._interrupted_at is None:
+                self._interrupted_at = time.monotonic()
+        elif isinstance(frame, BotStoppedSpeakingFrame) and self._bot_speaking:
+            self._bot_speaking = False
+            if self._interrupted_at is None:
+                return
+            self.last_latency = time.monotonic() - self._interrupted_at
+            self._interrupted_at = None
+            VOICE_INTERRUPTION_LATENCY.labels(pipeline=self.pipeline).observe(
+                self.last_latency,
+            )
+
+
+class InboundAudioObserver(BaseObserver):
+    """
+    Records when the pipeline last received audio from the user.
+
+    Transports deliver audio continuously, silence included, so a
+    session without inbound audio has a stalled or vanished client.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.last_audio_at = time.monotonic()
+
+    async def on_push_frame(self, data: FramePushed) -> None:
+        """Observe inbound audio frames."""
+        if isinstance(data.frame, InputAudioRawFrame):
+            self.last_audio_at = time.monotonic()
+
+
+class LatencyObserver(BaseObserver):
+    """
+    Records per-turn stage latencies and service TTFB metrics.
+
+    A turn starts when the user stops speaking and ends when the bot
+    starts speaking. Every frame passes through several processors,
+    so only the first sighting of each milestone in a turn counts.
+    Milestones a pipeline doesn't produce (e.g. speech-to-speech models
+    have no separate LLM text) are skipped and the next stage is measured
+    from the last milestone seen.
+
+    :param pipeline: pipeline type used as a metric label.
+    :param providers: provider name for each stage ("stt", "llm", "tts"),
+        or a callable returning the provider currently serving it.
+    :param on_turn: called with the stage latencies of every finished turn.
+    """
+
+    def __init__(
+        self,
+        pipeline: str,
+        providers: Dict[str, Union[str, Callable[[], str]]],
+        on_turn: Optional[Callable[[Dict[str, float]], None]] = None,
+    ) -> None:
+        super().__init__()
+        self.pipeline = pipeline
+        self.providers = providers
+        self.on_turn = on_turn
+        self.last_turn: Dict[str, float] = {}
+        self._marks: Dict[int, float] = {}
+
+    async def on_push_frame(self, data: FramePushed) -> None:
+        """Observe a frame moving through the pipeline."""
+        frame = data.frame
+        if isinstance(frame, MetricsFrame):
+            self._record_ttfb(frame)
+            return
+        if isinstance(frame, UserStartedSpeakingFrame):
+            self._marks.clear()
+            return
+        index = self._milestone(frame)
+        if index is None or index in self._marks:
+            return
+        if index == 0:
+            self._marks = {0: time.monotonic()}
+            self.last_turn = {}
+            return
+        earlier = [mark for mark in self._marks if mark < index]
+        if not earlier:
+            return
+        previous = self._marks[max(earlier)]
+        now = time.monotonic()
+        self._marks[index] = now
+        stage = TURN_STAGES[index][1]
+        self.last_turn[stage] = now - previous
+        VOICE_STAGE_LATENCY.labels(
+            pipeline=self.pipeline,
+            stage=stage,
+            provider=self._provider(stage),
+        ).observe(now - previous)
+        if index == len(TURN_STAGES) - 1 and self.on_turn is not None:
+            self.on_turn(dict(self.last_turn))
+
+    def _milestone(self, frame: object) -> Optional[int]:
+        for index, (frame_type, _) in enumerate(TURN_STAGES):
+            if isinstance(frame, frame_type):
+                return index
+        return None
+
+    def _provider(self, stage: str) -> str:
+        if stage == "output":
+            provider = self.providers.get("transport", self.pipeline)
+        else:
+            provider = self.providers.get(stage, "unknown")
+        return provider() if callable(provider) else provider
+
+    def _record_ttfb(self, frame: MetricsFrame) -> None:
+        for metric in frame.data:
+            if not isinstance(metric, TTFBMetricsData) or metric.value <= 0:
+                continue
+            VOICE_SERVICE_TTFB.labels(
+                pipeline=self.pipeline,
+                processor=re.sub(r"#\d+$", "", metric.processor),
+                model=metric.model or "",
+            ).observe(metric.value)
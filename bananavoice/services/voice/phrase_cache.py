@@ -0,0 +1,254 @@
+"""Audio cache for recurring assistant phrases."""
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncGenerator, Iterable, List, Optional
+
+from pipecat.frames.frames import (
+    Frame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+)
+
+from bananavoice.services.voice.metrics import VOICE_PHRASE_CACHE_REQUESTS
+from bananavoice.services.voice.router import RoutedOpenAITTSService
+
+logger = logging.getLogger(__name__)
+
+
+class PhraseAudioCache:
+    """
+    Raw PCM audio of recurring phrases, kept on disk and memory-mapped.
+
+    Every phrase is stored in its own file. Recently used phrases stay
+    mapped in memory; since the mappings are backed by the page cache,
+    bot processes on the same host share the same physical pages.
+
+    Only listed phrases, such as the greeting, and phrases synthesized
+    ``min_hits`` times are cached, so one-off LLM clauses never reach the
+    disk. Files are tracked in an in-memory index, read from the directory
+    on first use, and all disk access runs in worker threads.
+
+    :param directory: where audio files are stored.
+    :param phrases: phrases cached from their first use.
+    :param min_hits: uses after which any other phrase is cached.
+    :param max_chars: longer phrases are never cached.
+    :param max_mapped: phrases kept mapped in memory.
+    :param max_files: phrases kept on disk, least recently used are removed.
+    :param max_tracked: phrases whose uses are counted.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        phrases: Iterable[str] = (),
+        min_hits: int = 3,
+        max_chars: int = 200,
+        max_mapped: int = 64,
+        max_files: int = 1000,
+        max_tracked: int = 4096,
+    ) -> None:
+        self.directory = directory
+        self.phrases = {phrase.strip() for phrase in phrases}
+        self.min_hits = min_hits
+        self.max_chars = max_chars
+        self.max_mapped = max_mapped
+        self.max_files = max_files
+        self.max_tracked = max_tracked
+        self._mapped: "OrderedDict[str, mmap.mmap]" = OrderedDict()
+        self._hits: "OrderedDict[str, int]" = OrderedDict()
+        self._index: "Optional[OrderedDict[str, None]]" = None
+        self._index_lock = asyncio.Lock()
+
+    @staticmethod
+    def key(text: str, voice: str, sample_rate: int) -> str:
+        """
+        Cache key of a phrase.
+
+        :param text: phrase text.
+        :param voice: voice (and model) used to synthesize it.
+        :param sample_rate: audio sample rate.
+        :return: hex digest used as the file name.
+        """
+        raw = f"{voice}\0{sample_rate}\0{text.strip()}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def accepts(self, text: str) -> bool:
+        """
+        Count a use of a phrase and tell whether it is cached.
+
+        :param text: phrase text.
+        :return: whether the phrase is listed or recurring.
+        """
+        phrase = text.strip()
+        if not 0 < len(phrase) <= self.max_chars:
+            return False
+        if phrase in self.phrases:
+            return True
+        hits = self._hits.pop(phrase, 0) + 1
+        self._hits[phrase] = hits
+        while len(self._hits) > self.max_tracked:
+            self._hits.popitem(last=False)
+        return hits >= self.min_hits
+
+    async def get(self, key: str) -> Optional[mmap.mmap]:
+        """
+        Get the audio of a phrase.
+
+        :param key: phrase key.
+        :return: read-only mapping of the PCM audio or None.
+        """
+        audio = self._mapped.get(key)
+        if audio is not None:
+            self._mapped.move_to_end(key)
+            return audio
+        index = await self._load_index()
+        if key not in index:
+            return None
+        audio = await asyncio.to_thread(self._map, key)
+        if audio is None:
+            # Removed by another process.
+            index.pop(key, None)
+            return None
+        index.move_to_end(key)
+        self._mapped[key] = audio
+        while len(self._mapped) > self.max_mapped:
+            _, evicted = self._mapped.popitem(last=False)
+            evicted.close()
+        return audio
+
+    async def put(self, key: str, audio: bytes) -> None:
+        """
+        Store the audio of a phrase.
+
+        The file is written under a temporary name and renamed,
+        so readers never see partial audio.
+
+        :param key: phrase key.
+        :param audio: raw PCM audio.
+        """
+        index = await self._load_index()
+        if not await asyncio.to_thread(self._write, key, audio):
+            return
+        index[key] = None
+        index.move_to_end(key)
+        evicted: List[str] = []
+        while len(index) > self.max_files:
+            old, _ = index.popitem(last=False)
+            mapped = self._mapped.pop(old, None)
+            if mapped is not None:
+                mapped.close()
+            evicted.append(old)
+        if evicted:
+            await asyncio.to_thread(self._remove, evicted)
+
+    def close(self) -> None:
+        """Unmap all phrases."""
+        while self._mapped:
+            _, audio = self._mapped.popitem()
+            audio.close()
+
+    async def _load_index(self) -> "OrderedDict[str, None]":
+        async with self._index_lock:
+            if self._index is None:
+                keys = await asyncio.to_thread(self._scan)
+                self._index = OrderedDict.fromkeys(keys)
+            return self._index
+
+    def _scan(self) -> List[str]:
+        """Keys of the stored phrases, oldest first."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stored = []
+        for path in self.directory.glob("*.pcm"):
+            with contextlib.suppress(OSError):
+                stored.append((path.stat().st_mtime, path.stem))
+        return [key for _, key in sorted(stored)]
+
+    def _map(self, key: str) -> Optional[mmap.mmap]:
+        try:
+            with (self.directory / f"{key}.pcm").open("rb") as audio_file:
+                return mmap.mmap(audio_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # ValueError is raised for empty files.
+            return None
+
+    def _write(self, key: str, audio: bytes) -> bool:
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(audio)
+            Path(tmp_name).replace(self.directory / f"{key}.pcm")
+        except OSError as e:
+            logger.warning(f"Failed to store phrase audio: {e}")
+            with contextlib.suppress(OSError):
+                Path(tmp_name).unlink()
+            return False
+        return True
+
+    def _remove(self, keys: List[str]) -> None:
+        for key in keys:
+            with contextlib.suppress(OSError):
+                (self.directory / f"{key}.pcm").unlink()
+
+
+class CachedOpenAITTSService(RoutedOpenAITTSService):
+    """
+    OpenAI TTS that answers recurring phrases from a phrase audio cache.
+
+    On a hit the cached audio is sent as regular TTS audio frames without
+    calling a provider. On a miss the frames produced by the provider are
+    passed on as usual and, once the phrase is complete, stored in the
+    cache, unless a fallback provider with another model or voice spoke it.
+    """
+
+    def __init__(self, *, phrase_cache: PhraseAudioCache, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.phrase_cache = phrase_cache
+
+    # pipecat declares run_tts as a coroutine, its services implement it
+    # as an async generator.
+    async def run_tts(  # type: ignore[override]
+        self,
+        text: str,
+    ) -> AsyncGenerator[Frame, None]:
+        """Synthesize a phrase, using cached audio when possible."""
+        if not self.phrase_cache.accepts(text):
+            async for frame in super().run_tts(text):
+                yield frame
+            return
+
+        # Audio is cached for the primary provider's model and voice.
+        voice = self.route_voice(self.router.routes[0])
+        key = self.phrase_cache.key(text, voice, self.sample_rate)
+        audio = await self.phrase_cache.get(key)
+        if audio is not None:
+            VOICE_PHRASE_CACHE_REQUESTS.labels(result="hit").inc()
+            yield TTSStartedFrame()
+            for start in range(0, len(audio), self.chunk_size):
+                chunk = audio[start : start + self.chunk_size]
+                yield TTSAudioRawFrame(chunk, self.sample_rate, 1)
+            yield TTSStoppedFrame()
+            return
+
+        VOICE_PHRASE_CACHE_REQUESTS.labels(result="miss").inc()
+        chunks: List[bytes] = []
+        complete = stored_voice = False
+        async for route, frame in self.run_routed_tts(text):
+            # A fallback provider may speak with another model or voice.
+            stored_voice = route is not None and self.route_voice(route) == voice
+            if isinstance(frame, TTSAudioRawFrame):
+                chunks.append(frame.audio)
+            elif isinstance(frame, TTSStoppedFrame):
+                complete = True
+            yield frame
+        if stored_voice and complete and chunks:
+            await self.phrase_cache.put(key, b"".join(chunks))
@@ -0,0 +1,172 @@
+"""Cost and capacity planning of voice traffic over scenario grids."""
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from bananavoice.services.voice.cost_monitor import CostBreakdown
+from bananavoice.services.voice.profiling import SessionStats
+
+DAYS_PER_MONTH = 30
+# Cells of the largest grid answered in one response.
+MAX_CELLS = 250_000
+
+
+@dataclass
+class ProviderPlan:
+    """A voice stack in the planning catalog."""
+
+    name: str
+    costs: CostBreakdown
+    # Concurrent sessions one core sustains.
+    sessions_per_core: float
+
+
+@dataclass
+class PlanningGrid:
+    """
+    Costs and capacity of every scenario of a grid.
+
+    Arrays are indexed by daily minutes, participants and, for per
+    provider values, catalog entry.
+    """
+
+    minutes: np.ndarray
+    participants: np.ndarray
+    providers: List[str]
+    concurrent_sessions: np.ndarray
+    cores: np.ndarray
+    provider_cost: np.ndarray
+    compute_cost: np.ndarray
+    monthly_cost: np.ndarray
+    cost_per_minute: np.ndarray
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Report of the grid, arrays as nested lists."""
+        cheapest = np.asarray(self.providers)[self.monthly_cost.argmin(axis=2)]
+        return {
+            "minutes": self.minutes.tolist(),
+            "participants": self.participants.tolist(),
+            "providers": self.providers,
+            "concurrent_sessions": self.concurrent_sessions.round(3).tolist(),
+            "cores": self.cores.astype(int).tolist(),
+            "provider_cost": self.provider_cost.round(4).tolist(),
+            "compute_cost": self.compute_cost.round(4).tolist(),
+            "monthly_cost": self.monthly_cost.round(4).tolist(),
+            "cost_per_minute": self.cost_per_minute.round(6).tolist(),
+            "cheapest": cheapest.tolist(),
+        }
+
+
+def scenario_count(start: float, stop: float, step: float) -> int:
+    """
+    Number of values of a scenario range, without building it.
+
+    :param start: first value.
+    :param stop: last value, included when a step lands on it.
+    :param step: distance between values.
+    :return: length of :func:`scenario_range`.
+    """
+    return max(math.ceil((stop - start) / step + 0.5), 0)
+
+
+def scenario_range(start: float, stop: float, step: float) -> np.ndarray:
+    """
+    Values from start to stop, both included, in steps.
+
+    :param start: first value.
+    :param stop: last value, included when a step lands on it.
+    :param step: distance between values.
+    :raises ValueError: if the range has more values than a grid has cells.
+    :return: the values.
+    """
+    count = scenario_count(start, stop, step)
+    if count > MAX_CELLS:
+        raise ValueError(f"Planning range of {count} values exceeds {MAX_CELLS}")
+    return np.arange(start, stop + step / 2, step, dtype=float)
+
+
+def measured_sessions_per_core(sessions: Iterable[SessionStats]) -> Optional[float]:
+    """
+    Sessions one core sustains, from the CPU time of ended sessions.
+
+    :param sessions: profiled sessions.
+    :return: session seconds per CPU second, None without measurements.
+    """
+    duration = cpu = 0.0
+    for stats in sessions:
+        if stats.ended_at is not None and stats.cpu_seconds > 0:
+            duration += stats.duration
+            cpu += stats.cpu_seconds
+    if not cpu:
+        return None
+    return duration / cpu
+
+
+def plan(
+    minutes: ArrayLike,
+    participants: ArrayLike,
+    catalog: Sequence[ProviderPlan],
+    *,
+    busy_hours: float = 8.0,
+    peak_factor: float = 2.0,
+    core_hour_cost: float = 0.0,
+    days: int = DAYS_PER_MONTH,
+) -> PlanningGrid:
+    """
+    Monthly costs and cores of every scenario, computed by broadcasting.
+
+    Every participant talks ``minutes`` a day, spread over the busy
+    hours. Cores are provisioned for the peak concurrency, ``peak_factor``
+    times the busy-hour average, and billed around the clock.
+
+    :param minutes: daily voice minutes of a participant.
+    :param participants: numbers of participants.
+    :param catalog: voice stacks to compare.
+    :param busy_hours: hours a day the traffic is spread over.
+    :param peak_factor: peak to average concurrency.
+    :param core_hour_cost: USD per core hour.
+    :param days: days in a month.
+    :raises ValueError: if the grid is empty or too big.
+    :return: the grid of scenarios.
+    """
+    daily_minutes = np.asarray(minutes, dtype=float)
+    counts = np.asarray(participants, dtype=float)
+    cells = daily_minutes.size * counts.size * len(catalog)
+    if not cells:
+        raise ValueError("Empty planning grid")
+    if cells > MAX_CELLS:
+        raise ValueError(f"Planning grid of {cells} cells exceeds {MAX_CELLS}")
+
+    per_minute = np.array([entry.costs.total_per_minute for entry in catalog])
+    sessions_per_core = np.array([entry.sessions_per_core for entry in catalog])
+
+    # (minutes, participants) scenarios against (provider,) catalog.
+    voice_minutes = daily_minutes[:, None] * counts[None, :] * days
+    concurrent = (
+        daily_minutes[:, None] * counts[None, :] / (busy_hours * 60) * peak_factor
+    )
+    cores = np.ceil(concurrent[..., None] / sessions_per_core)
+    provider_cost = voice_minutes[..., None] * per_minute
+    compute_cost = cores * core_hour_cost * 24 * days
+    monthly_cost = provider_cost + compute_cost
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cost_per_minute = np.where(
+            voice_minutes[..., None] > 0,
+            monthly_cost / voice_minutes[..., None],
+            0.0,
+        )
+    return PlanningGrid(
+        minutes=daily_minutes,
+        participants=counts,
+        providers=[entry.name for entry in catalog],
+        concurrent_sessions=concurrent,
+        cores=cores,
+        provider_cost=provider_cost,
+        compute_cost=compute_cost,
+        monthly_cost=monthly_cost,
+        cost_per_minute=cost_per_minute,
+    )
@@ -0,0 +1,303 @@
+"""Per-session CPU, task and memory accounting of voice sessions."""
+
+import asyncio
+import collections.abc
+import contextlib
+import contextvars
+import gc
+import logging
+import time
+import tracemalloc
+import weakref
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from bananavoice.services.voice.metrics import (
+    VOICE_MEMORY_UNRECLAIMED,
+    VOICE_SESSION_CPU_SECONDS,
+    VOICE_SESSION_TASKS,
+)
+
+logger = logging.getLogger(__name__)
+
+_current_session: contextvars.ContextVar[Optional["SessionStats"]] = (
+    contextvars.ContextVar("voice_session", default=None)
+)
+
+
+@dataclass
+class SessionStats:
+    """Resources attributed to one session."""
+
+    session_id: str
+    started_at: float = field(default_factory=time.monotonic)
+    ended_at: Optional[float] = None
+    # Event loop thread CPU spent in the session's tasks.
+    cpu_seconds: float = 0.0
+    peak_tasks: int = 0
+    # Change of the traced memory of the whole process from the start to
+    # the end of the session, concurrent sessions included.
+    process_memory_growth: Optional[int] = None
+    tasks: "weakref.WeakSet[asyncio.Task[Any]]" = field(default_factory=weakref.WeakSet)
+    traced_at_start: Optional[int] = None
+
+    @property
+    def live_tasks(self) -> int:
+        """Tasks of the session that are still running."""
+        return sum(1 for task in self.tasks if not task.done())
+
+    @property
+    def duration(self) -> float:
+        """Seconds from the session start to its end or now."""
+        return (self.ended_at or time.monotonic()) - self.started_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Report of the session."""
+        return {
+            "session_id": self.session_id,
+            "duration": round(self.duration, 3),
+            "cpu_seconds": round(self.cpu_seconds, 4),
+            "cpu_percent": round(self.cpu_seconds / max(self.duration, 1e-6) * 100, 2),
+            "tasks": self.live_tasks,
+            "peak_tasks": self.peak_tasks,
+            "process_memory_growth": self.process_memory_growth,
+        }
+
+
+class _MeteredCoroutine(collections.abc.Coroutine):  # type: ignore[type-arg]
+    """Coroutine proxy adding the CPU time of every step to a session."""
+
+    __slots__ = ("_coro", "_stats")
+
+    def __init__(self, coro: Any, stats: SessionStats) -> None:
+        self._coro = coro
+        self._stats = stats
+
+    def send(self, value: Any) -> Any:
+        started = time.thread_time()
+        try:
+            return self._coro.send(value)
+        finally:
+            self._stats.cpu_seconds += time.thread_time() - started
+
+    def throw(self, *args: Any) -> Any:
+        started = time.thread_time()
+        try:
+            return self._coro.throw(*args)
+        finally:
+            self._stats.cpu_seconds += time.thread_time() - started
+
+    def close(self) -> None:
+        self._coro.close()
+
+    def __await__(self) -> Any:
+        return self._coro.__await__()
+
+    def __getattr__(self, name: str) -> Any:
+        # cr_code, cr_frame etc. for task names and reprs.
+        return getattr(self._coro, name)
+
+
+class SessionProfiler:
+    """
+    Attributes event loop CPU time, tasks and memory to voice sessions.
+
+    Tasks created while a session is attached, directly or by their
+    descendants, belong to it. Their coroutines are wrapped so every
+    step adds its thread CPU time to the session. Work done in executor
+    threads or in callbacks of transports created outside the session
+    is not attributed.
+
+    While tracemalloc is tracing, every session records how much the
+    traced memory of the process changed over its lifetime; with
+    concurrent sessions this is not memory of the session alone. A
+    single snapshot of the idle worker is kept as a baseline. Whenever
+    the worker becomes idle again, memory is compared to it; growth above
+    the alert threshold was never reclaimed and is reported.
+
+    :param pipeline: pipeline type used as a metric label.
+    :param alert_bytes: unreclaimed growth that raises an alert.
+    :param history: number of ended sessions kept for reports.
+    :param enabled: whether CPU time and tasks are attributed.
+    """
+
+    def __init__(
+        self,
+        pipeline: str,
+        alert_bytes: int = 5 * 2**20,
+        history: int = 50,
+        enabled: bool = True,
+    ) -> None:
+        self.pipeline = pipeline
+        self.enabled = enabled
+        self.alert_bytes = alert_bytes
+        self.sessions: Dict[int, SessionStats] = {}
+        self.ended: Deque[SessionStats] = deque(maxlen=history)
+        self.unreclaimed: Optional[int] = None
+        self.unreclaimed_top: List[str] = []
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._loops: "weakref.WeakSet[asyncio.AbstractEventLoop]" = weakref.WeakSet()
+
+    def install(self) -> None:
+        """Wrap the task factory of the running loop, once per loop."""
+        loop = asyncio.get_running_loop()
+        if not self.enabled or loop in self._loops:
+            return
+        self._loops.add(loop)
+        previous = loop.get_task_factory()
+
+        def factory(
+            loop: asyncio.AbstractEventLoop,
+            coro: Any,
+            **kwargs: Any,
+        ) -> "asyncio.Future[Any]":
+            stats = _current_session.get()
+            if stats is not None:
+                coro = _MeteredCoroutine(coro, stats)
+            if previous is not None:
+                task = previous(loop, coro, **kwargs)
+            else:
+                task = asyncio.Task(coro, loop=loop, **kwargs)
+            if stats is not None and isinstance(task, asyncio.Task):
+                stats.tasks.add(task)
+                stats.peak_tasks = max(stats.peak_tasks, stats.live_tasks)
+            return task
+
+        loop.set_task_factory(factory)
+
+    def open_session(self, session_id: str = "") -> SessionStats:
+        """
+        Start accounting a session.
+
+        :param session_id: session identifier, may be set later.
+        :return: stats of the session.
+        """
+        self.install()
+        stats = SessionStats(session_id=session_id)
+        if tracemalloc.is_tracing():
+            stats.traced_at_start = tracemalloc.get_traced_memory()[0]
+        self.sessions[id(stats)] = stats
+        return stats
+
+    @contextlib.contextmanager
+    def attach(self, stats: SessionStats) -> Iterator[None]:
+        """
+        Attribute tasks created in the block to a session.
+
+        :param stats: stats of the session.
+        """
+        token = _current_session.set(stats)
+        try:
+            yield
+        finally:
+            _current_session.reset(token)
+
+    def close_session(self, stats: SessionStats) -> None:
+        """
+        Finish accounting a session.
+
+        :param stats: stats of the session.
+        """
+        if self.sessions.pop(id(stats), None) is None:
+            return
+        stats.ended_at = time.monotonic()
+        VOICE_SESSION_CPU_SECONDS.labels(pipeline=self.pipeline).observe(
+            stats.cpu_seconds,
+        )
+        if stats.traced_at_start is not None and tracemalloc.is_tracing():
+            stats.process_memory_growth = (
+                tracemalloc.get_traced_memory()[0] - stats.traced_at_start
+            )
+        self.ended.append(stats)
+        if not self.sessions and tracemalloc.is_tracing():
+            self.check_unreclaimed()
+
+    def set_tracemalloc(self, enabled: bool, frames: int = 10) -> bool:
+        """
+        Start or stop tracing memory allocations.
+
+        Tracing slows every allocation down, it is meant to be turned on
+        while looking for a leak. Sessions started before tracing have
+        no memory accounting. The idle baseline is taken right away if no
+        session is running, otherwise when the worker is next idle.
+
+        :param enabled: whether to trace.
+        :param frames: stack frames stored per allocation.
+        :return: whether tracemalloc is tracing.
+        """
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            if not self.sessions:
+                self.check_unreclaimed()
+        elif not enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self._baseline = None
+            for stats in self.sessions.values():
+                stats.traced_at_start = None
+        return tracemalloc.is_tracing()
+
+    def check_unreclaimed(self) -> Optional[int]:
+        """
+        Compare memory of the idle worker with the idle baseline.
+
+        Collects garbage and takes a snapshot, so it is only called when
+        the worker becomes idle. The first call after tracing started
+        takes the baseline.
+
+        :return: unreclaimed bytes, None without a baseline.
+        """
+        if not tracemalloc.is_tracing():
+            return None
+        if self._baseline is None:
+            gc.collect()
+            self._baseline = tracemalloc.take_snapshot()
+            return None
+        self.unreclaimed, self.unreclaimed_top = self._growth(self._baseline)
+        VOICE_MEMORY_UNRECLAIMED.labels(pipeline=self.pipeline).set(self.unreclaimed)
+        if self.unreclaimed > self.alert_bytes:
+            logger.warning(
+                f"{self.unreclaimed / 2**20:.1f}MiB allocated by {self.pipeline} "
+                f"voice sessions were not reclaimed: {'; '.join(self.unreclaimed_top)}",
+            )
+        return self.unreclaimed
+
+    def update_task_gauge(self) -> int:
+        """
+        Export the number of running session tasks.
+
+        :return: number of running session tasks.
+        """
+        total = sum(stats.live_tasks for stats in self.sessions.values())
+        VOICE_SESSION_TASKS.labels(pipeline=self.pipeline).set(total)
+        return total
+
+    def report(self) -> Dict[str, Any]:
+        """Report of the live and recently ended sessions."""
+        return {
+            "tracemalloc": tracemalloc.is_tracing(),
+            "tasks": self.update_task_gauge(),
+            "unreclaimed": self.unreclaimed,
+            "unreclaimed_top": self.unreclaimed_top,
+            "sessions": [stats.to_dict() for stats in self.sessions.values()],
+            "ended": [stats.to_dict() for stats in reversed(self.ended)],
+        }
+
+    @staticmethod
+    def _growth(
+        snapshot: tracemalloc.Snapshot,
+        top: int = 10,
+    ) -> Tuple[int, List[str]]:
+        gc.collect()
+        # The baseline snapshot itself is not memory of the sessions.
+        ignore = [
+            tracemalloc.Filter(
+                inclusive=False,
+                filename_pattern=tracemalloc.__file__,
+            ),
+        ]
+        current = tracemalloc.take_snapshot().filter_traces(ignore)
+        diff = current.compare_to(snapshot.filter_traces(ignore), "lineno")
+        growth = sum(stat.size_diff for stat in diff)
+        lines = [str(stat) for stat in diff[:top] if stat.size_diff > 0]
+        return growth, lines
@@ -0,0 +1,144 @@
+"""Per-user voice-minute quotas kept in a Redis token bucket."""
+
+import logging
+import math
+import time
+import uuid
+from typing import Any, Dict, Mapping, Sequence, Tuple
+
+from redis.asyncio import Redis
+
+from bananavoice.services.voice.metrics import VOICE_QUOTA_REJECTED
+
+logger = logging.getLogger(__name__)
+
+# Refills the bucket for the time since the last call, takes the cost
+# (which may leave a negative balance) and returns the new balance.
+# Buckets expire once they would be full again.
+BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate) - cost
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+return tostring(tokens)
+"""
+
+
+class QuotaExceededError(Exception):
+    """Raised when a user has no voice minutes left."""
+
+    def __init__(self, remaining: float, retry_after: int) -> None:
+        super().__init__("Voice minute quota exceeded")
+        self.remaining = remaining
+        self.retry_after = retry_after
+
+
+class VoiceQuota:
+    """
+    Limits the voice minutes of every user with a token bucket.
+
+    A bucket holds ``minutes`` of voice time and refills completely over
+    ``period`` seconds. It is stored in Redis and updated by a Lua script,
+    so all workers share it atomically. Sessions are debited with their
+    metered length, a balance may go negative while sessions run.
+
+    Admission decisions use the balance cached by the worker, which is
+    refreshed from Redis at most every ``cache_ttl`` seconds. Every
+    admitted session reserves ``min_minutes`` of the cached balance, so
+    a burst of sessions can't outrun the cache.
+
+    :param redis: redis client.
+    :param minutes: voice minutes of a full bucket.
+    :param period: seconds to refill an empty bucket.
+    :param min_minutes: balance needed to start a session.
+    :param cache_ttl: seconds a cached balance is trusted.
+    :param prefix: prefix of the bucket keys.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        minutes: float = 120.0,
+        period: float = 86400.0,
+        min_minutes: float = 1.0,
+        cache_ttl: float = 10.0,
+        prefix: str = "voice:quota",
+    ) -> None:
+        self.redis = redis
+        self.capacity = minutes * 60
+        self.rate = self.capacity / period
+        self.min_seconds = min_minutes * 60
+        self.cache_ttl = cache_ttl
+        self.prefix = prefix
+        self.script = redis.register_script(BUCKET_SCRIPT)
+        # User id to the cached balance in seconds and when it was cached.
+        self._balances: Dict[str, Tuple[float, float]] = {}
+
+    async def check(self, user_id: uuid.UUID) -> float:
+        """
+        Admit a new session of a user.
+
+        :param user_id: id of the user.
+        :raises QuotaExceededError: if the user has no minutes left.
+        :return: seconds left after the reservation.
+        """
+        user = str(user_id)
+        now = time.monotonic()
+        cached = self._balances.get(user)
+        if cached is None or now - cached[1] > self.cache_ttl:
+            cached = (await self._take(user, 0), now)
+        balance, cached_at = cached
+        balance = min(self.capacity, balance + (now - cached_at) * self.rate)
+        if balance < self.min_seconds:
+            self._balances[user] = cached
+            VOICE_QUOTA_REJECTED.inc()
+            retry_after = math.ceil((self.min_seconds - balance) / self.rate)
+            raise QuotaExceededError(remaining=balance, retry_after=retry_after)
+        self._balances[user] = (balance - self.min_seconds, now)
+        return balance - self.min_seconds
+
+    async def debit(self, rows: Sequence[Mapping[str, Any]]) -> None:
+        """
+        Debit users with the session time in metered usage rows.
+
+        :param rows: voice usage rows, as written to the database.
+        """
+        seconds: Dict[str, float] = {}
+        for row in rows:
+            user_id = row.get("user_id")
+            if user_id is None or row["kind"] != "transport":
+                continue
+            user = str(user_id)
+            seconds[user] = seconds.get(user, 0) + row["quantity"]
+        if not seconds:
+            return
+
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for user, cost in seconds.items():
+                await self.script(
+                    keys=[self._key(user)],
+                    args=[self.capacity, self.rate, now, cost],
+                    client=pipe,
+                )
+            balances = await pipe.execute()
+        cached_at = time.monotonic()
+        for user, balance in zip(seconds, balances, strict=True):
+            self._balances[user] = (float(balance), cached_at)
+
+    async def _take(self, user: str, cost: float) -> float:
+        balance = await self.script(
+            keys=[self._key(user)],
+            args=[self.capacity, self.rate, time.time(), cost],
+        )
+        return float(balance)
+
+    def _key(self, user: str) -> str:
+        return f"{self.prefix}:{user}"
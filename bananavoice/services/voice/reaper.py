@@ -0,0 +1,136 @@
+"""Reaper of idle and overlong voice sessions."""
+
+import asyncio
+import contextlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from bananavoice.services.voice.metrics import VOICE_SESSIONS_REAPED
+from bananavoice.services.voice.observers import InboundAudioObserver
+
+logger = logging.getLogger(__name__)
+
+# Tears a session down, called with the reap reason.
+Teardown = Callable[[str], Awaitable[None]]
+
+
+@dataclass
+class TrackedSession:
+    """A session watched by the reaper."""
+
+    started_at: float
+    activity: InboundAudioObserver
+    teardown: Teardown
+
+
+class SessionReaper:
+    """
+    Tears down sessions that went idle or ran for too long.
+
+    A client that stalls without closing its connection would otherwise
+    keep its pipeline, provider sessions and transport state alive
+    forever. Sessions are idle when no audio arrived for `idle_timeout`
+    seconds and are always torn down after `max_duration` seconds.
+
+    :param pipeline: pipeline type used as a metric label.
+    :param idle_timeout: seconds without inbound audio.
+    :param max_duration: maximum session length in seconds.
+    :param interval: seconds between checks.
+    """
+
+    def __init__(
+        self,
+        pipeline: str,
+        idle_timeout: float,
+        max_duration: float,
+        interval: float = 5.0,
+    ) -> None:
+        self.pipeline = pipeline
+        self.idle_timeout = idle_timeout
+        self.max_duration = max_duration
+        self.interval = interval
+        self.sessions: Dict[str, TrackedSession] = {}
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def track(
+        self,
+        session_id: str,
+        activity: InboundAudioObserver,
+        teardown: Teardown,
+    ) -> None:
+        """
+        Watch a session.
+
+        :param session_id: session identifier.
+        :param activity: observer of the session's inbound audio.
+        :param teardown: closes the session, called with the reap reason.
+        """
+        self.sessions[session_id] = TrackedSession(
+            started_at=time.monotonic(),
+            activity=activity,
+            teardown=teardown,
+        )
+
+    def forget(self, session_id: str) -> None:
+        """
+        Stop watching a session that ended.
+
+        :param session_id: session identifier.
+        """
+        self.sessions.pop(session_id, None)
+
+    def start(self) -> None:
+        """Start the periodic checks."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the periodic checks."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def expired(self, now: Optional[float] = None) -> List[Tuple[str, str]]:
+        """
+        Sessions due for teardown.
+
+        :param now: monotonic time of the check.
+        :return: session ids with their reap reason.
+        """
+        now = time.monotonic() if now is None else now
+        due = []
+        for session_id, session in self.sessions.items():
+            if now - session.started_at >= self.max_duration:
+                due.append((session_id, "max_duration"))
+            elif now - session.activity.last_audio_at >= self.idle_timeout:
+                due.append((session_id, "idle"))
+        return due
+
+    async def reap(self, now: Optional[float] = None) -> List[Tuple[str, str]]:
+        """
+        Tear down the sessions due for it.
+
+        :param now: monotonic time of the check.
+        :return: reaped session ids with their reason.
+        """
+        due = self.expired(now)
+        for session_id, reason in due:
+            session = self.sessions.pop(session_id)
+            VOICE_SESSIONS_REAPED.labels(pipeline=self.pipeline, reason=reason).inc()
+            logger.warning(
+                f"Reaping {self.pipeline} voice session {session_id}: {reason}",
+            )
+            try:
+                await session.teardown(reason)
+            except Exception as e:
+                logger.error(f"Failed to tear down voice session {session_id}: {e}")
+        return due
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.reap()
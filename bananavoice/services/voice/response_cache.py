@@ -0,0 +1,214 @@
+"""Exact-match LLM response cache for common voice intents."""
+
+import asyncio
+import hashlib
+import logging
+import re
+from typing import Any, List, Optional, Sequence
+
+from pipecat.frames.frames import (
+    Frame,
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    LLMTextFrame,
+    StartInterruptionFrame,
+)
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContextFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from redis.asyncio import Redis
+
+from bananavoice.services.voice.context import SUMMARY_PREFIX, Message
+from bananavoice.services.voice.metrics import VOICE_LLM_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_utterance(text: str) -> str:
+    """
+    Normalize an utterance for exact matching.
+
+    Lowercases the text, drops punctuation and collapses whitespace.
+
+    :param text: user utterance.
+    :return: normalized utterance.
+    """
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+class ResponseCache:
+    """
+    Caches LLM answers to short, common user utterances in Redis.
+
+    Use `lookup()` between the user context aggregator and the LLM and
+    `capture()` right after the LLM. On a hit the cached answer is sent
+    downstream as LLM text and the LLM is not called. On a miss the
+    answer produced by the LLM is stored in the background.
+
+    :param redis: redis client.
+    :param ttl: seconds a cached answer is kept.
+    :param allow_patterns: regular expressions a normalized utterance must
+        match to be cached. Nothing is cached if empty.
+    :param max_words: longer utterances are never cached.
+    :param lookup_timeout: lookups slower than this count as misses.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        ttl: int = 86400,
+        allow_patterns: Sequence[str] = (),
+        max_words: int = 12,
+        lookup_timeout: float = 0.05,
+        prefix: str = "voice:llm-cache",
+    ) -> None:
+        self.redis = redis
+        self.ttl = ttl
+        self.allow_patterns = [re.compile(pattern) for pattern in allow_patterns]
+        self.max_words = max_words
+        self.lookup_timeout = lookup_timeout
+        self.prefix = prefix
+        self.pending_key: Optional[str] = None
+
+    def is_allowed(self, utterance: str) -> bool:
+        """
+        Check the caching policy for a normalized utterance.
+
+        :param utterance: normalized utterance.
+        :return: whether the utterance may be cached.
+        """
+        if not utterance or len(utterance.split()) > self.max_words:
+            return False
+        return any(pattern.search(utterance) for pattern in self.allow_patterns)
+
+    def key_for(self, messages: Sequence[Message]) -> Optional[str]:
+        """
+        Build the cache key for the latest user utterance.
+
+        The key covers the system prompt and the assistant turn the user
+        answers, so a reply like "yes" is only shared where it means the
+        same thing.
+
+        :param messages: LLM context messages.
+        :return: cache key or None if the turn can't be cached.
+        """
+        if not messages or messages[-1].get("role") != "user":
+            return None
+        utterance = normalize_utterance(str(messages[-1].get("content") or ""))
+        if not self.is_allowed(utterance):
+            return None
+        system_prompt = "\n".join(
+            str(message.get("content"))
+            for message in messages
+            if message.get("role") == "system"
+            and not str(message.get("content")).startswith(SUMMARY_PREFIX)
+        )
+        previous = next(
+            (
+                str(message.get("content") or "")
+                for message in reversed(messages[:-1])
+                if message.get("role") == "assistant"
+            ),
+            "",
+        )
+        prompt_hash = hashlib.sha256(system_prompt.encode()).hexdigest()[:16]
+        utterance_hash = hashlib.sha256(
+            f"{normalize_utterance(previous)}\n{utterance}".encode(),
+        ).hexdigest()
+        return f"{self.prefix}:{prompt_hash}:{utterance_hash}"
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached answer.
+
+        :param key: cache key.
+        :return: cached answer or None.
+        """
+        try:
+            value = await asyncio.wait_for(self.redis.get(key), self.lookup_timeout)
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return None
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return value
+
+    async def set(self, key: str, text: str) -> None:
+        """
+        Store an answer.
+
+        :param key: cache key.
+        :param text: LLM answer.
+        """
+        try:
+            await self.redis.set(key, text, ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"LLM cache store failed: {e}")
+
+    def lookup(self) -> "ResponseCacheLookup":
+        """Processor answering cached utterances."""
+        return ResponseCacheLookup(self)
+
+    def capture(self) -> "ResponseCacheCapture":
+        """Processor storing LLM answers to cacheable utterances."""
+        return ResponseCacheCapture(self)
+
+
+class ResponseCacheLookup(FrameProcessor):
+    """Answers from the cache instead of calling the LLM on a hit."""
+
+    def __init__(self, cache: ResponseCache, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection) -> None:
+        """Look up context frames on their way to the LLM."""
+        await super().process_frame(frame, direction)
+        if not isinstance(frame, OpenAILLMContextFrame):
+            await self.push_frame(frame, direction)
+            return
+
+        key = self.cache.key_for(frame.context.messages)
+        self.cache.pending_key = None
+        cached = await self.cache.get(key) if key else None
+        if key is None:
+            VOICE_LLM_CACHE_REQUESTS.labels(result="skip").inc()
+        elif cached is None:
+            VOICE_LLM_CACHE_REQUESTS.labels(result="miss").inc()
+            self.cache.pending_key = key
+        else:
+            VOICE_LLM_CACHE_REQUESTS.labels(result="hit").inc()
+            await self.push_frame(LLMFullResponseStartFrame())
+            await self.push_frame(LLMTextFrame(cached))
+            await self.push_frame(LLMFullResponseEndFrame())
+            return
+        await self.push_frame(frame, direction)
+
+
+class ResponseCacheCapture(FrameProcessor):
+    """Collects the LLM answer to a cache miss and stores it."""
+
+    def __init__(self, cache: ResponseCache, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.cache = cache
+        self._key: Optional[str] = None
+        self._parts: List[str] = []
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection) -> None:
+        """Watch LLM responses on their way to TTS."""
+        await super().process_frame(frame, direction)
+        if isinstance(frame, LLMFullResponseStartFrame):
+            self._key, self.cache.pending_key = self.cache.pending_key, None
+            self._parts = []
+        elif isinstance(frame, LLMTextFrame) and self._key:
+            self._parts.append(frame.text)
+        elif isinstance(frame, LLMFullResponseEndFrame) and self._key:
+            text = "".join(self._parts).strip()
+            if text:
+                self.create_task(self.cache.set(self._key, text))
+            self._key = None
+        elif isinstance(frame, StartInterruptionFrame):
+            # Never cache an answer the user talked over.
+            self._key = None
+            self.cache.pending_key = None
+        await self.push_frame(frame, direction)
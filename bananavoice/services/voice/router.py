@@ -0,0 +1,483 @@
+"""Latency aware routing between voice service providers."""
+
+import asyncio
+import contextlib
+import logging
+import math
+import time
+from collections import deque
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from openai import AsyncOpenAI, AsyncStream
+from openai.types.audio import Transcription
+from openai.types.chat import ChatCompletionChunk, ChatCompletionMessageParam
+from pipecat.frames.frames import (
+    ErrorFrame,
+    Frame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+)
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+from pipecat.services.openai.stt import OpenAISTTService
+from pipecat.services.openai.tts import OpenAITTSService
+
+from bananavoice.services.voice.interruptions import InterruptibleOpenAILLMService
+from bananavoice.services.voice.metrics import (
+    VOICE_PROVIDER_LATENCY,
+    VOICE_PROVIDER_REQUESTS,
+)
+from bananavoice.settings import VoiceProvider, settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class NoProviderAvailableError(Exception):
+    """Raised when every provider of a route failed."""
+
+
+class LatencyTracker:
+    """
+    Rolling window of request latencies.
+
+    :param window: number of recent latencies kept.
+    """
+
+    def __init__(self, window: int = 100) -> None:
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, latency: float) -> None:
+        """Add the latency of a request."""
+        self.samples.append(latency)
+
+    def p95(self) -> Optional[float]:
+        """95th percentile of the window, None without samples."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[math.ceil(0.95 * (len(ordered) - 1))]
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a failing provider for a while.
+
+    The circuit opens after ``max_failures`` consecutive failures.
+    Once ``reset_timeout`` has passed a trial request is let through;
+    a success closes the circuit, a failure opens it again.
+
+    :param max_failures: consecutive failures that open the circuit.
+    :param reset_timeout: seconds the circuit stays open.
+    """
+
+    def __init__(self, max_failures: int = 3, reset_timeout: float = 30.0) -> None:
+        self.max_failures = max_failures
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        """Whether requests are currently blocked."""
+        if self.opened_at is None:
+            return False
+        return time.monotonic() - self.opened_at < self.reset_timeout
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        """Count a failure and open the circuit when there are too many."""
+        self.failures += 1
+        if self.failures >= self.max_failures:
+            self.opened_at = time.monotonic()
+
+
+class ProviderRoute:
+    """
+    A provider endpoint with its latency and health.
+
+    :param kind: voice stage served ("stt", "llm" or "tts").
+    :param provider: provider configuration.
+    :param client: OpenAI compatible client of the provider.
+    :param breaker: circuit breaker of the provider.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        provider: VoiceProvider,
+        client: AsyncOpenAI,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.kind = kind
+        self.provider = provider
+        self.client = client
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+
+    @property
+    def name(self) -> str:
+        """Provider name."""
+        return self.provider.name
+
+
+class ProviderRouter:
+    """
+    Sends each request to the fastest healthy provider.
+
+    Providers are ranked by their rolling p95 latency. Providers without
+    samples keep their configured order behind measured ones. A failed
+    request fails over to the next provider. With ``hedge_after`` set,
+    a second provider is asked when the first one hasn't answered in
+    time and the first answer wins.
+
+    :param routes: providers in order of preference.
+    :param hedge_after: seconds before a hedged request is sent.
+    :raises ValueError: if there is no provider.
+    """
+
+    def __init__(
+        self,
+        routes: Sequence[ProviderRoute],
+        hedge_after: Optional[float] = None,
+    ) -> None:
+        if not routes:
+            raise ValueError("A provider router needs at least one provider")
+        self.routes = list(routes)
+        self.hedge_after = hedge_after
+        self.last: Optional[ProviderRoute] = None
+
+    def current_provider(self) -> str:
+        """Provider of the latest answer, the preferred one before any."""
+        return (self.last or self.routes[0]).name
+
+    def candidates(self) -> List[ProviderRoute]:
+        """Providers to try, best first."""
+        healthy = [route for route in self.routes if not route.breaker.is_open]
+        if not healthy:
+            # Trying an unhealthy provider beats failing outright.
+            healthy = list(self.routes)
+
+        def rank(route: ProviderRoute) -> float:
+            p95 = route.latency.p95()
+            return math.inf if p95 is None else p95
+
+        return sorted(healthy, key=rank)
+
+    async def first(
+        self,
+        request: Callable[[ProviderRoute], Awaitable[T]],
+        discard: Optional[Callable[[T], Awaitable[None]]] = None,
+    ) -> Tuple[ProviderRoute, T]:
+        """
+        Run a request on the best provider, with hedging and failover.
+
+        :param request: starts the request on a provider. For streams it
+            should return once the first response arrives.
+        :param discard: releases the result of a request that lost
+            the race, e.g. closes its stream.
+        :return: winning provider and its result.
+        :raises NoProviderAvailableError: if every provider failed.
+        """
+        candidates = self.candidates()
+        pending: Dict["asyncio.Task[T]", ProviderRoute] = {}
+        errors: List[str] = []
+        hedged = False
+
+        def launch() -> None:
+            route = candidates.pop(0)
+            pending[asyncio.create_task(self._timed(route, request))] = route
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if self.hedge_after is not None and candidates and not hedged:
+                    timeout = self.hedge_after
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    hedged = True
+                    launch()
+                    continue
+                for task in done:
+                    route = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        VOICE_PROVIDER_REQUESTS.labels(
+                            kind=route.kind,
+                            provider=route.name,
+                            result="win",
+                        ).inc()
+                        self.last = route
+                        return route, task.result()
+                    errors.append(f"{route.name}: {error}")
+                if not pending and candidates:
+                    launch()
+        finally:
+            await self._cancel(pending, discard)
+        raise NoProviderAvailableError("; ".join(errors))
+
+    async def _timed(
+        self,
+        route: ProviderRoute,
+        request: Callable[[ProviderRoute], Awaitable[T]],
+    ) -> T:
+        started_at = time.monotonic()
+        try:
+            result = await request(route)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            route.breaker.record_failure()
+            VOICE_PROVIDER_REQUESTS.labels(
+                kind=route.kind,
+                provider=route.name,
+                result="error",
+            ).inc()
+            logger.warning(f"{route.kind} provider {route.name} failed: {e}")
+            raise
+        latency = time.monotonic() - started_at
+        route.latency.add(latency)
+        route.breaker.record_success()
+        VOICE_PROVIDER_LATENCY.labels(kind=route.kind, provider=route.name).observe(
+            latency,
+        )
+        return result
+
+    async def _cancel(
+        self,
+        pending: Dict["asyncio.Task[T]", ProviderRoute],
+        discard: Optional[Callable[[T], Awaitable[None]]],
+    ) -> None:
+        for task in pending:
+            task.cancel()
+        for task, route in pending.items():
+            with contextlib.suppress(BaseException):
+                result = await task
+                if discard is not None:
+                    await discard(result)
+            VOICE_PROVIDER_REQUESTS.labels(
+                kind=route.kind,
+                provider=route.name,
+                result="lost",
+            ).inc()
+
+
+def create_router(kind: str, providers: Sequence[VoiceProvider]) -> ProviderRouter:
+    """
+    Create the router of a voice stage from provider settings.
+
+    :param kind: voice stage ("stt", "llm" or "tts").
+    :param providers: providers in order of preference.
+    :return: router of the stage.
+    """
+    routes = [
+        ProviderRoute(
+            kind,
+            provider,
+            AsyncOpenAI(
+                api_key=provider.api_key or settings.openai_api_key,
+                base_url=provider.base_url,
+            ),
+            CircuitBreaker(
+                max_failures=settings.voice_provider_max_failures,
+                reset_timeout=settings.voice_provider_reset_timeout,
+            ),
+        )
+        for provider in providers
+    ]
+    return ProviderRouter(routes, hedge_after=settings.voice_provider_hedge_after)
+
+
+class RoutedOpenAISTTService(OpenAISTTService):
+    """OpenAI compatible speech-to-text routed between providers."""
+
+    def __init__(self, *, router: ProviderRouter, **kwargs: Any) -> None:
+        super().__init__(model=router.routes[0].provider.model, **kwargs)
+        self.router = router
+
+    async def _transcribe(self, audio: bytes) -> Transcription:
+        async def transcribe(route: ProviderRoute) -> Transcription:
+            kwargs: Dict[str, Any] = {
+                "file": ("audio.wav", audio, "audio/wav"),
+                "model": route.provider.model,
+                "language": self._language,
+            }
+            if self._prompt is not None:
+                kwargs["prompt"] = self._prompt
+            if self._temperature is not None:
+                kwargs["temperature"] = self._temperature
+            return await route.client.audio.transcriptions.create(**kwargs)
+
+        _, transcription = await self.router.first(transcribe)
+        return transcription
+
+
+class RoutedOpenAILLMService(InterruptibleOpenAILLMService):
+    """OpenAI compatible LLM routed between providers."""
+
+    def __init__(self, *, router: ProviderRouter, **kwargs: Any) -> None:
+        super().__init__(model=router.routes[0].provider.model, **kwargs)
+        self.router = router
+
+    async def get_chat_completions(
+        self,
+        context: OpenAILLMContext,
+        messages: List[ChatCompletionMessageParam],
+    ) -> AsyncStream[ChatCompletionChunk]:
+        """Open a completion stream on the fastest provider."""
+        params: Dict[str, Any] = {
+            "stream": True,
+            "messages": messages,
+            "tools": context.tools,
+            "tool_choice": context.tool_choice,
+            "stream_options": {"include_usage": True},
+            "frequency_penalty": self._settings["frequency_penalty"],
+            "presence_penalty": self._settings["presence_penalty"],
+            "seed": self._settings["seed"],
+            "temperature": self._settings["temperature"],
+            "top_p": self._settings["top_p"],
+            "max_tokens": self._settings["max_tokens"],
+            "max_completion_tokens": self._settings["max_completion_tokens"],
+        }
+        params.update(self._settings["extra"])
+
+        async def complete(route: ProviderRoute) -> AsyncStream[ChatCompletionChunk]:
+            return await route.client.chat.completions.create(
+                model=route.provider.model,
+                **params,
+            )
+
+        async def close(stream: AsyncStream[ChatCompletionChunk]) -> None:
+            await stream.close()
+
+        _, stream = await self.router.first(complete, discard=close)
+        self._stream = stream
+        return stream
+
+
+class _SpeechStream:
+    """Streaming speech response whose first chunk was already read."""
+
+    def __init__(self) -> None:
+        self.stack = contextlib.AsyncExitStack()
+        self.chunks: Optional[AsyncIterator[bytes]] = None
+        self.first = b""
+
+    async def close(self) -> None:
+        await self.stack.aclose()
+
+
+class RoutedOpenAITTSService(OpenAITTSService):
+    """
+    OpenAI compatible text-to-speech routed between providers.
+
+    Latency is measured to the first audio chunk, so hedged requests
+    race on time to first audio.
+    """
+
+    def __init__(self, *, router: ProviderRouter, **kwargs: Any) -> None:
+        provider = router.routes[0].provider
+        kwargs.setdefault("voice", provider.voice or "alloy")
+        super().__init__(model=provider.model, **kwargs)
+        self.router = router
+
+    def route_voice(self, route: ProviderRoute) -> str:
+        """
+        Model and voice a provider speaks with.
+
+        :param route: provider route.
+        :return: model and voice, separated by a colon.
+        """
+        return f"{route.provider.model}:{route.provider.voice or self._voice_id}"
+
+    # pipecat declares run_tts as a coroutine, its services implement it
+    # as an async generator.
+    async def run_tts(  # type: ignore[override]
+        self,
+        text: str,
+    ) -> AsyncGenerator[Frame, None]:
+        """Synthesize text on the fastest provider."""
+        async for _, frame in self.run_routed_tts(text):
+            yield frame
+
+    async def run_routed_tts(
+        self,
+        text: str,
+    ) -> AsyncGenerator[Tuple[Optional[ProviderRoute], Frame], None]:
+        """
+        Synthesize text on the fastest provider, telling which one won.
+
+        :param text: text to speak.
+        :return: frames with the provider that produced them, None if
+            every provider failed.
+        """
+        logger.debug(f"{self}: Generating TTS [{text}]")
+        await self.start_ttfb_metrics()
+        try:
+            route, speech = await self.router.first(
+                lambda route: self._open_speech(route, text),
+                discard=lambda speech: speech.close(),
+            )
+        except NoProviderAvailableError as e:
+            yield None, ErrorFrame(f"Error getting audio: {e}")
+            return
+
+        try:
+            await self.start_tts_usage_metrics(text)
+            yield route, TTSStartedFrame()
+            await self.stop_ttfb_metrics()
+            yield route, TTSAudioRawFrame(speech.first, self.sample_rate, 1)
+            if speech.chunks is not None:
+                async for chunk in speech.chunks:
+                    if chunk:
+                        yield route, TTSAudioRawFrame(chunk, self.sample_rate, 1)
+            yield route, TTSStoppedFrame()
+        finally:
+            await speech.close()
+
+    async def _open_speech(self, route: ProviderRoute, text: str) -> _SpeechStream:
+        speech = _SpeechStream()
+        try:
+            response = await speech.stack.enter_async_context(
+                route.client.audio.speech.with_streaming_response.create(
+                    input=text,
+                    model=route.provider.model,
+                    voice=route.provider.voice or self._voice_id,
+                    response_format="pcm",
+                ),
+            )
+            chunks = response.iter_bytes(self.chunk_size)
+            speech.chunks = chunks
+            async for chunk in chunks:
+                if chunk:
+                    speech.first = chunk
+                    break
+            if not speech.first:
+                raise ValueError("empty audio response")
+        except BaseException:
+            await speech.close()
+            raise
+        return speech
@@ -0,0 +1,156 @@
+"""Concurrent bootstrap helpers for voice bots."""
+
+import asyncio
+import logging
+import time
+from importlib import resources
+from typing import Any, Awaitable, Dict, Optional, Tuple, TypeVar
+
+from pipecat.audio.vad.silero import SileroOnnxModel, SileroVADAnalyzer
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+from pipecat.services.ai_service import AIService
+
+from bananavoice.services.voice.metrics import VOICE_STARTUP_PHASE
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class StartupTimeline:
+    """
+    Timings of the startup phases of a single bot.
+
+    Phases may overlap, each one is stored as its start and end
+    offset (in seconds) from the creation of the timeline.
+
+    :param pipeline: pipeline label of the exported metrics.
+    """
+
+    def __init__(self, pipeline: str) -> None:
+        self.pipeline = pipeline
+        self.started_at = time.monotonic()
+        self.phases: Dict[str, Tuple[float, float]] = {}
+
+    def record(self, name: str, started_at: float) -> None:
+        """
+        Record a phase that started at the given time and ends now.
+
+        :param name: phase name.
+        :param started_at: monotonic start time of the phase.
+        """
+        self.phases[name] = (
+            started_at - self.started_at,
+            time.monotonic() - self.started_at,
+        )
+
+    async def track(self, name: str, awaitable: Awaitable[T]) -> T:
+        """
+        Await a phase and record how long it took.
+
+        The phase is recorded even if it fails.
+
+        :param name: phase name.
+        :param awaitable: work done in the phase.
+        :return: result of the awaitable.
+        """
+        started_at = time.monotonic()
+        try:
+            return await awaitable
+        finally:
+            self.record(name, started_at)
+
+    def summary(self) -> str:
+        """Human readable timeline, phases ordered by start."""
+        phases = sorted(self.phases.items(), key=lambda item: item[1])
+        return " ".join(
+            f"{name}={start:.2f}-{end:.2f}s" for name, (start, end) in phases
+        )
+
+    def finish(self, ready: bool = True) -> float:
+        """
+        Close the timeline, log it and export its phase durations.
+
+        :param ready: whether the bot is ready, the ready phase is only
+            exported for bots that got there.
+        :return: seconds from the creation of the timeline until now.
+        """
+        total = time.monotonic() - self.started_at
+        for name, (start, end) in self.phases.items():
+            VOICE_STARTUP_PHASE.labels(pipeline=self.pipeline, phase=name).observe(
+                end - start,
+            )
+        if not ready:
+            logger.warning(f"Bot not ready after {total:.2f}s: {self.summary()}")
+            return total
+        VOICE_STARTUP_PHASE.labels(pipeline=self.pipeline, phase="ready").observe(
+            total,
+        )
+        logger.info(f"Bot ready in {total:.2f}s: {self.summary()}")
+        return total
+
+
+class DeferredSileroVADAnalyzer(SileroVADAnalyzer):
+    """
+    Silero VAD whose model is loaded in the background.
+
+    The analyzer can be handed to a transport right away; until
+    :meth:`load` completes every audio chunk is treated as silence.
+    """
+
+    def __init__(
+        self,
+        *,
+        sample_rate: Optional[int] = None,
+        params: Optional[VADParams] = None,
+    ) -> None:
+        VADAnalyzer.__init__(self, sample_rate=sample_rate, params=params)
+        self._model: Any = None
+        self._last_reset_time = 0
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the model is ready."""
+        return self._model is not None
+
+    async def load(self) -> None:
+        """Load the ONNX model in a worker thread."""
+        if self._model is None:
+            path = resources.files("pipecat.audio.vad.data") / "silero_vad.onnx"
+            self._model = await asyncio.to_thread(
+                SileroOnnxModel,
+                str(path),
+                force_onnx_cpu=True,
+            )
+
+    def voice_confidence(self, buffer: bytes) -> float:
+        """Voice confidence of the buffer, zero while the model is loading."""
+        if self._model is None:
+            return 0.0
+        return super().voice_confidence(buffer)
+
+
+async def warm_openai_service(service: AIService, timeout: float = 3.0) -> None:
+    """
+    Open the HTTP connection of an OpenAI based service ahead of time.
+
+    A cheap model lookup establishes the TLS connection, which is then
+    reused by the first real request. The client of every provider of a
+    routed service is warmed up, other services are left alone. Failures
+    are only logged.
+
+    :param service: routed OpenAI STT, LLM or TTS service.
+    :param timeout: seconds to wait for the lookup.
+    """
+    router = getattr(service, "router", None)
+    if router is None:
+        return
+    clients = [(route.client, route.provider.model) for route in router.routes]
+
+    async def warm(client: Any, model: str) -> None:
+        try:
+            await asyncio.wait_for(client.models.retrieve(model), timeout)
+        except Exception as e:
+            logger.warning(f"Failed to warm up {service}: {e}")
+
+    await asyncio.gather(*(warm(client, model) for client, model in clients))
@@ -0,0 +1,94 @@
+"""Text aggregation between the LLM and TTS services."""
+
+import re
+from typing import Optional
+
+from pipecat.utils.text.base_text_aggregator import BaseTextAggregator
+
+from bananavoice.services.voice.metrics import VOICE_TTS_CHUNK_CHARS
+
+# Punctuation followed by whitespace, so "3.5" or "e.g" never split.
+SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*(?=\s)")
+CLAUSE_END = re.compile(r"[,;:—]+(?=\s)")
+
+
+class ClauseTextAggregator(BaseTextAggregator):
+    """
+    Aggregates streamed LLM text into chunks for speech synthesis.
+
+    The first chunk of a response is flushed at the first clause or
+    sentence boundary after ``first_min_chars`` so audio starts early.
+    Later chunks are flushed at sentence boundaries after ``min_chars``
+    to keep a natural prosody, or at the last clause boundary once the
+    text grows past ``max_chars``.
+
+    :param first_min_chars: minimum length of the first chunk.
+    :param min_chars: minimum length of later chunks.
+    :param max_chars: length after which a later chunk is split
+        at a clause boundary or, failing that, at a space.
+    """
+
+    def __init__(
+        self,
+        first_min_chars: int = 20,
+        min_chars: int = 80,
+        max_chars: int = 250,
+    ) -> None:
+        self.first_min_chars = first_min_chars
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._text = ""
+        self._first = True
+
+    @property
+    def text(self) -> str:
+        """Text aggregated so far."""
+        return self._text
+
+    async def aggregate(self, text: str) -> Optional[str]:
+        """
+        Add streamed text and return a chunk once one is ready.
+
+        :param text: next piece of LLM output.
+        :return: text to synthesize or None.
+        """
+        self._text += text
+        end = self._find_boundary()
+        if end is None:
+            return None
+        chunk = self._text[:end]
+        self._text = self._text[end:]
+        VOICE_TTS_CHUNK_CHARS.labels(
+            position="first" if self._first else "later",
+        ).observe(len(chunk))
+        self._first = False
+        return chunk
+
+    async def handle_interruption(self) -> None:
+        """Drop pending text, the next response starts a new first chunk."""
+        await self.reset()
+
+    async def reset(self) -> None:
+        """Clear the aggregator at the end of a response."""
+        self._text = ""
+        self._first = True
+
+    def _find_boundary(self) -> Optional[int]:
+        if self._first:
+            matches = [
+                pattern.search(self._text, self.first_min_chars - 1)
+                for pattern in (CLAUSE_END, SENTENCE_END)
+            ]
+            ends = [match.end() for match in matches if match]
+            return min(ends) if ends else None
+
+        sentence = SENTENCE_END.search(self._text, self.min_chars - 1)
+        if sentence:
+            return sentence.end()
+        if len(self._text) < self.max_chars:
+            return None
+        clauses = [m.end() for m in CLAUSE_END.finditer(self._text, self.min_chars - 1)]
+        if clauses:
+            return clauses[-1]
+        space = self._text.rfind(" ", self.min_chars)
+        return space if space > 0 else None
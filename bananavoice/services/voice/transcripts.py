@@ -0,0 +1,331 @@
+"""Conversation transcripts written behind the voice pipelines."""
+
+import asyncio
+import contextlib
+import logging
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Sequence, Set
+
+from pipecat.frames.frames import CancelFrame, EndFrame, Frame
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bananavoice.db.dao.conversation_dao import ConversationDAO
+from bananavoice.services.voice.context import Message
+from bananavoice.services.voice.metrics import VOICE_TRANSCRIPT_TURNS_DROPPED
+
+logger = logging.getLogger(__name__)
+
+RECORDED_ROLES = ("user", "assistant")
+# Recent messages remembered to find where the new ones start.
+RECORDED_MESSAGES = 64
+
+
+def message_text(message: Message) -> str:
+    """
+    Text of a chat message, without the parts that aren't text.
+
+    :param message: chat message.
+    :return: the text.
+    """
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        content = " ".join(
+            str(part.get("text", "")) for part in content if isinstance(part, dict)
+        )
+    return str(content).strip()
+
+
+class TranscriptWriter:
+    """
+    Writes the transcripts of all sessions of the process behind their backs.
+
+    Pipelines only queue conversations and turns, which never waits for
+    the database. The queue is written in multi-row inserts once it holds
+    ``batch_size`` turns, every interval and when a session ends. Beyond
+    ``max_pending`` turns, conversations or ends, because the database
+    is slow or down, the oldest ones are dropped and counted. A batch
+    the database refuses is dropped rather than retried.
+
+    :param session_factory: database session factory, without one the
+        transcripts are discarded.
+    :param batch_size: turns that trigger a flush and rows per insert.
+    :param interval: seconds between periodic flushes.
+    :param max_pending: turns, conversations and ends kept while the
+        database lags behind.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[async_sessionmaker[AsyncSession]],
+        batch_size: int = 200,
+        interval: float = 5.0,
+        max_pending: int = 5000,
+    ) -> None:
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._conversations: List[Dict[str, Any]] = []
+        self._turns: Deque[Dict[str, Any]] = deque()
+        self._ended: Dict[str, datetime] = {}
+        self._positions: Dict[str, int] = {}
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def pending(self) -> int:
+        """Turns waiting to be written."""
+        return len(self._turns)
+
+    def open(
+        self,
+        conversation_id: str,
+        pipeline: str,
+        user_id: Optional[uuid.UUID] = None,
+    ) -> None:
+        """
+        Queue a new conversation.
+
+        :param conversation_id: session id of the conversation.
+        :param pipeline: pipeline type of the session.
+        :param user_id: id of the user talking, if known.
+        """
+        if len(self._conversations) >= self.max_pending:
+            self._drop_conversation(self._conversations.pop(0)["id"])
+        self._positions[conversation_id] = 0
+        self._conversations.append(
+            {
+                "id": conversation_id,
+                "pipeline": pipeline,
+                "user_id": user_id,
+                "started_at": datetime.now(),
+            },
+        )
+
+    def add_turn(self, conversation_id: str, role: str, content: str) -> None:
+        """
+        Queue a turn of an open conversation.
+
+        :param conversation_id: id of the conversation.
+        :param role: user or assistant.
+        :param content: text of the turn.
+        """
+        position = self._positions.get(conversation_id)
+        if position is None:
+            logger.warning(f"Turn of unknown conversation {conversation_id} ignored")
+            return
+        self._positions[conversation_id] = position + 1
+        if len(self._turns) >= self.max_pending:
+            self._turns.popleft()
+            self._drop(1)
+        self._turns.append(
+            {
+                "conversation_id": conversation_id,
+                "position": position,
+                "role": role,
+                "content": content,
+                "created_at": datetime.now(),
+            },
+        )
+        if len(self._turns) >= self.batch_size:
+            self._wake.set()
+
+    def close(self, conversation_id: str) -> None:
+        """
+        Queue the end of a conversation and flush it soon.
+
+        :param conversation_id: id of the conversation.
+        """
+        if self._positions.pop(conversation_id, None) is None:
+            return
+        if len(self._ended) >= self.max_pending:
+            # The conversation is kept, without its end time.
+            del self._ended[next(iter(self._ended))]
+            logger.error("Dropped the end time of a conversation")
+        self._ended[conversation_id] = datetime.now()
+        self._wake.set()
+
+    async def flush(self) -> int:
+        """
+        Write the queued conversations and turns in one transaction.
+
+        :return: number of turns written.
+        """
+        async with self._lock:
+            conversations, self._conversations = self._conversations, []
+            turns, self._turns = list(self._turns), deque()
+            ended, self._ended = self._ended, {}
+            if not (conversations or turns or ended):
+                return 0
+            if self.session_factory is None:
+                logger.debug(f"Discarding {len(turns)} conversation turns")
+                return 0
+            try:
+                async with self.session_factory() as session:
+                    dao = ConversationDAO(session)
+                    await dao.add_conversations(conversations)
+                    for start in range(0, len(turns), self.batch_size):
+                        await dao.add_turns(turns[start : start + self.batch_size])
+                    await dao.end_conversations(
+                        [{"id": key, "ended_at": at} for key, at in ended.items()],
+                    )
+                    await session.commit()
+            except (IntegrityError, DataError) as e:
+                # Retrying can't fix rows the database refuses.
+                logger.error(
+                    f"Database refused {len(conversations)} conversations "
+                    f"and {len(turns)} turns: {e}",
+                )
+                self._drop(len(turns))
+                return 0
+            except Exception as e:
+                logger.warning(f"Failed to write {len(turns)} conversation turns: {e}")
+                self._requeue(conversations, turns, ended)
+                return 0
+            return len(turns)
+
+    def start(self) -> None:
+        """Start the periodic flush if it isn't running."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    def _requeue(
+        self,
+        conversations: List[Dict[str, Any]],
+        turns: List[Dict[str, Any]],
+        ended: Dict[str, datetime],
+    ) -> None:
+        # Queued while the batch was written, so they come after it.
+        self._conversations = conversations + self._conversations
+        self._ended = {**ended, **self._ended}
+        self._turns.extendleft(reversed(turns))
+        while len(self._conversations) > self.max_pending:
+            self._drop_conversation(self._conversations.pop(0)["id"])
+        while len(self._ended) > self.max_pending:
+            del self._ended[next(iter(self._ended))]
+            logger.error("Dropped the end time of a conversation")
+        overflow = len(self._turns) - self.max_pending
+        for _ in range(overflow):
+            self._turns.popleft()
+        if overflow > 0:
+            self._drop(overflow)
+
+    def _drop_conversation(self, conversation_id: str) -> None:
+        # Its turns would violate the foreign key without it.
+        kept = [
+            turn for turn in self._turns if turn["conversation_id"] != conversation_id
+        ]
+        self._drop(len(self._turns) - len(kept))
+        self._turns = deque(kept)
+        self._positions.pop(conversation_id, None)
+        self._ended.pop(conversation_id, None)
+        logger.error(f"Dropped the transcript of conversation {conversation_id}")
+
+    def _drop(self, turns: int) -> None:
+        self.dropped += turns
+        VOICE_TRANSCRIPT_TURNS_DROPPED.inc(turns)
+        logger.error(f"Dropped {turns} conversation turns")
+
+    async def _loop(self) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            self._wake.clear()
+            if not await self.flush() and self._turns:
+                # Back off while the database is failing.
+                await asyncio.sleep(self.interval)
+
+
+class TranscriptRecorder(FrameProcessor):
+    """
+    Queues the user and assistant turns the context aggregators add to a context.
+
+    New messages are picked from the end of the context as frames pass,
+    which costs a lookup per frame. Messages summarized away by the
+    context budget were recorded before. Place the recorder after the
+    assistant context aggregator.
+
+    :param context: LLM context of the session.
+    :param writer: writer of the transcript.
+    :param conversation_id: session id of the conversation.
+    :param pipeline: pipeline type of the session.
+    :param user_id: id of the user talking, if known.
+    """
+
+    def __init__(
+        self,
+        context: OpenAILLMContext,
+        writer: TranscriptWriter,
+        conversation_id: str,
+        pipeline: str,
+        user_id: Optional[uuid.UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.context = context
+        self.writer = writer
+        self.conversation_id = conversation_id
+        # Recorded messages are kept referenced so their ids stay unique.
+        self._recorded: Deque[Message] = deque(maxlen=RECORDED_MESSAGES)
+        self._recorded_ids: Set[int] = set()
+        self._closed = False
+        # Messages seeded before the session are prompts, not turns.
+        self._mark(context.messages)
+        writer.open(conversation_id, pipeline, user_id)
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection) -> None:
+        """Queue new turns of the context and pass the frame on."""
+        await super().process_frame(frame, direction)
+        self._record()
+        if isinstance(frame, (EndFrame, CancelFrame)):
+            self._close()
+        await self.push_frame(frame, direction)
+
+    async def cleanup(self) -> None:
+        """Close the conversation if the session ended without an end frame."""
+        await super().cleanup()
+        self._close()
+
+    def _record(self) -> None:
+        messages = self.context.messages
+        new: List[Message] = []
+        for message in reversed(messages):
+            if id(message) in self._recorded_ids:
+                break
+            new.append(message)
+        new.reverse()
+        self._mark(new)
+        for message in new:
+            text = message_text(message)
+            if message.get("role") in RECORDED_ROLES and text:
+                self.writer.add_turn(self.conversation_id, message["role"], text)
+
+    def _mark(self, messages: Sequence[Message]) -> None:
+        for message in messages[-RECORDED_MESSAGES:]:
+            if len(self._recorded) == RECORDED_MESSAGES:
+                self._recorded_ids.discard(id(self._recorded[0]))
+            self._recorded.append(message)
+            self._recorded_ids.add(id(message))
+
+    def _close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._record()
+        self.writer.close(self.conversation_id)
@@ -0,0 +1,185 @@
+"""Adaptive end-of-turn detection."""
+
+import logging
+import math
+from collections import deque
+from typing import Deque, Optional
+
+from pipecat.audio.vad.vad_analyzer import VADParams, VADState
+
+from bananavoice.services.voice.metrics import (
+    VOICE_TURN_DECISIONS,
+    VOICE_TURN_STOP_SECONDS,
+)
+from bananavoice.services.voice.startup import DeferredSileroVADAnalyzer
+from bananavoice.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TurnEndController:
+    """
+    Learns the pauses of a speaker and picks the VAD stop time.
+
+    Pauses the speaker resumes from are sampled online. The stop time
+    follows a high quantile of the recent pauses plus a margin, so fast
+    talkers get answers sooner. When the speaker resumes right after a
+    turn ended, the whole gap is sampled as a pause, which lengthens
+    the stop time for slow talkers.
+
+    :param pipeline: pipeline label of the exported metrics.
+    :param stop_secs: initial stop time.
+    :param min_stop_secs: lower bound of the stop time.
+    :param max_stop_secs: upper bound of the stop time.
+    :param quantile: quantile of the pauses to cover.
+    :param margin: seconds added to the quantile.
+    :param window: number of recent pauses to learn from.
+    :param min_samples: pauses needed before the stop time changes.
+    :param resume_window: seconds after a turn end in which speech
+        counts as the turn being cut off.
+    """
+
+    def __init__(
+        self,
+        pipeline: str,
+        *,
+        stop_secs: float = 0.8,
+        min_stop_secs: float = 0.3,
+        max_stop_secs: float = 1.6,
+        quantile: float = 0.9,
+        margin: float = 0.15,
+        window: int = 50,
+        min_samples: int = 3,
+        resume_window: float = 1.0,
+    ) -> None:
+        self.pipeline = pipeline
+        self.stop_secs = stop_secs
+        self.min_stop_secs = min_stop_secs
+        self.max_stop_secs = max_stop_secs
+        self.quantile = quantile
+        self.margin = margin
+        self.min_samples = min_samples
+        self.resume_window = resume_window
+        self.pauses: Deque[float] = deque(maxlen=window)
+        self._pause_started: Optional[float] = None
+        self._turn_ended: Optional[float] = None
+
+    def recommended_stop_secs(self) -> float:
+        """Stop time that covers the configured quantile of pauses."""
+        if len(self.pauses) < self.min_samples:
+            return self.stop_secs
+        pauses = sorted(self.pauses)
+        index = math.ceil(self.quantile * (len(pauses) - 1))
+        stop_secs = pauses[index] + self.margin
+        return min(self.max_stop_secs, max(self.min_stop_secs, stop_secs))
+
+    def observe(
+        self,
+        previous: VADState,
+        state: VADState,
+        now: float,
+    ) -> Optional[float]:
+        """
+        Observe a VAD state change.
+
+        :param previous: state before the change.
+        :param state: new state.
+        :param now: audio time of the change in seconds.
+        :return: new stop time to apply, when it changed at a turn end.
+        """
+        if previous == VADState.SPEAKING and state == VADState.STOPPING:
+            self._pause_started = now
+        elif state == VADState.SPEAKING and self._pause_started is not None:
+            if previous == VADState.STOPPING:
+                self.pauses.append(now - self._pause_started)
+            elif (
+                self._turn_ended is not None
+                and now - self._turn_ended <= self.resume_window
+            ):
+                self.pauses.append(now - self._pause_started)
+                VOICE_TURN_DECISIONS.labels(
+                    pipeline=self.pipeline,
+                    decision="premature",
+                ).inc()
+            self._pause_started = None
+            self._turn_ended = None
+        elif previous == VADState.STOPPING and state == VADState.QUIET:
+            self._turn_ended = now
+            VOICE_TURN_STOP_SECONDS.labels(pipeline=self.pipeline).observe(
+                self.stop_secs,
+            )
+            return self._adjust()
+        return None
+
+    def _adjust(self) -> Optional[float]:
+        stop_secs = round(self.recommended_stop_secs(), 2)
+        if abs(stop_secs - self.stop_secs) < 0.05:
+            return None
+        decision = "shorten" if stop_secs < self.stop_secs else "lengthen"
+        VOICE_TURN_DECISIONS.labels(pipeline=self.pipeline, decision=decision).inc()
+        logger.info(
+            f"Turn end stop time {decision}ed from {self.stop_secs:.2f}s "
+            f"to {stop_secs:.2f}s after {len(self.pauses)} pauses",
+        )
+        self.stop_secs = stop_secs
+        return stop_secs
+
+
+class AdaptiveSileroVADAnalyzer(DeferredSileroVADAnalyzer):
+    """
+    Silero VAD whose stop time is tuned by a turn end controller.
+
+    New stop times are only applied once a turn has ended, so
+    a turn in progress is never reset.
+
+    :param controller: controller learning the speaker's pauses.
+    """
+
+    def __init__(
+        self,
+        *,
+        controller: TurnEndController,
+        sample_rate: Optional[int] = None,
+        params: Optional[VADParams] = None,
+    ) -> None:
+        params = params or VADParams()
+        super().__init__(
+            sample_rate=sample_rate,
+            params=params.model_copy(update={"stop_secs": controller.stop_secs}),
+        )
+        self.controller = controller
+        self._audio_secs = 0.0
+
+    def analyze_audio(self, buffer: bytes) -> VADState:
+        """Analyze audio and let the controller observe state changes."""
+        previous = self._vad_state
+        state = super().analyze_audio(buffer)
+        self._audio_secs += len(buffer) / (2 * self.num_channels * self.sample_rate)
+        if state != previous:
+            stop_secs = self.controller.observe(previous, state, self._audio_secs)
+            if stop_secs is not None:
+                self.set_params(
+                    self.params.model_copy(update={"stop_secs": stop_secs}),
+                )
+        return state
+
+
+def create_vad_analyzer(pipeline: str) -> DeferredSileroVADAnalyzer:
+    """
+    Create the VAD analyzer of a voice session from settings.
+
+    :param pipeline: pipeline label of the exported metrics.
+    :return: analyzer, its model still has to be loaded.
+    """
+    if not settings.voice_turn_adaptive:
+        return DeferredSileroVADAnalyzer(
+            params=VADParams(stop_secs=settings.voice_turn_stop_secs),
+        )
+    return AdaptiveSileroVADAnalyzer(
+        controller=TurnEndController(
+            pipeline,
+            stop_secs=settings.voice_turn_stop_secs,
+            min_stop_secs=settings.voice_turn_min_stop_secs,
+            max_stop_secs=settings.voice_turn_max_stop_secs,
+        ),
+    )
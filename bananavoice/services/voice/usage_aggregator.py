@@ -0,0 +1,234 @@
+"""Rolling-window totals of voice usage and spend, kept in Redis."""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+from redis.asyncio import Redis
+
+from bananavoice.services.voice.cost_monitor import UsageKey
+from bananavoice.services.voice.metrics import VOICE_USAGE_COST, VOICE_USAGE_QUANTITY
+
+logger = logging.getLogger(__name__)
+
+# Bucket length and time to live in seconds. Short windows are summed
+# from minute buckets, long ones from hour buckets.
+RESOLUTIONS: Tuple[Tuple[int, int], ...] = ((60, 2 * 3600), (3600, 2 * 86400))
+# HINCRBY only adds integers, quantities are kept in thousandths
+# and costs in micro dollars.
+QUANTITY_SCALE = 1000
+COST_SCALE = 1_000_000
+MAX_BUCKETS = 60
+
+
+def _text(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+@dataclass
+class WindowTotals:
+    """Usage and spend in a rolling window."""
+
+    window: int
+    quantities: Dict[UsageKey, float] = field(default_factory=dict)
+    costs: Dict[Tuple[str, str], float] = field(default_factory=dict)
+    users: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def cost(self) -> float:
+        """USD spent in the window."""
+        return sum(self.costs.values())
+
+    def to_dict(self, top_users: int = 20) -> Dict[str, Any]:
+        """
+        Report of the window.
+
+        :param top_users: number of biggest spenders listed.
+        """
+        providers: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for (kind, model), cost in self.costs.items():
+            providers[kind, model] = {
+                "kind": kind,
+                "model": model,
+                "cost": round(cost, 6),
+                "usage": {},
+            }
+        for (kind, model, unit), quantity in self.quantities.items():
+            provider = providers.setdefault(
+                (kind, model),
+                {"kind": kind, "model": model, "cost": 0.0, "usage": {}},
+            )
+            provider["usage"][unit] = quantity
+        users = sorted(self.users.items(), key=lambda item: item[1], reverse=True)
+        return {
+            "window": self.window,
+            "cost": round(self.cost, 6),
+            "providers": list(providers.values()),
+            "users": [
+                {"user_id": user_id, "cost": round(cost, 6)}
+                for user_id, cost in users[:top_users]
+            ],
+        }
+
+
+class UsageAggregator:
+    """
+    Keeps rolling totals of metered usage in time-bucketed Redis hashes.
+
+    Every batch of usage rows is added, with one pipelined round trip,
+    to a provider hash and a user hash of the current minute and hour
+    buckets. Buckets expire on their own once no window can reach them.
+    A window is summed from the finest buckets that cover it with at
+    most ``MAX_BUCKETS`` keys and is rounded up to whole buckets.
+
+    :param redis: redis client.
+    :param windows: windows in seconds exported as Prometheus gauges.
+    :param prefix: prefix of the bucket keys.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        windows: Sequence[int] = (300, 3600, 86400),
+        prefix: str = "voice:usage",
+    ) -> None:
+        self.redis = redis
+        self.windows = list(windows)
+        self.prefix = prefix
+        self._task: Optional[asyncio.Task[None]] = None
+        self._exported: Dict[str, Set[Tuple[str, ...]]] = {}
+
+    async def add(
+        self,
+        rows: Sequence[Mapping[str, Any]],
+        now: Optional[float] = None,
+    ) -> None:
+        """
+        Add usage rows to the current buckets.
+
+        :param rows: voice usage rows, as written to the database.
+        :param now: unix time of the usage, defaults to now.
+        """
+        providers: Dict[str, float] = {}
+        users: Dict[str, float] = {}
+        for row in rows:
+            provider = f"{row['kind']}|{row['model']}"
+            unit = f"{provider}|{row['unit']}"
+            providers[unit] = providers.get(unit, 0) + row["quantity"] * QUANTITY_SCALE
+            cost = f"{provider}|cost"
+            providers[cost] = providers.get(cost, 0) + row["cost"] * COST_SCALE
+            if row.get("user_id") is not None:
+                user_id = str(row["user_id"])
+                users[user_id] = users.get(user_id, 0) + row["cost"] * COST_SCALE
+        if not providers:
+            return
+
+        now = time.time() if now is None else now
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for resolution, ttl in RESOLUTIONS:
+                bucket = int(now // resolution * resolution)
+                for name, fields in (("providers", providers), ("users", users)):
+                    key = self._key(resolution, bucket, name)
+                    increments = {f: round(v) for f, v in fields.items() if round(v)}
+                    for field_name, amount in increments.items():
+                        pipe.hincrby(key, field_name, amount)
+                    if increments:
+                        pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def totals(self, window: int, now: Optional[float] = None) -> WindowTotals:
+        """
+        Sum the buckets of a rolling window.
+
+        :param window: window length in seconds.
+        :param now: unix time the window ends at, defaults to now.
+        :return: usage and spend in the window.
+        """
+        now = time.time() if now is None else now
+        resolution = self._resolution(window)
+        last = int(now // resolution * resolution)
+        first = int((now - window) // resolution * resolution)
+        buckets = range(first, last + 1, resolution)
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for bucket in buckets:
+                pipe.hgetall(self._key(resolution, bucket, "providers"))
+                pipe.hgetall(self._key(resolution, bucket, "users"))
+            hashes: List[Dict[Any, Any]] = await pipe.execute()
+
+        totals = WindowTotals(window=window)
+        for index, values in enumerate(hashes):
+            for raw_field, raw_amount in values.items():
+                field_name, amount = _text(raw_field), int(raw_amount)
+                if index % 2:
+                    totals.users[field_name] = (
+                        totals.users.get(field_name, 0) + amount / COST_SCALE
+                    )
+                    continue
+                kind, model, unit = field_name.rsplit("|", 2)
+                if unit == "cost":
+                    key = (kind, model)
+                    totals.costs[key] = totals.costs.get(key, 0) + amount / COST_SCALE
+                else:
+                    usage = (kind, model, unit)
+                    totals.quantities[usage] = (
+                        totals.quantities.get(usage, 0) + amount / QUANTITY_SCALE
+                    )
+        return totals
+
+    async def export(self) -> List[WindowTotals]:
+        """
+        Set the Prometheus gauges of the configured windows.
+
+        :return: totals of every window.
+        """
+        reports = []
+        for window in self.windows:
+            totals = await self.totals(window)
+            label = f"{window}s"
+            for (kind, model), cost in totals.costs.items():
+                VOICE_USAGE_COST.labels(label, kind, model).set(cost)
+            for usage, quantity in totals.quantities.items():
+                VOICE_USAGE_QUANTITY.labels(label, *usage).set(quantity)
+            # Providers that left the window drop to zero.
+            exported = {*totals.costs, *totals.quantities}
+            for labels in self._exported.get(label, set()) - exported:
+                gauge = VOICE_USAGE_COST if len(labels) == 2 else VOICE_USAGE_QUANTITY
+                gauge.labels(label, *labels).set(0)
+            self._exported[label] = exported
+            reports.append(totals)
+        return reports
+
+    def start(self, interval: float) -> None:
+        """
+        Refresh the gauges periodically.
+
+        :param interval: seconds between refreshes.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(interval))
+
+    async def stop(self) -> None:
+        """Stop refreshing the gauges."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _resolution(self, window: int) -> int:
+        for resolution, ttl in RESOLUTIONS:
+            if window <= resolution * MAX_BUCKETS and window < ttl:
+                return resolution
+        return RESOLUTIONS[-1][0]
+
+    def _key(self, resolution: int, bucket: int, name: str) -> str:
+        return f"{self.prefix}:{resolution}:{bucket}:{name}"
+
+    async def _loop(self, interval: float) -> None:
+        while True:
+            try:
+                await self.export()
+            except Exception as e:
+                logger.warning(f"Failed to export voice usage totals: {e}")
+            await asyncio.sleep(interval)
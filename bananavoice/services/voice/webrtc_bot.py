@@ -3,20 +3,53 @@
 import asyncio
 import logging
 import os
-from typing import Any, Dict, Optional
+import signal
+import time
+import uuid
+from types import FrameType
+from typing import Any, Callable, Dict, List, Optional, Set
 
-from pipecat.audio.vad.silero import SileroVADAnalyzer
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
 from pipecat.pipeline.task import PipelineParams, PipelineTask
 from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
-from pipecat.services.gemini_multimodal_live import GeminiMultimodalLiveLLMService
+from pipecat.processors.frame_processor import FrameProcessor
+from pipecat.services.gemini_multimodal_live.gemini import (
+    ContextWindowCompressionParams,
+    InputParams,
+)
 from pipecat.transports.base_transport import TransportParams
 from pipecat.transports.network.small_webrtc import SmallWebRTCTransport
 from pipecat.transports.network.webrtc_connection import (
     IceServer,
     SmallWebRTCConnection,
 )
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bananavoice.services.voice.admission import AdmissionController
+from bananavoice.services.voice.context import ContextBudgetProcessor
+from bananavoice.services.voice.llm_pool import (
+    LLMServicePool,
+    WarmGeminiLiveLLMService,
+    WarmLLMService,
+)
+from bananavoice.services.voice.metering import SessionUsage, UsageMeter, UsageWriter
+from bananavoice.services.voice.observers import (
+    FirstAudioObserver,
+    InboundAudioObserver,
+    InterruptionObserver,
+    LatencyObserver,
+)
+from bananavoice.services.voice.profiling import SessionProfiler
+from bananavoice.services.voice.quota import VoiceQuota
+from bananavoice.services.voice.reaper import SessionReaper
+from bananavoice.services.voice.transcripts import (
+    TranscriptRecorder,
+    TranscriptWriter,
+)
+from bananavoice.services.voice.turn import create_vad_analyzer
+from bananavoice.services.voice.usage_aggregator import UsageAggregator
+from bananavoice.settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -68,18 +101,107 @@ class WebRTCVoiceAgent:
         google_api_key: str,
         voice_id: str = "Puck",
         system_instruction: str = SYSTEM_INSTRUCTION,
+        admission: Optional[AdmissionController] = None,
+        *,
+        llm_factory: Optional[Callable[[], WarmLLMService]] = None,
+        ice_servers: Optional[List[IceServer]] = None,
+        session_factory: Optional[async_sessionmaker[AsyncSession]] = None,
+        usage_aggregator: Optional[UsageAggregator] = None,
+        quota: Optional[VoiceQuota] = None,
     ) -> None:
         """Initialize the WebRTC Voice Agent."""
         self.google_api_key = google_api_key
         self.voice_id = voice_id
         self.system_instruction = system_instruction
+        self.llm_factory = llm_factory or self._create_llm
+        self.ice_servers = ICE_SERVERS if ice_servers is None else ice_servers
+        self.admission = admission or AdmissionController(
+            max_sessions=settings.voice_max_sessions,
+            queue_size=settings.voice_admission_queue_size,
+            queue_timeout=settings.voice_admission_queue_timeout,
+            max_cpu_percent=settings.voice_max_cpu_percent,
+            max_loop_lag=settings.voice_max_loop_lag,
+            retry_after=settings.voice_retry_after,
+        )
+        self.llm_pool = LLMServicePool(
+            self.llm_factory,
+            min_size=settings.voice_llm_pool_min_size,
+            max_size=settings.voice_llm_pool_max_size,
+            max_age=settings.voice_llm_pool_max_age,
+        )
+        self.reaper = SessionReaper(
+            "webrtc",
+            idle_timeout=settings.voice_session_idle_timeout,
+            max_duration=settings.voice_session_max_duration,
+            interval=settings.voice_reaper_interval,
+        )
+        self.profiler = SessionProfiler(
+            "webrtc",
+            alert_bytes=settings.voice_memory_alert_bytes,
+            enabled=settings.voice_session_profiling,
+        )
+        self.usage_writer = UsageWriter(
+            session_factory,
+            interval=settings.voice_usage_flush_interval,
+            max_pending=settings.voice_usage_max_pending_rows,
+            aggregator=usage_aggregator,
+            quota=quota,
+        )
+        self.transcript_writer = TranscriptWriter(
+            session_factory,
+            batch_size=settings.voice_transcripts_batch_size,
+            interval=settings.voice_transcripts_flush_interval,
+            max_pending=settings.voice_transcripts_max_pending,
+        )
         self.connections: Dict[str, SmallWebRTCConnection] = {}
         self._tasks: Dict[str, asyncio.Task[Any]] = {}
 
-    async def create_connection(self, sdp: str, sdp_type: str) -> Dict[str, str]:
-        """Create a new WebRTC connection."""
-        connection = SmallWebRTCConnection(ICE_SERVERS)
-        await connection.initialize(sdp=sdp, type=sdp_type)
+    def _create_llm(self) -> WarmGeminiLiveLLMService:
+        """Create a new LLM service for a session."""
+        return WarmGeminiLiveLLMService(
+            api_key=self.google_api_key,
+            voice_id=self.voice_id,
+            transcribe_user_audio=True,
+            transcribe_model_audio=True,
+            system_instruction=self.system_instruction,
+            # Gemini keeps the conversation server side, so let it compress
+            # the context window once it grows past the budget.
+            params=InputParams(
+                context_window_compression=ContextWindowCompressionParams(
+                    enabled=True,
+                    trigger_tokens=settings.voice_gemini_context_max_tokens,
+                ),
+            ),
+        )
+
+    async def create_connection(
+        self,
+        sdp: str,
+        sdp_type: str,
+        user_id: Optional[uuid.UUID] = None,
+    ) -> Dict[str, str]:
+        """
+        Create a new WebRTC connection.
+
+        :param user_id: id of the user the session's usage is metered to.
+        :raises AdmissionRejectedError: if the worker can't take more sessions.
+        """
+        started_at = time.monotonic()
+        await self.admission.acquire()
+        self.llm_pool.start()
+        self.reaper.start()
+        self.usage_writer.start()
+        self.transcript_writer.start()
+        # aiortc and pipeline tasks created for the session are accounted to it
+        stats = self.profiler.open_session()
+        connection = SmallWebRTCConnection(self.ice_servers)
+        try:
+            with self.profiler.attach(stats):
+                await connection.initialize(sdp=sdp, type=sdp_type)
+        except BaseException:
+            self.profiler.close_session(stats)
+            self.admission.release()
+            raise
 
         # Set up connection cleanup
         @connection.event_handler("closed")
@@ -96,9 +218,15 @@ class WebRTCVoiceAgent:
         answer = connection.get_answer()
         pc_id = answer["pc_id"]
         self.connections[pc_id] = connection
+        stats.session_id = pc_id
 
         # Start the voice agent for this connection
-        task = asyncio.create_task(self._run_voice_agent(connection))
+        with self.profiler.attach(stats):
+            task = asyncio.create_task(
+                self._run_voice_agent(connection, started_at, user_id),
+            )
+        task.add_done_callback(lambda _: self.admission.release())
+        task.add_done_callback(lambda _: self.profiler.close_session(stats))
         self._tasks[pc_id] = task
 
         return answer
@@ -117,27 +245,33 @@ class WebRTCVoiceAgent:
         await connection.renegotiate(sdp=sdp, type=sdp_type)
         return connection.get_answer()
 
-    async def _run_voice_agent(self, webrtc_connection: SmallWebRTCConnection) -> None:
+    async def _run_voice_agent(
+        self,
+        webrtc_connection: SmallWebRTCConnection,
+        started_at: float,
+        user_id: Optional[uuid.UUID] = None,
+    ) -> None:
         """Run the voice agent pipeline for a WebRTC connection."""
+        # Load the VAD model off the event loop
+        vad_analyzer = create_vad_analyzer("webrtc")
+        await vad_analyzer.load()
+
         # Create the Pipecat transport
         transport = SmallWebRTCTransport(
             webrtc_connection=webrtc_connection,
             params=TransportParams(
                 audio_in_enabled=True,
                 audio_out_enabled=True,
-                vad_analyzer=SileroVADAnalyzer(),
+                vad_analyzer=vad_analyzer,
                 audio_out_10ms_chunks=2,
             ),
         )
 
-        # Create the LLM service
-        llm = GeminiMultimodalLiveLLMService(
-            api_key=self.google_api_key,
-            voice_id=self.voice_id,
-            transcribe_user_audio=True,
-            transcribe_model_audio=True,
-            system_instruction=self.system_instruction,
-        )
+        # Take an LLM service with an open upstream session if one is ready
+        llm = self.llm_pool.claim()
+        prewarmed = llm is not None
+        if llm is None:
+            llm = self.llm_factory()
 
         # Create context
         context = OpenAILLMContext(
@@ -151,26 +285,79 @@ class WebRTCVoiceAgent:
         )
         context_aggregator = llm.create_context_aggregator(context)
 
+        # Gemini bills input audio as prompt tokens, there is no STT to meter
+        pc_id = webrtc_connection.pc_id
+        metering: List[FrameProcessor] = []
+        if settings.voice_usage_metering:
+            metering = [
+                UsageMeter(
+                    SessionUsage(pc_id, "webrtc", user_id=user_id),
+                    self.usage_writer,
+                    transport="small_webrtc",
+                ),
+            ]
+        transcript: List[FrameProcessor] = []
+        if settings.voice_transcripts_enabled:
+            transcript = [
+                TranscriptRecorder(
+                    context,
+                    self.transcript_writer,
+                    pc_id,
+                    "webrtc",
+                    user_id=user_id,
+                ),
+            ]
+
         # Build pipeline
         pipeline = Pipeline(
             [
                 transport.input(),
                 context_aggregator.user(),
+                # Only bounds the local copy, Gemini compresses its own context
+                ContextBudgetProcessor(
+                    max_tokens=settings.voice_context_max_tokens,
+                    keep_messages=settings.voice_context_keep_messages,
+                ),
                 llm,
                 transport.output(),
                 context_aggregator.assistant(),
+                *transcript,
+                *metering,
             ],
         )
 
         # Create pipeline task
+        activity = InboundAudioObserver()
         task = PipelineTask(
             pipeline,
             params=PipelineParams(
+                allow_interruptions=True,
                 enable_metrics=True,
                 enable_usage_metrics=True,
             ),
+            observers=[
+                FirstAudioObserver(started_at, prewarmed=prewarmed),
+                LatencyObserver(
+                    pipeline="webrtc",
+                    providers={
+                        "stt": "gemini",
+                        "llm": "gemini",
+                        "tts": "gemini",
+                        "transport": "small_webrtc",
+                    },
+                ),
+                InterruptionObserver(pipeline="webrtc"),
+                activity,
+            ],
         )
 
+        # Tear down stalled sessions the client never closed
+        async def teardown(reason: str) -> None:
+            await task.cancel()
+            await webrtc_connection.disconnect()
+
+        self.reaper.track(pc_id, activity, teardown)
+
         # Event handlers
         @transport.event_handler("on_client_connected")
         async def on_client_connected(
@@ -195,6 +382,45 @@ class WebRTCVoiceAgent:
         except Exception as e:
             logger.error(f"Voice agent pipeline error: {e}")
             raise
+        finally:
+            self.reaper.forget(pc_id)
+
+    def resource_report(self) -> Dict[str, Any]:
+        """
+        Resources of the sessions and bookkeeping that outlived them.
+
+        :return: per-session report, with the ids of finished tasks and of
+            connections without a task that are still referenced.
+        """
+        report = self.profiler.report()
+        report["stale_tasks"] = [
+            pc_id for pc_id, task in self._tasks.items() if task.done()
+        ]
+        report["orphan_connections"] = [
+            pc_id for pc_id in self.connections if pc_id not in self._tasks
+        ]
+        return report
+
+    async def drain(self, timeout: float) -> int:
+        """
+        Stop taking sessions and wait for the live ones to end.
+
+        Sessions still running at the deadline are closed.
+
+        :param timeout: seconds to wait for the sessions.
+        :return: number of sessions that had to be closed.
+        """
+        self.admission.drain()
+        await self.llm_pool.stop()
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        logger.info(f"Draining {len(tasks)} voice sessions for up to {timeout:.0f}s")
+        pending: Set[asyncio.Task[None]] = set()
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            logger.warning(f"Closing {len(pending)} voice sessions after the drain")
+        await self.cleanup()
+        return len(pending)
 
     async def cleanup(self) -> None:
         """Clean up all connections."""
@@ -213,6 +439,11 @@ class WebRTCVoiceAgent:
 
         self.connections.clear()
         self._tasks.clear()
+        await self.reaper.stop()
+        await self.admission.stop()
+        await self.llm_pool.stop()
+        await self.usage_writer.stop()
+        await self.transcript_writer.stop()
 
 
 class WebRTCVoiceAgentManager:
@@ -221,9 +452,29 @@ class WebRTCVoiceAgentManager:
     def __init__(self) -> None:
         """Initialize the manager."""
         self._agent: Optional[WebRTCVoiceAgent] = None
+        self.session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+        self.usage_aggregator: Optional[UsageAggregator] = None
+        self.quota: Optional[VoiceQuota] = None
+        self._drain: Optional[asyncio.Future[int]] = None
 
     def get_agent(self) -> WebRTCVoiceAgent:
         """Get or create the voice agent instance."""
+        if self._agent is None and settings.voice_fake_backend:
+            # Test fakes are only loaded when asked for.
+            from bananavoice.services.voice.fakes import (  # noqa: PLC0415
+                FakeGeminiLiveLLMService,
+            )
+
+            logger.warning("WebRTC Voice Agent uses the fake Gemini backend")
+            # Localhost load tests need no STUN or TURN servers.
+            self._agent = WebRTCVoiceAgent(
+                google_api_key="",
+                llm_factory=FakeGeminiLiveLLMService,
+                ice_servers=[],
+                session_factory=self.session_factory,
+                usage_aggregator=self.usage_aggregator,
+                quota=self.quota,
+            )
         if self._agent is None:
             google_api_key = os.getenv("BANANAVOICE_GOOGLE_API_KEY") or os.getenv(
                 "GOOGLE_API_KEY",
@@ -235,10 +486,37 @@ class WebRTCVoiceAgentManager:
                 google_api_key=google_api_key,
                 voice_id="Puck",  # Available: Aoede, Charon, Fenrir, Kore, Puck
                 system_instruction=SYSTEM_INSTRUCTION,
+                session_factory=self.session_factory,
+                usage_aggregator=self.usage_aggregator,
+                quota=self.quota,
             )
 
+        if self.draining:
+            # Created after the drain started, it must not take sessions.
+            self._agent.admission.drain()
         return self._agent
 
+    @property
+    def draining(self) -> bool:
+        """Whether a drain was started, the worker never leaves this state."""
+        return self._drain is not None
+
+    async def drain(self, timeout: float) -> int:
+        """
+        Drain the voice agent, or wait for the drain already in progress.
+
+        :param timeout: seconds to wait for live sessions.
+        :return: number of sessions that had to be closed.
+        """
+        if self._drain is None:
+            agent = self._agent
+            if agent is None:
+                self._drain = asyncio.get_running_loop().create_future()
+                self._drain.set_result(0)
+            else:
+                self._drain = asyncio.ensure_future(agent.drain(timeout))
+        return await asyncio.shield(self._drain)
+
     async def cleanup(self) -> None:
         """Clean up the voice agent."""
         if self._agent:
@@ -255,6 +533,85 @@ def get_webrtc_voice_agent() -> WebRTCVoiceAgent:
     return _manager.get_agent()
 
 
+def init_webrtc_voice_agent(
+    session_factory: Optional[async_sessionmaker[AsyncSession]] = None,
+    usage_aggregator: Optional[UsageAggregator] = None,
+    quota: Optional[VoiceQuota] = None,
+) -> None:
+    """
+    Create the WebRTC Voice Agent and start warming its LLM pool.
+
+    :param session_factory: database sessions the metered usage is written to.
+    :param usage_aggregator: rolling totals the metered usage is added to.
+    :param quota: voice minute quotas debited with the metered usage.
+    """
+    _manager.session_factory = session_factory
+    _manager.usage_aggregator = usage_aggregator
+    _manager.quota = quota
+    try:
+        agent = _manager.get_agent()
+    except ValueError:
+        logger.info("Google API key is not set, WebRTC Voice Agent disabled")
+        return
+    agent.llm_pool.start()
+
+
+def is_webrtc_voice_agent_draining() -> bool:
+    """Whether the worker is draining its voice sessions."""
+    return _manager.draining
+
+
+async def drain_webrtc_voice_agent(timeout: Optional[float] = None) -> int:
+    """
+    Drain the WebRTC Voice Agent.
+
+    :param timeout: seconds to wait for live sessions, from settings if None.
+    :return: number of sessions that had to be closed.
+    """
+    if timeout is None:
+        timeout = settings.voice_drain_timeout
+    return await _manager.drain(timeout)
+
+
+def install_drain_signal_handler() -> None:
+    """
+    Drain voice sessions on SIGTERM before the server shuts down.
+
+    The server's own handler runs once the drain is over. A second
+    SIGTERM skips the wait. Must be called from the main thread,
+    with the server's handler already installed.
+    """
+    loop = asyncio.get_running_loop()
+    server_handler = signal.getsignal(signal.SIGTERM)
+    if not callable(server_handler):
+        return
+    signals: List[int] = []
+    drain_tasks: List[asyncio.Task[None]] = []
+
+    async def drain_then_exit(signum: int, frame: Optional[FrameType]) -> None:
+        try:
+            await drain_webrtc_voice_agent()
+        finally:
+            server_handler(signum, frame)
+
+    def start_drain(signum: int, frame: Optional[FrameType]) -> None:
+        drain_tasks.append(loop.create_task(drain_then_exit(signum, frame)))
+
+    def handle_sigterm(signum: int, frame: Optional[FrameType]) -> None:
+        if signals:
+            server_handler(signum, frame)
+            return
+        signals.append(signum)
+        logger.info("Received SIGTERM, draining voice sessions")
+        # Signal handlers run between bytecodes, wake the loop up safely.
+        loop.call_soon_threadsafe(start_drain, signum, frame)
+
+    try:
+        signal.signal(signal.SIGTERM, handle_sigterm)
+    except ValueError:
+        logger.warning("Not in the main thread, voice sessions won't drain on SIGTERM")
+
+
 async def cleanup_webrtc_voice_agent() -> None:
     """Clean up the WebRTC Voice Agent."""
     await _manager.cleanup()
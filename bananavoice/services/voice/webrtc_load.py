@@ -0,0 +1,481 @@
+"""
+Load generator for the WebRTC voice agent.
+
+Opens many concurrent aiortc peers against ``/api/voice/webrtc/offer``,
+each one streaming prerecorded PCM, and reports answer latency, time to
+first received audio, response latency, packet loss and server CPU.
+Start the server with ``BANANAVOICE_VOICE_FAKE_BACKEND=true`` to run
+without network access. The offer endpoint requires a logged in user,
+pass a JWT from ``/api/auth/jwt/login`` (or ``BANANAVOICE_LOAD_TOKEN``) or
+the session cookie of ``/api/auth/cookie/login``::
+
+    python -m bananavoice.services.voice.webrtc_load --sessions 20 --token <jwt>
+"""
+
+import argparse
+import asyncio
+import fractions
+import os
+import sys
+import time
+import wave
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+import av
+import httpx
+import numpy as np
+from aiortc import MediaStreamTrack, RTCPeerConnection, RTCSessionDescription
+from aiortc.mediastreams import MediaStreamError
+from loguru import logger as pipecat_logger
+
+from bananavoice.services.voice.fakes import synthetic_audio
+
+PERCENTILES = (50, 90, 99)
+FRAME_SECONDS = 0.02
+# Peak amplitude of a received 16-bit frame that counts as audible,
+# Opus decodes silence to a few units of noise.
+AUDIBLE_PEAK = 200
+# Name of the cookie set by the cookie login.
+AUTH_COOKIE = "fastapiusersauth"
+
+# Sends an offer, returns the answer as posted by the offer endpoint.
+OfferSender = Callable[[str, str], Awaitable[Dict[str, str]]]
+
+
+@dataclass
+class LoadConfig:
+    """Parameters of a load run."""
+
+    url: str = "http://127.0.0.1:8000/api/voice/webrtc/offer"
+    sessions: int = 10
+    # Seconds between session starts.
+    ramp: float = 0.1
+    turns: int = 3
+    # Silence before the first utterance, leaves room for the greeting.
+    delay: float = 3.0
+    # Silence after each utterance, while the agent answers.
+    pause: float = 4.0
+    # 16-bit mono WAV spoken on every turn, a tone when not set.
+    audio: Optional[Path] = None
+    # Server processes whose CPU time is measured.
+    server_pids: List[int] = field(default_factory=list)
+    # Credentials of the user placing the calls, a JWT or a session cookie.
+    token: Optional[str] = None
+    cookie: Optional[str] = None
+
+
+@dataclass
+class PeerResult:
+    """Measurements of one peer."""
+
+    answer_latency: Optional[float] = None
+    first_audio: Optional[float] = None
+    responses: List[float] = field(default_factory=list)
+    packets_received: int = 0
+    packets_lost: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class LoadReport:
+    """Results of a load run."""
+
+    config: LoadConfig
+    wall_seconds: float
+    server_cpu_seconds: Optional[float]
+    peers: List[PeerResult]
+
+    @property
+    def failed(self) -> int:
+        """Peers that could not connect."""
+        return sum(1 for peer in self.peers if peer.error)
+
+    @property
+    def packet_loss(self) -> float:
+        """Share of the agent's RTP packets that never arrived."""
+        lost = sum(peer.packets_lost for peer in self.peers)
+        received = sum(peer.packets_received for peer in self.peers)
+        return lost / (lost + received) if lost + received else 0.0
+
+    @property
+    def server_cores(self) -> Optional[float]:
+        """Average number of busy server cores during the run."""
+        if self.server_cpu_seconds is None or not self.wall_seconds:
+            return None
+        return self.server_cpu_seconds / self.wall_seconds
+
+    def latencies(self) -> Dict[str, List[float]]:
+        """Latency samples by measurement, in seconds."""
+        return {
+            "answer": [
+                peer.answer_latency
+                for peer in self.peers
+                if peer.answer_latency is not None
+            ],
+            "first_audio": [
+                peer.first_audio for peer in self.peers if peer.first_audio is not None
+            ],
+            "response": [seconds for peer in self.peers for seconds in peer.responses],
+        }
+
+    def format(self) -> str:
+        """Human readable report."""
+        lines = [
+            (
+                f"sessions={self.config.sessions} failed={self.failed} "
+                f"wall={self.wall_seconds:.1f}s"
+            ),
+            f"packet_loss={self.packet_loss:.2%}",
+        ]
+        cores = self.server_cores
+        if cores is not None:
+            connected = len(self.peers) - self.failed
+            per_core = connected / cores if cores else 0.0
+            lines.append(
+                f"server_cpu={self.server_cpu_seconds:.1f}s cores_used={cores:.2f} "
+                f"sessions_per_core={per_core:.1f}",
+            )
+        lines.append("latency (s):   " + " ".join(f"p{p}" for p in PERCENTILES))
+        for name, values in self.latencies().items():
+            if not values:
+                lines.append(f"  {name:<11} no samples")
+                continue
+            columns = " ".join(
+                f"{value:.3f}" for value in np.percentile(values, PERCENTILES)
+            )
+            lines.append(f"  {name:<11} {columns} (n={len(values)})")
+        errors = sorted({peer.error for peer in self.peers if peer.error})
+        lines.extend(f"  error: {error}" for error in errors)
+        return "\n".join(lines)
+
+
+def load_pcm(path: Optional[Path]) -> tuple[bytes, int]:
+    """
+    Read the utterance spoken by every peer.
+
+    :param path: 16-bit mono WAV file, a synthetic tone when None.
+    :return: raw PCM audio and its sample rate.
+    :raises ValueError: if the file is not 16-bit mono.
+    """
+    if path is None:
+        return synthetic_audio(1.5, 16000), 16000
+    with wave.open(str(path), "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            raise ValueError(f"{path} is not 16-bit mono PCM")
+        return wav.readframes(wav.getnframes()), wav.getframerate()
+
+
+def server_cpu_seconds(pids: Sequence[int]) -> Optional[float]:
+    """
+    CPU time used so far by the server processes.
+
+    :param pids: server process ids.
+    :return: user and system seconds, None if unknown.
+    """
+    if not pids:
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    total = 0.0
+    for pid in pids:
+        try:
+            stat = Path(f"/proc/{pid}/stat").read_text()
+        except OSError:
+            return None
+        # Fields after the parenthesized command name, utime and stime
+        # are the 14th and 15th fields of the whole line.
+        fields = stat.rsplit(")", 1)[1].split()
+        total += (int(fields[11]) + int(fields[12])) / ticks
+    return total
+
+
+class ScriptedAudioTrack(MediaStreamTrack):
+    """
+    Outgoing audio of a peer: silence, then the utterance on every turn.
+
+    Frames are paced in real time like a microphone would deliver them.
+
+    :param pcm: 16-bit mono utterance.
+    :param sample_rate: sample rate of the utterance.
+    :param turns: number of utterances.
+    :param delay: silence before the first utterance.
+    :param pause: silence after each utterance.
+    """
+
+    kind = "audio"
+
+    def __init__(
+        self,
+        pcm: bytes,
+        sample_rate: int,
+        turns: int,
+        delay: float,
+        pause: float,
+    ) -> None:
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.samples_per_frame = int(sample_rate * FRAME_SECONDS)
+        frame_bytes = self.samples_per_frame * 2
+        pcm += bytes(-len(pcm) % frame_bytes)
+        delay_frames = round(delay / FRAME_SECONDS)
+        pause_frames = round(pause / FRAME_SECONDS)
+        utterance_frames = len(pcm) // frame_bytes
+        self._pcm = pcm
+        self._frame_bytes = frame_bytes
+        self._silence = bytes(frame_bytes)
+        # Frame index of the last frame of each utterance.
+        self._turn_ends = [
+            delay_frames + turn * (utterance_frames + pause_frames) + utterance_frames
+            for turn in range(turns)
+        ]
+        self._utterance_frames = utterance_frames
+        self._pause_frames = pause_frames
+        self._delay_frames = delay_frames
+        self._index = 0
+        self._start: Optional[float] = None
+        self.duration = (self._turn_ends[-1] + pause_frames) * FRAME_SECONDS
+        self.utterance_ends: List[float] = []
+        self.finished = asyncio.Event()
+
+    async def recv(self) -> av.AudioFrame:
+        """Next 20 ms of audio."""
+        if self._start is None:
+            self._start = time.monotonic()
+        wait = self._start + self._index * FRAME_SECONDS - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        chunk = self._chunk(self._index)
+        if self._index in self._turn_ends:
+            self.utterance_ends.append(time.monotonic())
+        if self._index >= self._turn_ends[-1] + self._pause_frames:
+            self.finished.set()
+
+        frame = av.AudioFrame(
+            format="s16",
+            layout="mono",
+            samples=self.samples_per_frame,
+        )
+        frame.planes[0].update(chunk)
+        frame.pts = self._index * self.samples_per_frame
+        frame.sample_rate = self.sample_rate
+        frame.time_base = fractions.Fraction(1, self.sample_rate)
+        self._index += 1
+        return frame
+
+    def _chunk(self, index: int) -> bytes:
+        offset = index - self._delay_frames
+        if offset < 0:
+            return self._silence
+        offset %= self._utterance_frames + self._pause_frames
+        if offset >= self._utterance_frames or index > self._turn_ends[-1]:
+            return self._silence
+        start = offset * self._frame_bytes
+        return self._pcm[start : start + self._frame_bytes]
+
+
+async def listen(track: MediaStreamTrack, onsets: List[float]) -> None:
+    """
+    Record when the agent starts speaking.
+
+    :param track: incoming audio track.
+    :param onsets: receives the times where audio follows silence.
+    """
+    audible = False
+    while True:
+        try:
+            frame = await track.recv()
+        except MediaStreamError:
+            return
+        if not isinstance(frame, av.AudioFrame):
+            continue
+        peak = int(np.abs(frame.to_ndarray()).max(initial=0))
+        if peak >= AUDIBLE_PEAK and not audible:
+            onsets.append(time.monotonic())
+        audible = peak >= AUDIBLE_PEAK
+
+
+def http_offer_sender(
+    client: httpx.AsyncClient,
+    url: str,
+    token: Optional[str] = None,
+    cookie: Optional[str] = None,
+) -> OfferSender:
+    """
+    Send offers to the offer endpoint.
+
+    :param client: HTTP client.
+    :param url: URL of the offer endpoint.
+    :param token: JWT sent as a bearer token.
+    :param cookie: session cookie of the cookie login.
+    :return: offer sender.
+    """
+    headers: Dict[str, str] = {}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if cookie:
+        headers["Cookie"] = f"{AUTH_COOKIE}={cookie}"
+
+    async def send(sdp: str, sdp_type: str) -> Dict[str, str]:
+        response = await client.post(
+            url,
+            json={"sdp": sdp, "type": sdp_type},
+            headers=headers,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    return send
+
+
+async def run_peer(
+    config: LoadConfig,
+    pcm: bytes,
+    sample_rate: int,
+    send_offer: OfferSender,
+) -> PeerResult:
+    """
+    Connect one peer, run its turns and measure them.
+
+    :param config: load parameters.
+    :param pcm: utterance spoken on every turn.
+    :param sample_rate: sample rate of the utterance.
+    :param send_offer: sends the offer to the agent.
+    :return: measurements of the peer.
+    """
+    result = PeerResult()
+    onsets: List[float] = []
+    listeners: List[asyncio.Task[None]] = []
+    track = ScriptedAudioTrack(
+        pcm,
+        sample_rate,
+        turns=config.turns,
+        delay=config.delay,
+        pause=config.pause,
+    )
+    pc = RTCPeerConnection()
+    pc.addTrack(track)
+
+    @pc.on("track")
+    def on_track(remote: MediaStreamTrack) -> None:
+        if remote.kind == "audio":
+            listeners.append(asyncio.create_task(listen(remote, onsets)))
+
+    try:
+        await pc.setLocalDescription(await pc.createOffer())
+        started_at = time.monotonic()
+        answer = await send_offer(pc.localDescription.sdp, pc.localDescription.type)
+        result.answer_latency = time.monotonic() - started_at
+        await pc.setRemoteDescription(
+            RTCSessionDescription(sdp=answer["sdp"], type=answer["type"]),
+        )
+        # The track stops being read if the connection breaks.
+        await asyncio.wait_for(track.finished.wait(), track.duration + 30)
+
+        if onsets:
+            result.first_audio = onsets[0] - started_at
+        for ended_at in track.utterance_ends:
+            later = [onset for onset in onsets if onset > ended_at]
+            if later:
+                result.responses.append(later[0] - ended_at)
+        for stats in (await pc.getStats()).values():
+            if stats.type == "inbound-rtp" and stats.kind == "audio":
+                result.packets_received += stats.packetsReceived
+                result.packets_lost += max(stats.packetsLost, 0)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        await pc.close()
+        for listener in listeners:
+            listener.cancel()
+    return result
+
+
+async def run_load(
+    config: LoadConfig,
+    send_offer: Optional[OfferSender] = None,
+) -> LoadReport:
+    """
+    Run concurrent peers against the agent.
+
+    :param config: load parameters.
+    :param send_offer: sends offers, posts them to the configured URL if None.
+    :return: load report.
+    """
+    pcm, sample_rate = load_pcm(config.audio)
+    async with httpx.AsyncClient(timeout=30) as client:
+        sender = send_offer or http_offer_sender(
+            client,
+            config.url,
+            token=config.token,
+            cookie=config.cookie,
+        )
+
+        async def start(index: int) -> PeerResult:
+            await asyncio.sleep(index * config.ramp)
+            return await run_peer(config, pcm, sample_rate, sender)
+
+        started_wall = time.monotonic()
+        started_cpu = server_cpu_seconds(config.server_pids)
+        peers = await asyncio.gather(*(start(i) for i in range(config.sessions)))
+        ended_cpu = server_cpu_seconds(config.server_pids)
+
+    cpu = None
+    if started_cpu is not None and ended_cpu is not None:
+        cpu = ended_cpu - started_cpu
+    return LoadReport(
+        config=config,
+        wall_seconds=time.monotonic() - started_wall,
+        server_cpu_seconds=cpu,
+        peers=list(peers),
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Entrypoint of the load command."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default=LoadConfig.url)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--ramp", type=float, default=0.1)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--delay", type=float, default=3.0)
+    parser.add_argument("--pause", type=float, default=4.0)
+    parser.add_argument("--audio", type=Path, help="16-bit mono WAV utterance")
+    parser.add_argument(
+        "--server-pid",
+        type=int,
+        action="append",
+        default=[],
+        help="server process to measure, may be repeated",
+    )
+    parser.add_argument(
+        "--token",
+        default=os.environ.get("BANANAVOICE_LOAD_TOKEN"),
+        help="JWT of the calling user, defaults to $BANANAVOICE_LOAD_TOKEN",
+    )
+    parser.add_argument("--cookie", help="session cookie of the calling user")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    pipecat_logger.remove()
+    pipecat_logger.add(sys.stderr, level=args.log_level)
+
+    config = LoadConfig(
+        url=args.url,
+        sessions=args.sessions,
+        ramp=args.ramp,
+        turns=args.turns,
+        delay=args.delay,
+        pause=args.pause,
+        audio=args.audio,
+        server_pids=args.server_pid,
+        token=args.token,
+        cookie=args.cookie,
+    )
+    report = asyncio.run(run_load(config))
+    print(report.format())  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
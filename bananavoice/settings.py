@@ -2,8 +2,9 @@ import enum
 import os
 from pathlib import Path
 from tempfile import gettempdir
-from typing import Optional
+from typing import Dict, List, Optional
 
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from yarl import URL
 
@@ -21,6 +22,18 @@ class LogLevel(str, enum.Enum):
     FATAL = "FATAL"
 
 
+class VoiceProvider(BaseModel):
+    """OpenAI compatible endpoint of a voice service provider."""
+
+    name: str
+    model: str
+    base_url: Optional[str] = None
+    # Defaults to the OpenAI API key.
+    api_key: Optional[str] = None
+    # Voice used by text-to-speech providers.
+    voice: Optional[str] = None
+
+
 class Settings(BaseSettings):
     """
     Application settings.
@@ -48,6 +61,15 @@ class Settings(BaseSettings):
     db_pass: str = "bananavoice"
     db_base: str = "admin"
     db_echo: bool = False
+    # Connection pool of the engine. Connections are recycled after the
+    # given seconds and pinged when checked out if pre-ping is on. The
+    # warm-up connections are opened at startup.
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_pool_warmup: int = 5
 
     # Variables for Redis
     redis_host: str = "bananavoice-redis"
@@ -80,6 +102,138 @@ class Settings(BaseSettings):
     cartesia_api_key: Optional[str] = None
     google_api_key: Optional[str] = None
 
+    # Admission control for WebRTC voice sessions (per worker).
+    voice_max_sessions: int = 20
+    # Offers waiting for a free slot and how long they may wait (seconds).
+    voice_admission_queue_size: int = 10
+    voice_admission_queue_timeout: float = 5.0
+    # Shed new sessions when the worker is overloaded.
+    voice_max_cpu_percent: float = 85.0
+    voice_max_loop_lag: float = 0.1
+    # Value of the Retry-After header for rejected offers (seconds).
+    voice_retry_after: int = 5
+    # Seconds a draining worker waits for live sessions to end
+    # before closing them, keep it below the server's graceful timeout.
+    voice_drain_timeout: float = 25.0
+    # Where new offers are redirected while the worker drains.
+    voice_drain_redirect_url: Optional[str] = None
+    # Sessions without inbound audio for this long (seconds) and
+    # sessions older than the maximum duration are torn down.
+    voice_session_idle_timeout: float = 60.0
+    voice_session_max_duration: float = 3600.0
+    voice_reaper_interval: float = 5.0
+    # Attribute event loop CPU time and asyncio tasks to sessions.
+    voice_session_profiling: bool = True
+    # Traced memory left after sessions end that raises an alert (bytes).
+    voice_memory_alert_bytes: int = 5 * 2**20
+
+    # Pre-warmed LLM sessions for WebRTC voice agents.
+    # Set max size to 0 to disable the pool.
+    voice_llm_pool_min_size: int = 1
+    voice_llm_pool_max_size: int = 4
+    # Seconds a warm session may wait before it is recycled.
+    voice_llm_pool_max_age: float = 60.0
+
+    # Token budget of the LLM conversation context.
+    # Older turns are summarized once the budget is exceeded.
+    voice_context_max_tokens: int = 2000
+    # Most recent messages that are never summarized.
+    voice_context_keep_messages: int = 6
+    voice_summary_model: str = "gpt-4.1-mini-2025-04-14"
+    # Gemini Live counts audio tokens too, so it needs a larger budget.
+    voice_gemini_context_max_tokens: int = 16000
+
+    # Redis cache of LLM answers to short, common user utterances.
+    voice_llm_cache_enabled: bool = False
+    voice_llm_cache_ttl: int = 86400
+    # Regular expressions an utterance must match to be cached.
+    # Nothing is cached while the list is empty.
+    voice_llm_cache_allow: List[str] = []
+    voice_llm_cache_max_words: int = 12
+
+    # On-disk cache of synthesized audio for short recurring phrases.
+    voice_phrase_cache_dir: Path = TEMP_DIR / "bananavoice-phrases"
+    # Uses after which a phrase other than the greeting is cached.
+    voice_phrase_cache_min_hits: int = 3
+    voice_phrase_cache_max_chars: int = 200
+    voice_phrase_cache_max_files: int = 1000
+
+    # Chunking of LLM text sent to speech synthesis.
+    # A short first chunk lowers the time to first audio,
+    # longer later chunks keep a natural prosody.
+    voice_tts_first_chunk_chars: int = 20
+    voice_tts_chunk_chars: int = 80
+    voice_tts_max_chunk_chars: int = 250
+
+    # End-of-turn detection. With adaptive detection the VAD stop time
+    # is tuned per session, within bounds, from the speaker's pauses.
+    voice_turn_adaptive: bool = True
+    voice_turn_stop_secs: float = 0.8
+    voice_turn_min_stop_secs: float = 0.3
+    voice_turn_max_stop_secs: float = 1.6
+
+    # Providers of each voice stage in order of preference,
+    # given as JSON lists in the environment.
+    voice_stt_providers: List[VoiceProvider] = Field(
+        default=[VoiceProvider(name="openai", model="gpt-4o-mini-transcribe")],
+        min_length=1,
+    )
+    voice_llm_providers: List[VoiceProvider] = Field(
+        default=[VoiceProvider(name="openai", model="gpt-4.1-mini-2025-04-14")],
+        min_length=1,
+    )
+    voice_tts_providers: List[VoiceProvider] = Field(
+        default=[VoiceProvider(name="openai", model="gpt-4o-mini-tts", voice="nova")],
+        min_length=1,
+    )
+    # Ask the next provider too when the first one is slower than this
+    # (seconds). Hedging is disabled when not set.
+    voice_provider_hedge_after: Optional[float] = None
+    # Consecutive failures that take a provider out of rotation
+    # and seconds before it is tried again.
+    voice_provider_max_failures: int = 3
+    voice_provider_reset_timeout: float = 30.0
+
+    # Serve WebRTC sessions with an offline fake of Gemini Live,
+    # to load test the transport without a Google account.
+    voice_fake_backend: bool = False
+
+    # Usage metering. Metered LLM tokens, TTS characters and STT seconds
+    # are written to the database every interval (seconds) and at the
+    # end of every session. Rows that can't be written are kept for the
+    # next flush, up to the limit.
+    voice_usage_metering: bool = True
+    voice_usage_flush_interval: float = 30.0
+    voice_usage_max_pending_rows: int = 10000
+    # Rolling windows (seconds) of usage and spend kept in Redis and
+    # exported as Prometheus gauges every export interval (seconds).
+    voice_usage_windows: List[int] = [300, 3600, 86400]
+    voice_usage_export_interval: float = 15.0
+
+    # Voice minutes of every user, a full allowance refills over the
+    # period (seconds). Starting a session needs the minimum minutes.
+    # Workers trust their cached balance for the cache TTL (seconds).
+    voice_quota_enabled: bool = True
+    voice_quota_minutes: float = 120.0
+    voice_quota_period: float = 86400.0
+    voice_quota_min_minutes: float = 1.0
+    voice_quota_cache_ttl: float = 10.0
+
+    # Conversation transcripts, written behind the pipelines in multi-row
+    # inserts once the batch size is queued, every interval (seconds) and
+    # when a session ends. Beyond the pending limit the oldest turns are
+    # dropped.
+    voice_transcripts_enabled: bool = True
+    voice_transcripts_batch_size: int = 200
+    voice_transcripts_flush_interval: float = 5.0
+    voice_transcripts_max_pending: int = 5000
+
+    # Concurrent sessions a core sustains, per pipeline, as measured with
+    # ``python -m bananavoice.services.voice.benchmark``. Planning prefers
+    # the CPU time measured on live WebRTC sessions. Cores cost USD per hour.
+    voice_sessions_per_core: Dict[str, float] = {"daily": 45.0, "webrtc": 45.0}
+    voice_core_hour_cost: float = 0.04
+
     @property
     def db_url(self) -> URL:
         """
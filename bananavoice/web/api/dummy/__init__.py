@@ -0,0 +1,5 @@
+"""Dummy model API."""
+
+from bananavoice.web.api.dummy.views import router
+
+__all__ = ["router"]
@@ -0,0 +1,36 @@
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from bananavoice.db.dao.dummy_dao import DummyDAO
+
+router = APIRouter()
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_dummy_models(
+    name: Optional[str] = None,
+    dao: DummyDAO = Depends(),
+) -> StreamingResponse:
+    """
+    Export dummy models as JSON lines.
+
+    Rows are streamed from a server-side cursor, so exporting the whole
+    table takes constant memory.
+
+    :param name: name of dummy instances, all of them by default.
+    :param dao: DAO for dummy models.
+    :return: one JSON object per line, ordered by id.
+    """
+
+    async def lines() -> AsyncIterator[str]:
+        try:
+            async for dummy in dao.stream_dummies(name):
+                yield json.dumps({"id": dummy.id, "name": dummy.name}) + "\n"
+        finally:
+            # The body outlives the request dependencies.
+            await dao.session.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
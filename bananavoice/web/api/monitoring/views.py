@@ -1,4 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+
+from bananavoice.services.voice.webrtc_bot import is_webrtc_voice_agent_draining
 
 router = APIRouter()
 
@@ -10,3 +12,14 @@ def health_check() -> None:
 
     It returns 200 if the project is healthy.
     """
+
+
+@router.get("/ready")
+def readiness_check() -> None:
+    """
+    Checks whether the project takes new work.
+
+    It returns 503 while the worker drains its voice sessions.
+    """
+    if is_webrtc_voice_agent_draining():
+        raise HTTPException(status_code=503, detail="Draining")
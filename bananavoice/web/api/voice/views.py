@@ -1,22 +1,84 @@
 """Voice API endpoints for TTS and STT functionality."""
 
+import asyncio
+import logging
 import os
 import subprocess
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Literal, Optional
 
 import httpx
-from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    UploadFile,
+)
 from fastapi.responses import FileResponse, Response
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
 
+from bananavoice.db.models.users import User, current_active_user, current_superuser
+from bananavoice.services.redis.dependency import get_redis_pool
 from bananavoice.services.voice import VoiceService, get_voice_service
-from bananavoice.services.voice.webrtc_bot import get_webrtc_voice_agent
+from bananavoice.services.voice.admission import AdmissionRejectedError
+from bananavoice.services.voice.cost_monitor import CostBreakdown
+from bananavoice.services.voice.dependencies import get_voice_quota
+from bananavoice.services.voice.planning import (
+    MAX_CELLS,
+    ProviderPlan,
+    measured_sessions_per_core,
+    plan,
+    scenario_count,
+    scenario_range,
+)
+from bananavoice.services.voice.quota import QuotaExceededError, VoiceQuota
+from bananavoice.services.voice.usage_aggregator import UsageAggregator
+from bananavoice.services.voice.webrtc_bot import (
+    drain_webrtc_voice_agent,
+    get_webrtc_voice_agent,
+)
+from bananavoice.settings import settings
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+async def check_voice_quota(
+    user: User = Depends(current_active_user),
+    quota: Optional[VoiceQuota] = Depends(get_voice_quota),
+) -> User:
+    """
+    Admit a new voice session of the current user.
+
+    Sessions are admitted when Redis is unavailable, an outage of the
+    quota store shouldn't take voice down.
+
+    :param user: current user.
+    :param quota: voice minute quotas, None when disabled.
+    :raises HTTPException: if the user has no voice minutes left.
+    :return: current user.
+    """
+    if quota is not None:
+        try:
+            await quota.check(user.id)
+        except QuotaExceededError as e:
+            raise HTTPException(
+                status_code=429,
+                detail="Voice minute quota exceeded",
+                headers={"Retry-After": str(e.retry_after)},
+            ) from e
+        except RedisError as e:
+            logger.warning(f"Voice quota of user {user.id} not checked: {e}")
+    return user
+
+
 class TTSRequest(BaseModel):
     """Request model for text-to-speech."""
 
@@ -63,6 +125,73 @@ class WebRTCOfferResponse(BaseModel):
     pc_id: str
 
 
+class TracemallocRequest(BaseModel):
+    """Request model for turning memory tracing on or off."""
+
+    enabled: bool
+    frames: int = 10
+
+
+class DrainResponse(BaseModel):
+    """Response model for draining the voice sessions of a worker."""
+
+    draining: bool
+    active_sessions: int
+    timeout: float
+
+
+class PlanningRange(BaseModel):
+    """Range of a planning dimension, both ends included."""
+
+    start: float = Field(ge=0, allow_inf_nan=False)
+    stop: float = Field(ge=0, allow_inf_nan=False)
+    step: float = Field(1.0, gt=0, allow_inf_nan=False)
+
+    @property
+    def count(self) -> int:
+        """Number of values in the range."""
+        return scenario_count(self.start, self.stop, self.step)
+
+
+class PlanningProvider(BaseModel):
+    """Voice stack of the planning catalog, prices in USD per minute."""
+
+    name: str
+    pipeline: Literal["daily", "webrtc"] = "daily"
+    transport: float = Field(default=CostBreakdown.daily_audio, ge=0)
+    stt: float = Field(default=CostBreakdown.stt_cost, ge=0)
+    llm: float = Field(default=CostBreakdown.llm_cost, ge=0)
+    tts: float = Field(default=CostBreakdown.tts_cost, ge=0)
+    sessions_per_core: Optional[float] = Field(default=None, gt=0)
+
+
+class PlanningRequest(BaseModel):
+    """Request model for a cost and capacity planning grid."""
+
+    minutes: PlanningRange
+    participants: PlanningRange
+    catalog: List[PlanningProvider] = Field(
+        default_factory=lambda: [PlanningProvider(name="daily")],
+        min_length=1,
+    )
+    busy_hours: float = Field(8.0, gt=0, le=24)
+    peak_factor: float = Field(2.0, ge=1)
+    core_hour_cost: Optional[float] = Field(None, ge=0)
+
+    @model_validator(mode="after")
+    def check_cells(self) -> "PlanningRequest":
+        """
+        Refuse grids too big to answer before any array is built.
+
+        :raises ValueError: if the grid has more than MAX_CELLS cells.
+        :return: the request.
+        """
+        cells = self.minutes.count * self.participants.count * len(self.catalog)
+        if cells > MAX_CELLS:
+            raise ValueError(f"Planning grid of {cells} cells exceeds {MAX_CELLS}")
+        return self
+
+
 @router.post("/tts", response_class=Response)
 async def text_to_speech(
     request: TTSRequest,
@@ -159,11 +288,15 @@ async def realtime_voice_demo() -> FileResponse:
 
 
 @router.post("/room/create", response_model=VoiceRoomResponse)
-async def create_voice_room(request: VoiceRoomRequest) -> VoiceRoomResponse:
+async def create_voice_room(
+    request: VoiceRoomRequest,
+    user: User = Depends(check_voice_quota),
+) -> VoiceRoomResponse:
     """
     Create a Daily room for voice communication and launch the bot.
 
     :param request: Voice room creation request.
+    :param user: Current user, with voice minutes left.
     :return: Room details and bot information.
     """
     try:
@@ -232,6 +365,8 @@ async def create_voice_room(request: VoiceRoomRequest) -> VoiceRoomResponse:
                 sys.executable,
                 str(bot_script),
                 room_url,
+                "",
+                str(user.id),
             ],
             env=env,
         )
@@ -275,12 +410,18 @@ async def list_rooms(daily_api_key: str) -> dict:
 async def webrtc_offer(
     request: WebRTCOfferRequest,
     background_tasks: BackgroundTasks,
+    user: User = Depends(current_active_user),
+    quota: Optional[VoiceQuota] = Depends(get_voice_quota),
 ) -> WebRTCOfferResponse:
     """
     Handle WebRTC offer for voice agent connection.
 
+    New sessions need voice minutes left, renegotiation doesn't.
+
     :param request: WebRTC offer request.
     :param background_tasks: Background tasks for async processing.
+    :param user: Current user.
+    :param quota: Voice minute quotas, None when disabled.
     :return: WebRTC answer response.
     """
     try:
@@ -297,9 +438,29 @@ async def webrtc_offer(
                 return WebRTCOfferResponse(**answer)
 
         # Create new connection
-        answer = await agent.create_connection(request.sdp, request.type)
+        await check_voice_quota(user, quota)
+        answer = await agent.create_connection(
+            request.sdp,
+            request.type,
+            user_id=user.id,
+        )
         return WebRTCOfferResponse(**answer)
 
+    except HTTPException:
+        raise
+    except AdmissionRejectedError as e:
+        if e.reason == "draining" and settings.voice_drain_redirect_url:
+            # Let the client offer again to a worker that isn't going away.
+            raise HTTPException(
+                status_code=307,
+                detail="Voice agent is draining",
+                headers={"Location": settings.voice_drain_redirect_url},
+            ) from e
+        raise HTTPException(
+            status_code=503,
+            detail=f"Voice agent is busy: {e.reason}",
+            headers={"Retry-After": str(e.retry_after)},
+        ) from e
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -307,6 +468,150 @@ async def webrtc_offer(
         ) from e
 
 
+@router.post(
+    "/admin/drain",
+    response_model=DrainResponse,
+    status_code=202,
+    dependencies=[Depends(current_superuser)],
+)
+async def drain_voice_sessions(background_tasks: BackgroundTasks) -> DrainResponse:
+    """
+    Stop taking WebRTC sessions on this worker and drain the live ones.
+
+    New offers are rejected and the readiness check fails from now on.
+    Sessions still running after the drain timeout are closed.
+
+    :param background_tasks: Background tasks for async processing.
+    :return: Drain state of the worker.
+    """
+    try:
+        active = get_webrtc_voice_agent().admission.active
+    except ValueError:
+        active = 0
+    background_tasks.add_task(drain_webrtc_voice_agent)
+    return DrainResponse(
+        draining=True,
+        active_sessions=active,
+        timeout=settings.voice_drain_timeout,
+    )
+
+
+@router.get("/admin/sessions", dependencies=[Depends(current_superuser)])
+async def voice_session_resources() -> Dict[str, Any]:
+    """
+    Report CPU time, tasks and memory attributed to WebRTC sessions.
+
+    :return: Live and recently ended sessions of this worker.
+    """
+    try:
+        return get_webrtc_voice_agent().resource_report()
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+
+
+@router.post("/admin/tracemalloc", dependencies=[Depends(current_superuser)])
+async def voice_tracemalloc(request: TracemallocRequest) -> dict[str, bool]:
+    """
+    Turn tracing of memory allocations on or off.
+
+    While tracing, sessions report the change of the process-wide
+    traced memory over their lifetime and an alert is raised when the
+    idle worker keeps growing.
+
+    :param request: Tracing state to set.
+    :return: Whether tracing is on.
+    """
+    try:
+        profiler = get_webrtc_voice_agent().profiler
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    return {"tracing": profiler.set_tracemalloc(request.enabled, request.frames)}
+
+
+@router.post("/admin/planning", dependencies=[Depends(current_superuser)])
+async def voice_planning(request: PlanningRequest) -> Dict[str, Any]:
+    """
+    Compute monthly costs and cores of every scenario in a grid.
+
+    Sessions per core come from the catalog, the CPU time of recent
+    WebRTC sessions on this worker or the benchmarked settings.
+
+    :param request: Ranges of daily minutes and participants and the
+        voice stacks to compare.
+    :return: Costs and capacity indexed by minutes, participants and stack.
+    """
+    # Reading the profiler must not create the agent in a worker thread,
+    # only the grid itself is computed off the event loop.
+    measured = {"daily": 1.0, "webrtc": 1.0, **settings.voice_sessions_per_core}
+    try:
+        live = measured_sessions_per_core(get_webrtc_voice_agent().profiler.ended)
+    except ValueError:
+        live = None
+    if live is not None:
+        measured["webrtc"] = live
+
+    catalog = [
+        ProviderPlan(
+            name=provider.name,
+            costs=CostBreakdown(
+                daily_audio=provider.transport,
+                stt_cost=provider.stt,
+                llm_cost=provider.llm,
+                tts_cost=provider.tts,
+            ),
+            sessions_per_core=(
+                provider.sessions_per_core or measured[provider.pipeline]
+            ),
+        )
+        for provider in request.catalog
+    ]
+    core_hour_cost = request.core_hour_cost
+    if core_hour_cost is None:
+        core_hour_cost = settings.voice_core_hour_cost
+
+    def report_grid() -> Dict[str, Any]:
+        return plan(
+            scenario_range(**request.minutes.model_dump()),
+            scenario_range(**request.participants.model_dump()),
+            catalog,
+            busy_hours=request.busy_hours,
+            peak_factor=request.peak_factor,
+            core_hour_cost=core_hour_cost,
+        ).to_dict()
+
+    try:
+        report = await asyncio.to_thread(report_grid)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    report["sessions_per_core"] = [entry.sessions_per_core for entry in catalog]
+    return report
+
+
+@router.get("/admin/usage", dependencies=[Depends(current_superuser)])
+async def voice_usage(
+    window: Optional[int] = Query(None, gt=0, le=86400),
+    top_users: int = Query(20, ge=0, le=1000),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+) -> Dict[str, Any]:
+    """
+    Report voice usage and spend in rolling windows, from Redis.
+
+    :param window: Window length in seconds, the configured ones by default.
+    :param top_users: Number of biggest spenders listed per window.
+    :param redis_pool: Redis connection pool.
+    :return: Usage and spend per provider and per user of every window.
+    """
+    async with Redis(connection_pool=redis_pool) as redis:
+        aggregator = UsageAggregator(redis)
+        windows = [window] if window else settings.voice_usage_windows
+        return {
+            "windows": [
+                (await aggregator.totals(length)).to_dict(top_users)
+                for length in windows
+            ],
+        }
+
+
 @router.get("/webrtc/demo")
 async def webrtc_demo() -> FileResponse:
     """
@@ -1,3 +1,5 @@
+from typing import List
+
 import strawberry
 from strawberry.types import Info
 
@@ -25,3 +27,20 @@ class Mutation:
         dao = DummyDAO(info.context.db_connection)
         await dao.create_dummy_model(name=name)
         return name
+
+    @strawberry.mutation(description="Create dummy objects in a database in batches")
+    async def create_dummy_models(
+        self,
+        info: Info[Context, None],
+        names: List[str],
+    ) -> List[str]:
+        """
+        Creates dummy models with multi-row inserts.
+
+        :param info: connection info.
+        :param names: names of the dummies.
+        :return: names of the dummy models.
+        """
+        dao = DummyDAO(info.context.db_connection)
+        await dao.bulk_create(names)
+        return names
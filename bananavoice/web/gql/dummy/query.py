@@ -1,11 +1,49 @@
-from typing import List
+import base64
+from typing import List, Optional
 
 import strawberry
 from strawberry.types import Info
 
 from bananavoice.db.dao.dummy_dao import DummyDAO
 from bananavoice.web.gql.context import Context
-from bananavoice.web.gql.dummy.schema import DummyModelDTO
+from bananavoice.web.gql.dummy.schema import (
+    DummyModelConnection,
+    DummyModelDTO,
+    DummyModelEdge,
+    PageInfo,
+)
+
+MAX_PAGE_SIZE = 100
+CURSOR_PREFIX = "dummy:"
+
+
+def encode_cursor(dummy_id: int) -> str:
+    """
+    Opaque cursor of a dummy model.
+
+    :param dummy_id: id of the dummy.
+    :return: the cursor.
+    """
+    return base64.urlsafe_b64encode(f"{CURSOR_PREFIX}{dummy_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Id of the dummy model a cursor points to.
+
+    :param cursor: cursor of a dummy.
+    :raises ValueError: if the cursor is malformed.
+    :return: id of the dummy.
+    """
+    try:
+        decoded = base64.urlsafe_b64decode(cursor.encode()).decode()
+        prefix, _, dummy_id = decoded.partition(":")
+        if f"{prefix}:" != CURSOR_PREFIX:
+            raise ValueError(prefix)
+        return int(dummy_id)
+    except ValueError as e:
+        # Base64 and unicode errors are value errors too.
+        raise ValueError("Invalid cursor") from e
 
 
 @strawberry.type
@@ -29,3 +67,42 @@ class Query:
         """
         dao = DummyDAO(info.context.db_connection)
         return await dao.get_all_dummies(limit=limit, offset=offset)  # type: ignore
+
+    @strawberry.field(description="Page through dummies by cursor")
+    async def dummy_models(
+        self,
+        info: Info[Context, None],
+        first: int = 15,
+        after: Optional[str] = None,
+    ) -> DummyModelConnection:
+        """
+        Retrieves a page of dummy objects after a cursor.
+
+        :param info: connection info.
+        :param first: number of dummy objects, at most 100.
+        :param after: cursor of the last dummy of the previous page.
+        :raises ValueError: if the page size or the cursor is invalid.
+        :return: page of dummy objects with the cursor of the next one.
+        """
+        if not 0 < first <= MAX_PAGE_SIZE:
+            raise ValueError(f"first must be between 1 and {MAX_PAGE_SIZE}")
+        dao = DummyDAO(info.context.db_connection)
+        # One more row tells whether there is a next page.
+        dummies = await dao.get_dummies_after(
+            limit=first + 1,
+            after=decode_cursor(after) if after else None,
+        )
+        edges = [
+            DummyModelEdge(
+                cursor=encode_cursor(dummy.id),
+                node=dummy,  # type: ignore
+            )
+            for dummy in dummies[:first]
+        ]
+        return DummyModelConnection(
+            edges=edges,
+            page_info=PageInfo(
+                has_next_page=len(dummies) > first,
+                end_cursor=edges[-1].cursor if edges else None,
+            ),
+        )
@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 import strawberry
 
 
@@ -11,3 +13,27 @@ class DummyModelDTO:
 
     id: int
     name: str
+
+
+@strawberry.type
+class PageInfo:
+    """Position of a page in a Relay connection."""
+
+    has_next_page: bool
+    end_cursor: Optional[str] = None
+
+
+@strawberry.type
+class DummyModelEdge:
+    """Dummy model with the cursor of its position."""
+
+    cursor: str
+    node: DummyModelDTO
+
+
+@strawberry.type
+class DummyModelConnection:
+    """Page of dummy models, as a Relay connection."""
+
+    edges: List[DummyModelEdge]
+    page_info: PageInfo
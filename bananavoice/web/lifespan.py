@@ -19,11 +19,19 @@ from opentelemetry.trace import set_tracer_provider
 from prometheus_fastapi_instrumentator.instrumentation import (
     PrometheusFastApiInstrumentator,
 )
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
+from bananavoice.db.pool import instrument_pool, pool_options, warm_up_pool
 from bananavoice.services.rabbit.lifespan import init_rabbit, shutdown_rabbit
 from bananavoice.services.redis.lifespan import init_redis, shutdown_redis
-from bananavoice.services.voice.webrtc_bot import cleanup_webrtc_voice_agent
+from bananavoice.services.voice.quota import VoiceQuota
+from bananavoice.services.voice.usage_aggregator import UsageAggregator
+from bananavoice.services.voice.webrtc_bot import (
+    cleanup_webrtc_voice_agent,
+    init_webrtc_voice_agent,
+    install_drain_signal_handler,
+)
 from bananavoice.settings import settings
 from bananavoice.tkq import broker
 
@@ -38,7 +46,12 @@ def _setup_db(app: FastAPI) -> None:  # pragma: no cover
 
     :param app: fastAPI application.
     """
-    engine = create_async_engine(str(settings.db_url), echo=settings.db_echo)
+    engine = create_async_engine(
+        str(settings.db_url),
+        echo=settings.db_echo,
+        **pool_options(),
+    )
+    instrument_pool(engine)
     session_factory = async_sessionmaker(
         engine,
         expire_on_commit=False,
@@ -47,6 +60,29 @@ def _setup_db(app: FastAPI) -> None:  # pragma: no cover
     app.state.db_session_factory = session_factory
 
 
+def _setup_voice_usage(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates the rolling voice usage totals and the voice minute quotas.
+
+    Usage totals are exported periodically.
+
+    :param app: fastAPI application.
+    """
+    redis = Redis(connection_pool=app.state.redis_pool)
+    aggregator = UsageAggregator(redis, windows=settings.voice_usage_windows)
+    aggregator.start(settings.voice_usage_export_interval)
+    app.state.voice_usage = aggregator
+    app.state.voice_quota = None
+    if settings.voice_quota_enabled:
+        app.state.voice_quota = VoiceQuota(
+            redis,
+            minutes=settings.voice_quota_minutes,
+            period=settings.voice_quota_period,
+            min_minutes=settings.voice_quota_min_minutes,
+            cache_ttl=settings.voice_quota_cache_ttl,
+        )
+
+
 def setup_opentelemetry(app: FastAPI) -> None:  # pragma: no cover
     """
     Enables opentelemetry instrumentation.
@@ -147,18 +183,28 @@ async def lifespan_setup(
     if not broker.is_worker_process:
         await broker.startup()
     _setup_db(app)
+    await warm_up_pool(app.state.db_engine, settings.db_pool_warmup)
     setup_opentelemetry(app)
     init_redis(app)
     init_rabbit(app)
+    _setup_voice_usage(app)
+    init_webrtc_voice_agent(
+        app.state.db_session_factory,
+        app.state.voice_usage,
+        app.state.voice_quota,
+    )
+    install_drain_signal_handler()
     setup_prometheus(app)
     app.middleware_stack = app.build_middleware_stack()
 
     yield
     if not broker.is_worker_process:
         await broker.shutdown()
+    # Flushes the metered voice usage, before the engine is disposed
+    await cleanup_webrtc_voice_agent()
     await app.state.db_engine.dispose()
 
+    await app.state.voice_usage.stop()
     await shutdown_redis(app)
     await shutdown_rabbit(app)
-    await cleanup_webrtc_voice_agent()
     stop_opentelemetry(app)
@@ -15,3 +15,16 @@ async def test_health(client: AsyncClient, fastapi_app: FastAPI) -> None:
     url = fastapi_app.url_path_for("health_check")
     response = await client.get(url)
     assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.anyio
+async def test_ready(client: AsyncClient, fastapi_app: FastAPI) -> None:
+    """
+    Checks the readiness endpoint.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    """
+    url = fastapi_app.url_path_for("readiness_check")
+    response = await client.get(url)
+    assert response.status_code == status.HTTP_200_OK
@@ -1,3 +1,4 @@
+import json
 import uuid
 
 import pytest
@@ -55,3 +56,85 @@ async def test_getting(
     assert response.status_code == status.HTTP_200_OK
     assert len(dummies) == 1
     assert dummies[0]["name"] == test_name
+
+
+@pytest.mark.anyio
+async def test_paging(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Tests cursor pagination of dummies."""
+    dao = DummyDAO(dbsession)
+    names = [uuid.uuid4().hex for _ in range(5)]
+    for name in names:
+        await dao.create_dummy_model(name=name)
+    await dbsession.flush()
+
+    url = fastapi_app.url_path_for("handle_http_post")
+    query = (
+        "query($after: String){dummyModels(first: 2, after: $after)"
+        "{edges{cursor node{name}} pageInfo{hasNextPage endCursor}}}"
+    )
+    pages = []
+    after = None
+    while True:
+        response = await client.post(
+            url,
+            json={"query": query, "variables": {"after": after}},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()["data"]["dummyModels"]
+        pages.append([edge["node"]["name"] for edge in page["edges"]])
+        after = page["pageInfo"]["endCursor"]
+        if not page["pageInfo"]["hasNextPage"]:
+            break
+
+    assert pages == [names[:2], names[2:4], names[4:]]
+    assert [dummy.name async for dummy in dao.stream_dummies(batch_size=2)] == names
+
+
+@pytest.mark.anyio
+async def test_bulk_creation(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Tests creation of dummies in batches."""
+    names = [uuid.uuid4().hex for _ in range(5)]
+    url = fastapi_app.url_path_for("handle_http_post")
+    response = await client.post(
+        url,
+        json={
+            "query": "mutation($names: [String!]!){createDummyModels(names: $names)}",
+            "variables": {"names": names[:3]},
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["data"]["createDummyModels"] == names[:3]
+
+    dao = DummyDAO(dbsession)
+    assert await dao.bulk_create(names[3:], chunk_size=1) == 2
+    assert [dummy.name for dummy in await dao.filter()] == names
+
+
+@pytest.mark.anyio
+async def test_export(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Tests that dummies are exported as JSON lines."""
+    names = [uuid.uuid4().hex for _ in range(3)]
+    await DummyDAO(dbsession).bulk_create(names)
+    url = fastapi_app.url_path_for("export_dummy_models")
+
+    response = await client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["name"] for row in rows] == names
+
+    response = await client.get(url, params={"name": names[1]})
+    assert [json.loads(line)["name"] for line in response.text.splitlines()] == [
+        names[1],
+    ]
@@ -0,0 +1,78 @@
+"""Tests for voice session admission control."""
+
+import asyncio
+
+import pytest
+
+from bananavoice.services.voice.admission import (
+    AdmissionController,
+    AdmissionRejectedError,
+)
+
+
+@pytest.mark.asyncio
+async def test_admission_queues_and_hands_over_slots() -> None:
+    """Test that a queued offer gets the slot of a finished session."""
+    controller = AdmissionController(max_sessions=1, queue_size=1, queue_timeout=1.0)
+
+    await controller.acquire()
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    assert controller.queued == 1
+
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        await controller.acquire()
+    assert exc_info.value.reason == "capacity"
+
+    controller.release()
+    await waiter
+    assert controller.active == 1
+    assert controller.queued == 0
+    await controller.stop()
+
+
+@pytest.mark.asyncio
+async def test_admission_rejects_on_timeout_and_overload() -> None:
+    """Test that offers are shed after their deadline or under overload."""
+    controller = AdmissionController(
+        max_sessions=1,
+        queue_size=1,
+        queue_timeout=0.01,
+        retry_after=7,
+    )
+    await controller.acquire()
+
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        await controller.acquire()
+    assert exc_info.value.reason == "timeout"
+    assert exc_info.value.retry_after == 7
+    assert controller.queued == 0
+
+    controller.release()
+    controller.loop_lag = 1.0
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        await controller.acquire()
+    assert exc_info.value.reason == "overload"
+    assert controller.stats()["rejected"] == 2
+    await controller.stop()
+
+
+@pytest.mark.asyncio
+async def test_admission_rejects_while_draining() -> None:
+    """Test that draining rejects queued and new offers."""
+    controller = AdmissionController(max_sessions=1, queue_size=1, queue_timeout=1.0)
+    await controller.acquire()
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+
+    controller.drain()
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        await waiter
+    assert exc_info.value.reason == "draining"
+
+    controller.release()
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        await controller.acquire()
+    assert exc_info.value.reason == "draining"
+    assert controller.stats()["draining"]
+    await controller.stop()
@@ -0,0 +1,52 @@
+"""Tests for the offline voice pipeline benchmark."""
+
+import random
+
+import pytest
+
+from bananavoice.services.voice.benchmark import BenchmarkConfig, run_benchmark
+from bananavoice.services.voice.fakes import LatencyDistribution
+
+
+def test_latency_distributions() -> None:
+    """Test parsing and sampling of fake provider latencies."""
+    rng = random.Random(1)  # noqa: S311
+    fixed = LatencyDistribution.parse("0.2")
+    uniform = LatencyDistribution.parse("0.2:0.1:uniform")
+    lognormal = LatencyDistribution.parse("0.2:0.1")
+
+    assert fixed.sample(rng) == 0.2
+    assert all(0.1 <= uniform.sample(rng) <= 0.3 for _ in range(100))
+    samples = [lognormal.sample(rng) for _ in range(2000)]
+    assert min(samples) > 0
+    assert sum(samples) / len(samples) == pytest.approx(0.2, rel=0.1)
+    with pytest.raises(ValueError, match="Unknown latency distribution"):
+        LatencyDistribution.parse("0.2:0.1:gamma")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("shape", ["daily", "webrtc"])
+async def test_benchmark_runs_concurrent_sessions(shape: str) -> None:
+    """Test that concurrent fake sessions complete and are measured."""
+    fast = LatencyDistribution(0.01)
+    report = await run_benchmark(
+        BenchmarkConfig(
+            sessions=2,
+            shape=shape,
+            turns=1,
+            utterance_seconds=0.2,
+            ramp=0.0,
+            answer="Sure, it is sunny.",
+            stt_latency=fast,
+            llm_ttfb=fast,
+            llm_token_interval=LatencyDistribution(0.0),
+            tts_ttfb=fast,
+        ),
+    )
+
+    assert report.turns == 2
+    assert report.timeouts == 0
+    assert len(report.stages["response"]) == 2
+    assert 0 < report.steady_wall_seconds < report.wall_seconds
+    assert report.sessions_per_core > 0
+    assert "sessions_per_core" in report.format()
@@ -0,0 +1,112 @@
+"""Tests for the LLM context token budget."""
+
+import asyncio
+from typing import Any, Dict, List, Sequence
+
+import pytest
+from pipecat.clocks.system_clock import SystemClock
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+from pipecat.processors.frame_processor import FrameProcessorSetup
+from pipecat.utils.asyncio.task_manager import TaskManager, TaskManagerParams
+
+from bananavoice.services.voice.context import (
+    SUMMARY_PREFIX,
+    ContextBudgetProcessor,
+    Message,
+    TokenCounter,
+)
+
+
+def _turns(count: int) -> List[Dict[str, Any]]:
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": "x" * 400}
+        for i in range(count)
+    ]
+
+
+def test_token_counter_is_incremental() -> None:
+    """Test that appended messages are added and replaced ones recounted."""
+    counter = TokenCounter()
+    messages = _turns(2)
+    assert counter.update(messages) == 208
+
+    messages.append({"role": "user", "content": "x" * 40})
+    assert counter.update(messages) == 222
+
+    messages[:] = messages[1:]
+    assert counter.update(messages) == 118
+
+
+@pytest.mark.asyncio
+async def test_budget_trims_without_summarizer() -> None:
+    """Test that old turns are dropped but the system prompt is kept."""
+    context = OpenAILLMContext([{"role": "system", "content": "Be brief."}])
+    context.add_messages(_turns(20))
+    processor = ContextBudgetProcessor(max_tokens=500, keep_messages=2)
+
+    processor.enforce_budget(context)
+
+    assert context.messages[0]["content"] == "Be brief."
+    assert processor.counter.tokens <= 500
+    assert len(context.messages) == 5
+
+
+@pytest.mark.asyncio
+async def test_budget_summarizes_old_turns() -> None:
+    """Test that old turns are replaced by a summary in the background."""
+
+    async def summarizer(messages: Sequence[Message]) -> str:
+        return f"{len(messages)} messages"
+
+    task_manager = TaskManager()
+    task_manager.setup(TaskManagerParams(loop=asyncio.get_running_loop()))
+    processor = ContextBudgetProcessor(
+        max_tokens=500,
+        keep_messages=2,
+        summarizer=summarizer,
+        hard_limit=10_000,
+    )
+    await processor.setup(
+        FrameProcessorSetup(clock=SystemClock(), task_manager=task_manager),
+    )
+    context = OpenAILLMContext([{"role": "system", "content": "Be brief."}])
+    context.add_messages(_turns(6))
+
+    processor.enforce_budget(context)
+    assert len(context.messages) == 7
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+    assert context.messages[1]["content"] == SUMMARY_PREFIX + "4 messages"
+    assert len(context.messages) == 4
+    await processor.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_trim_keeps_tool_calls_with_their_replies() -> None:
+    """Test that a tool call and its replies are dropped together."""
+    context = OpenAILLMContext([{"role": "system", "content": "Be brief."}])
+    context.add_messages(
+        [
+            {"role": "user", "content": "x" * 400},
+            {
+                "role": "assistant",
+                "content": "",
+                "tool_calls": [{"id": "call", "type": "function"}],
+            },
+            {"role": "tool", "tool_call_id": "call", "content": "x" * 400},
+            *_turns(3),
+        ],
+    )
+    # Dropping the call alone would fit the budget, leaving its reply.
+    processor = ContextBudgetProcessor(max_tokens=424, keep_messages=2)
+
+    processor.enforce_budget(context)
+
+    assert [message["role"] for message in context.messages] == [
+        "system",
+        "user",
+        "assistant",
+        "user",
+    ]
+    assert processor.counter.tokens == TokenCounter().update(context.messages)
@@ -0,0 +1,78 @@
+"""Tests for draining the voice sessions of a worker."""
+
+import asyncio
+import os
+import signal
+from types import FrameType
+from typing import List, Optional
+
+import pytest
+
+from bananavoice.services.voice import webrtc_bot
+from bananavoice.services.voice.admission import AdmissionRejectedError
+from bananavoice.services.voice.fakes import FakeGeminiLiveLLMService
+from bananavoice.services.voice.webrtc_bot import (
+    WebRTCVoiceAgent,
+    WebRTCVoiceAgentManager,
+)
+
+
+def create_agent() -> WebRTCVoiceAgent:
+    """Create an offline voice agent."""
+    return WebRTCVoiceAgent(
+        google_api_key="",
+        llm_factory=FakeGeminiLiveLLMService,
+        ice_servers=[],
+    )
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_sessions_until_deadline() -> None:
+    """Test that short sessions end on their own and long ones are closed."""
+    agent = create_agent()
+    short = asyncio.create_task(asyncio.sleep(0.05))
+    long = asyncio.create_task(asyncio.sleep(10))
+    agent._tasks.update({"short": short, "long": long})  # noqa: SLF001
+
+    closed = await agent.drain(timeout=0.5)
+
+    assert closed == 1
+    assert short.done()
+    assert not short.cancelled()
+    await asyncio.sleep(0)
+    assert long.cancelled()
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        await agent.create_connection("sdp", "offer")
+    assert exc_info.value.reason == "draining"
+
+
+@pytest.mark.asyncio
+async def test_sigterm_drains_before_server_handler(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that SIGTERM drains sessions before the server shuts down."""
+    manager = WebRTCVoiceAgentManager()
+    monkeypatch.setattr(webrtc_bot, "_manager", manager)
+    monkeypatch.setattr(webrtc_bot.settings, "voice_drain_timeout", 1.0)
+    agent = create_agent()
+    monkeypatch.setattr(manager, "_agent", agent)
+    session = asyncio.create_task(asyncio.sleep(0.2))
+    agent._tasks["session"] = session  # noqa: SLF001
+
+    exits: List[bool] = []
+
+    def server_handler(signum: int, frame: Optional[FrameType]) -> None:
+        exits.append(session.done())
+
+    original = signal.signal(signal.SIGTERM, server_handler)
+    try:
+        webrtc_bot.install_drain_signal_handler()
+        os.kill(os.getpid(), signal.SIGTERM)
+        await asyncio.sleep(0.05)
+        assert manager.draining
+        assert not exits
+        await asyncio.sleep(0.3)
+    finally:
+        signal.signal(signal.SIGTERM, original)
+
+    assert exits == [True]
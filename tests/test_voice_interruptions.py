@@ -0,0 +1,68 @@
+"""Tests for barge-in support."""
+
+import asyncio
+from typing import Any
+
+import pytest
+from pipecat.frames.frames import StartInterruptionFrame
+from pipecat.pipeline.pipeline import Pipeline
+from pipecat.pipeline.runner import PipelineRunner
+from pipecat.pipeline.task import PipelineTask
+from pipecat.processors.aggregators.openai_llm_context import (
+    OpenAILLMContext,
+    OpenAILLMContextFrame,
+)
+from pipecat.services.openai.base_llm import BaseOpenAILLMService
+
+from bananavoice.services.voice.interruptions import InterruptibleOpenAILLMService
+
+
+class FakeStream:
+    """Completion stream that never produces a chunk until it is closed."""
+
+    def __init__(self) -> None:
+        self.closed = asyncio.Event()
+
+    def __aiter__(self) -> "FakeStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        await self.closed.wait()
+        raise StopAsyncIteration
+
+    async def close(self) -> None:
+        """Close the stream."""
+        self.closed.set()
+
+
+@pytest.mark.asyncio
+async def test_interruption_closes_completion_stream(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that an interruption ends the in-flight completion request."""
+    streams = asyncio.Queue[FakeStream]()
+
+    async def get_chat_completions(*args: Any) -> FakeStream:
+        stream = FakeStream()
+        await streams.put(stream)
+        return stream
+
+    monkeypatch.setattr(
+        BaseOpenAILLMService,
+        "get_chat_completions",
+        get_chat_completions,
+    )
+    llm = InterruptibleOpenAILLMService(api_key="test", model="gpt-4.1-mini")
+    task = PipelineTask(Pipeline([llm]))
+    run = asyncio.create_task(PipelineRunner(handle_sigint=False).run(task))
+
+    context = OpenAILLMContext([{"role": "user", "content": "Tell me a story."}])
+    await task.queue_frame(OpenAILLMContextFrame(context))
+    stream = await asyncio.wait_for(streams.get(), 5)
+    await task.queue_frame(StartInterruptionFrame())
+    await asyncio.wait_for(stream.closed.wait(), 5)
+
+    # A second interruption without a request in flight is a no-op.
+    await task.queue_frame(StartInterruptionFrame())
+    await task.cancel()
+    await run
@@ -0,0 +1,112 @@
+"""Tests for the pre-warmed LLM service pool."""
+
+import asyncio
+from typing import Any, List
+
+import pytest
+from pipecat.services.gemini_multimodal_live import gemini
+
+from bananavoice.services.voice.llm_pool import LLMServicePool, WarmGeminiLiveLLMService
+
+
+class FakeWarmService:
+    """Stand-in for a warm LLM service."""
+
+    def __init__(self) -> None:
+        self.is_warm = False
+        self.discarded = False
+
+    async def prewarm(self) -> bool:
+        """Become warm."""
+        self.is_warm = True
+        return True
+
+    async def discard(self) -> None:
+        """Become cold."""
+        self.discarded = True
+        self.is_warm = False
+
+
+class FakeWebsocket:
+    """Upstream websocket that keeps what is sent to it."""
+
+    def __init__(self) -> None:
+        self.sent: List[str] = []
+        self.closed = False
+
+    async def send(self, message: str) -> None:
+        """Keep a message."""
+        self.sent.append(message)
+
+    async def close(self) -> None:
+        """Close the socket."""
+        self.closed = True
+
+
+async def _wait_for_size(pool: LLMServicePool, size: int) -> None:
+    for _ in range(100):
+        if pool.size >= size:
+            return
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_pool_refills_after_claim() -> None:
+    """Test that the pool keeps warm services ready and refills them."""
+    factory: Any = FakeWarmService
+    pool = LLMServicePool(factory, min_size=1, max_size=2)
+    assert pool.claim() is None
+
+    pool.start()
+    await _wait_for_size(pool, 1)
+    service = pool.claim()
+    assert service is not None
+    assert service.is_warm
+
+    await _wait_for_size(pool, 1)
+    assert pool.size == 1
+    await pool.stop()
+    assert pool.size == 0
+
+
+def test_pool_target_follows_arrival_rate() -> None:
+    """Test that the target size grows with the arrival rate."""
+    factory: Any = FakeWarmService
+    pool = LLMServicePool(factory, min_size=1, max_size=3, rate_window=10.0)
+    pool.warmup_seconds = 2.0
+    assert pool.target_size == 1
+
+    for _ in range(10):
+        pool.claim()
+    assert pool.target_size == 2
+
+    for _ in range(100):
+        pool.claim()
+    assert pool.target_size == 3
+
+
+@pytest.mark.asyncio
+async def test_prewarm_holds_the_receive_loop_back(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that a warm session stands in a real task for its receive loop."""
+    socket = FakeWebsocket()
+
+    async def connect(uri: str) -> FakeWebsocket:
+        return socket
+
+    monkeypatch.setattr(gemini.websockets, "connect", connect)
+    service = WarmGeminiLiveLLMService(api_key="test")
+    assert await service.prewarm()
+    assert socket.sent
+
+    # Stored by pipecat when the session connects.
+    receive_task = service._receive_task  # noqa: SLF001
+    assert isinstance(receive_task, asyncio.Task)
+    assert not receive_task.done()
+
+    await service.discard()
+    await asyncio.sleep(0)
+    assert receive_task.cancelled()
+    assert socket.closed
+    assert not service.is_warm
@@ -0,0 +1,143 @@
+"""Tests for usage metering of voice sessions."""
+
+import asyncio
+from typing import Any
+
+import pytest
+from pipecat.frames.frames import EndFrame
+from pipecat.pipeline.pipeline import Pipeline
+from pipecat.pipeline.runner import PipelineRunner
+from pipecat.pipeline.task import PipelineParams, PipelineTask
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+from sqlalchemy.exc import IntegrityError
+
+from bananavoice.services.voice.cost_monitor import CostBreakdown, unit_price
+from bananavoice.services.voice.fakes import (
+    FakeLLMService,
+    FakeSTTService,
+    FakeTTSService,
+    LatencyDistribution,
+    LoopbackTransport,
+)
+from bananavoice.services.voice.metering import SessionUsage, UsageMeter, UsageWriter
+
+
+def test_usage_is_priced_from_consumption() -> None:
+    """Test that the cost breakdown comes from metered quantities."""
+    usage = SessionUsage("session", "daily")
+    usage.add("llm", "gpt-4.1-mini-2025-04-14", "input_tokens", 1_000_000)
+    usage.add("llm", "gpt-4.1-mini-2025-04-14", "output_tokens", 500_000)
+    usage.add("stt", "gpt-4o-mini-transcribe", "seconds", 120)
+    usage.add("tts", "gpt-4o-mini-tts", "characters", 0)
+    usage.add("transport", "daily", "seconds", 600)
+
+    breakdown = CostBreakdown.from_usage(usage.totals, minutes=10)
+
+    assert breakdown.llm_cost == pytest.approx((0.40 + 0.80) / 10)
+    assert breakdown.stt_cost == pytest.approx(0.006 / 10)
+    assert breakdown.tts_cost == 0
+    assert breakdown.daily_audio == pytest.approx(0.00099)
+    assert usage.cost == pytest.approx(1.2 + 0.006 + 0.0099)
+    assert unit_price("unknown-model", "seconds") == 0
+
+    rows = usage.take_rows()
+    assert {row["kind"] for row in rows} == {"llm", "stt", "transport"}
+    assert usage.take_rows() == []
+    assert usage.totals[("stt", "gpt-4o-mini-transcribe", "seconds")] == 120
+
+
+@pytest.mark.asyncio
+async def test_writer_keeps_rows_until_written() -> None:
+    """Test that rows are retried after a failed write and bounded."""
+
+    def unavailable() -> Any:
+        raise ConnectionError("database is down")
+
+    writer = UsageWriter(unavailable, max_pending=3)
+    first = SessionUsage("first", "webrtc")
+    second = SessionUsage("second", "webrtc")
+    writer.track(first)
+    writer.track(second)
+    first.add("llm", "model", "input_tokens", 10)
+    first.add("llm", "model", "output_tokens", 5)
+    second.add("llm", "model", "input_tokens", 7)
+
+    assert await writer.flush() == 0
+    assert writer.backlog == 3
+
+    second.add("llm", "model", "output_tokens", 1)
+    writer.close(second)
+    await writer.stop()
+
+    assert "second" not in writer.sessions
+    assert writer.backlog == 3
+    assert writer.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_writer_drops_rows_the_database_refuses() -> None:
+    """Test that a refused batch is dropped instead of retried forever."""
+
+    def refusing() -> Any:
+        raise IntegrityError("INSERT", {}, Exception("unknown user"))
+
+    writer = UsageWriter(refusing)
+    usage = SessionUsage("session", "webrtc")
+    writer.track(usage)
+    usage.add("llm", "model", "input_tokens", 10)
+    usage.add("llm", "model", "output_tokens", 5)
+
+    assert await writer.flush() == 0
+    assert writer.backlog == 0
+    assert writer.dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_meter_consumes_pipeline_usage_metrics() -> None:
+    """Test that a session meters tokens, characters and speech time."""
+    fast = LatencyDistribution(0.01)
+    transport = LoopbackTransport(turns=2, utterance_seconds=0.3)
+    stt = FakeSTTService(latency=fast)
+    llm = FakeLLMService(
+        ttfb=fast,
+        token_interval=LatencyDistribution(0.0),
+        answer="Sure, it is sunny.",
+    )
+    tts = FakeTTSService(ttfb=fast)
+    aggregator = llm.create_context_aggregator(OpenAILLMContext())
+    usage = SessionUsage("session", "daily")
+    writer = UsageWriter(None)
+    task = PipelineTask(
+        Pipeline(
+            [
+                transport.input(),
+                stt,
+                aggregator.user(),
+                llm,
+                tts,
+                transport.output(),
+                aggregator.assistant(),
+                UsageMeter(usage, writer, stt=stt, transport="daily"),
+            ],
+        ),
+        params=PipelineParams(
+            enable_metrics=True,
+            enable_usage_metrics=True,
+            audio_in_sample_rate=16000,
+            audio_out_sample_rate=24000,
+        ),
+    )
+    run = asyncio.create_task(PipelineRunner(handle_sigint=False).run(task))
+    await asyncio.wait_for(transport.done.wait(), 30)
+    await task.queue_frame(EndFrame())
+    await run
+    await writer.stop()
+
+    totals = {(kind, unit): value for (kind, _, unit), value in usage.totals.items()}
+    assert totals[("llm", "output_tokens")] > 0
+    assert totals[("tts", "characters")] == 2 * len("Sure, it is sunny.")
+    assert totals[("stt", "seconds")] == pytest.approx(0.6, abs=0.5)
+    assert totals[("transport", "seconds")] > 0
+    assert usage.ended_at is not None
+    assert usage.pending == {}
+    assert not writer.sessions
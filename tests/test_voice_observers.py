@@ -0,0 +1,110 @@
+"""Tests for voice pipeline observers."""
+
+from typing import Any
+
+import pytest
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    Frame,
+    LLMTextFrame,
+    MetricsFrame,
+    StartInterruptionFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.metrics.metrics import TTFBMetricsData
+from pipecat.observers.base_observer import FramePushed
+from pipecat.processors.frame_processor import FrameDirection
+from prometheus_client import REGISTRY
+
+from bananavoice.services.voice.observers import InterruptionObserver, LatencyObserver
+
+
+def _pushed(frame: Frame) -> FramePushed:
+    processor: Any = None
+    return FramePushed(
+        source=processor,
+        destination=processor,
+        frame=frame,
+        direction=FrameDirection.DOWNSTREAM,
+        timestamp=0,
+    )
+
+
+@pytest.mark.asyncio
+async def test_latency_observer_records_turn_stages() -> None:
+    """Test that every stage of a turn is measured once."""
+    observer = LatencyObserver("test", {"stt": "fake", "llm": "fake", "tts": "fake"})
+    transcription = TranscriptionFrame("hi", "user", "now")
+    frames = [
+        UserStoppedSpeakingFrame(),
+        transcription,
+        transcription,
+        LLMTextFrame("Hello"),
+        TTSAudioRawFrame(audio=b"\x00\x00", sample_rate=16000, num_channels=1),
+        BotStartedSpeakingFrame(),
+        MetricsFrame(data=[TTFBMetricsData(processor="FakeLLM#0", value=0.2)]),
+    ]
+    for frame in frames:
+        await observer.on_push_frame(_pushed(frame))
+
+    assert set(observer.last_turn) == {"stt", "llm", "tts", "output"}
+
+
+@pytest.mark.asyncio
+async def test_latency_observer_skips_missing_milestones() -> None:
+    """Test that speech-to-speech turns without LLM text are still measured."""
+    observer = LatencyObserver("test", {})
+    frames = [
+        UserStoppedSpeakingFrame(),
+        TTSAudioRawFrame(audio=b"\x00\x00", sample_rate=16000, num_channels=1),
+        BotStartedSpeakingFrame(),
+    ]
+    for frame in frames:
+        await observer.on_push_frame(_pushed(frame))
+
+    assert set(observer.last_turn) == {"tts", "output"}
+
+
+@pytest.mark.asyncio
+async def test_latency_observer_labels_the_serving_provider() -> None:
+    """Test that stages are labelled with the provider serving them now."""
+    serving = ["primary"]
+    observer = LatencyObserver("routed", {"tts": lambda: serving[0]})
+
+    def count(provider: str) -> float:
+        labels = {"pipeline": "routed", "stage": "tts", "provider": provider}
+        sample = REGISTRY.get_sample_value("voice_stage_latency_seconds_count", labels)
+        return sample or 0
+
+    for provider in ("primary", "fallback"):
+        serving[0] = provider
+        for frame in (
+            UserStartedSpeakingFrame(),
+            UserStoppedSpeakingFrame(),
+            TTSAudioRawFrame(audio=b"\x00\x00", sample_rate=16000, num_channels=1),
+        ):
+            await observer.on_push_frame(_pushed(frame))
+
+    assert count("primary") == 1
+    assert count("fallback") == 1
+
+
+@pytest.mark.asyncio
+async def test_interruption_observer_measures_barge_in() -> None:
+    """Test that only interruptions of bot speech are measured."""
+    observer = InterruptionObserver("test")
+
+    # The user speaking while the bot is silent isn't a barge-in.
+    await observer.on_push_frame(_pushed(StartInterruptionFrame()))
+    await observer.on_push_frame(_pushed(BotStartedSpeakingFrame()))
+    await observer.on_push_frame(_pushed(BotStoppedSpeakingFrame()))
+    assert observer.last_latency == 0.0
+
+    await observer.on_push_frame(_pushed(BotStartedSpeakingFrame()))
+    await observer.on_push_frame(_pushed(StartInterruptionFrame()))
+    await observer.on_push_frame(_pushed(BotStoppedSpeakingFrame()))
+    assert observer.last_latency > 0.0
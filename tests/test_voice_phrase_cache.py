@@ -0,0 +1,58 @@
+"""Tests for the phrase audio cache."""
+
+from pathlib import Path
+
+import pytest
+
+from bananavoice.services.voice.phrase_cache import PhraseAudioCache
+
+
+@pytest.mark.asyncio
+async def test_phrase_cache_round_trip(tmp_path: Path) -> None:
+    """Test that stored audio is mapped back from disk."""
+    cache = PhraseAudioCache(tmp_path)
+    key = cache.key("Hello!", "nova", 24000)
+
+    assert await cache.get(key) is None
+    await cache.put(key, b"\x01\x02" * 100)
+
+    audio = await cache.get(key)
+    assert audio is not None
+    assert audio[:4] == b"\x01\x02\x01\x02"
+    assert len(audio) == 200
+
+    # A second cache sharing the directory sees the same audio.
+    other = PhraseAudioCache(tmp_path)
+    other_audio = await other.get(key)
+    assert other_audio is not None
+    assert len(other_audio) == 200
+    cache.close()
+    other.close()
+
+
+def test_phrase_cache_admits_listed_and_recurring_phrases(tmp_path: Path) -> None:
+    """Test that only listed phrases and phrases used often are cached."""
+    cache = PhraseAudioCache(tmp_path, phrases=["Hello!"], min_hits=2, max_chars=10)
+
+    assert cache.key("Hi", "nova", 24000) != cache.key("Hi", "alloy", 24000)
+    assert cache.key("Hi", "nova", 24000) != cache.key("Hi", "nova", 16000)
+    assert cache.accepts("Hello!")
+    assert not cache.accepts("Sure, ")
+    assert cache.accepts("Sure,")
+    assert not cache.accepts("This phrase is too long")
+    assert not cache.accepts("This phrase is too long")
+
+
+@pytest.mark.asyncio
+async def test_phrase_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    """Test that files beyond the limit are removed, oldest use first."""
+    cache = PhraseAudioCache(tmp_path, max_files=2)
+
+    await cache.put("a", b"\x00\x00")
+    await cache.put("b", b"\x00\x00")
+    assert await cache.get("a") is not None
+    await cache.put("c", b"\x00\x00")
+
+    assert sorted(path.stem for path in tmp_path.glob("*.pcm")) == ["a", "c"]
+    assert await cache.get("b") is None
+    cache.close()
@@ -0,0 +1,103 @@
+"""Tests for cost and capacity planning over scenario grids."""
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from bananavoice.services.voice.cost_monitor import (
+    CostBreakdown,
+    calculate_monthly_cost,
+)
+from bananavoice.services.voice.planning import (
+    ProviderPlan,
+    measured_sessions_per_core,
+    plan,
+    scenario_count,
+    scenario_range,
+)
+from bananavoice.services.voice.profiling import SessionStats
+from bananavoice.web.api.voice.views import PlanningRequest
+
+
+def test_grid_matches_scalar_projection() -> None:
+    """Test that every cell of the grid matches the per-scenario math."""
+    catalog = [
+        ProviderPlan("daily", CostBreakdown(), sessions_per_core=10),
+        ProviderPlan("whisper", CostBreakdown(stt_cost=0.006), sessions_per_core=5),
+    ]
+    minutes = scenario_range(0, 120, 30)
+    participants = scenario_range(1, 1000, 1)
+
+    grid = plan(minutes, participants, catalog, core_hour_cost=0.05)
+
+    assert minutes.tolist() == [0, 30, 60, 90, 120]
+    assert grid.monthly_cost.shape == (5, 1000, 2)
+    projection = calculate_monthly_cost(daily_minutes=60, participants=10)
+    assert grid.provider_cost[2, 9, 0] == pytest.approx(projection["new_monthly_cost"])
+    assert grid.provider_cost[2, 9, 1] == pytest.approx(projection["old_monthly_cost"])
+
+    # 1000 participants talking 120 minutes over 8 hours, twice that at peak.
+    assert grid.concurrent_sessions[4, 999] == pytest.approx(500)
+    assert grid.cores[4, 999].tolist() == [50, 100]
+    assert grid.compute_cost[4, 999, 0] == pytest.approx(50 * 0.05 * 24 * 30)
+    assert np.all(grid.cost_per_minute[0] == 0)
+
+    report = grid.to_dict()
+    assert report["cheapest"][4][999] == "daily"
+    assert len(report["monthly_cost"][1]) == 1000
+
+
+def test_grid_size_is_bounded() -> None:
+    """Test that oversized and empty grids are refused."""
+    catalog = [ProviderPlan("daily", CostBreakdown(), sessions_per_core=10)]
+    with pytest.raises(ValueError, match="exceeds"):
+        plan(scenario_range(0, 999, 1), scenario_range(0, 999, 1), catalog)
+    with pytest.raises(ValueError, match="Empty"):
+        plan([], [1], catalog)
+
+
+@pytest.mark.parametrize(
+    ("start", "stop", "step"),
+    [(0, 120, 30), (0, 100, 30), (1, 1000, 1), (0.5, 2, 0.25), (5, 5, 1), (5, 1, 1)],
+)
+def test_scenario_count_matches_range(start: float, stop: float, step: float) -> None:
+    """Test that ranges are counted without building them."""
+    assert scenario_count(start, stop, step) == scenario_range(start, stop, step).size
+
+
+def test_huge_ranges_are_refused_before_allocation() -> None:
+    """Test that oversized ranges never reach numpy."""
+    with pytest.raises(ValueError, match="exceeds"):
+        scenario_range(0, 1e15, 1)
+    with pytest.raises(ValidationError, match="exceeds"):
+        PlanningRequest.model_validate(
+            {
+                "minutes": {"start": 0, "stop": 1e15},
+                "participants": {"start": 1, "stop": 1},
+            },
+        )
+    with pytest.raises(ValidationError, match="exceeds"):
+        PlanningRequest.model_validate(
+            {
+                "minutes": {"start": 0, "stop": 999},
+                "participants": {"start": 0, "stop": 999},
+            },
+        )
+    request = PlanningRequest.model_validate(
+        {
+            "minutes": {"start": 0, "stop": 120, "step": 30},
+            "participants": {"start": 1, "stop": 1000},
+        },
+    )
+    assert request.minutes.count * request.participants.count == 5000
+
+
+def test_sessions_per_core_from_profiled_sessions() -> None:
+    """Test that only ended sessions with CPU time are measured."""
+    sessions = [
+        SessionStats("a", started_at=0, ended_at=60, cpu_seconds=1),
+        SessionStats("b", started_at=0, ended_at=120, cpu_seconds=3),
+        SessionStats("c", started_at=0, cpu_seconds=5),
+    ]
+    assert measured_sessions_per_core(sessions) == pytest.approx(45)
+    assert measured_sessions_per_core(sessions[2:]) is None
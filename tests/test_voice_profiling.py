@@ -0,0 +1,98 @@
+"""Tests for per-session resource accounting."""
+
+import asyncio
+import os
+from typing import List
+
+import pytest
+
+from bananavoice.services.voice.fakes import FakeGeminiLiveLLMService
+from bananavoice.services.voice.profiling import SessionProfiler
+from bananavoice.services.voice.webrtc_bot import WebRTCVoiceAgent
+from bananavoice.services.voice.webrtc_load import LoadConfig, run_load
+
+LEAK: List[bytes] = []
+
+
+def burn(seconds: float) -> None:
+    """Keep the CPU busy."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + seconds
+    while loop.time() < deadline:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_profiler_attributes_cpu_and_tasks() -> None:
+    """Test that tasks of a session and their children are accounted to it."""
+    profiler = SessionProfiler("test")
+    busy = profiler.open_session("busy")
+    idle = profiler.open_session("idle")
+
+    async def child() -> None:
+        burn(0.05)
+
+    async def session() -> None:
+        burn(0.05)
+        await asyncio.gather(asyncio.create_task(child()), asyncio.sleep(0.01))
+
+    with profiler.attach(busy):
+        task = asyncio.create_task(session())
+    with profiler.attach(idle):
+        sleeper = asyncio.create_task(asyncio.sleep(0.2))
+    await task
+
+    assert busy.cpu_seconds >= 0.08
+    # The session, its child and the sleep wrapped by gather
+    assert busy.peak_tasks == 3
+    assert busy.live_tasks == 0
+    assert idle.cpu_seconds < 0.02
+    assert profiler.update_task_gauge() == 1
+
+    profiler.close_session(busy)
+    profiler.close_session(idle)
+    report = profiler.report()
+    assert [ended["session_id"] for ended in report["ended"]] == ["idle", "busy"]
+    await sleeper
+
+
+@pytest.mark.asyncio
+async def test_profiler_reports_unreclaimed_memory() -> None:
+    """Test that memory kept after the worker went idle is reported."""
+    profiler = SessionProfiler("test", alert_bytes=2**20)
+    assert profiler.set_tracemalloc(enabled=True, frames=1)
+    try:
+        stats = profiler.open_session("leaky")
+        LEAK.append(os.urandom(4 * 2**20))
+        profiler.close_session(stats)
+    finally:
+        profiler.set_tracemalloc(enabled=False)
+        LEAK.clear()
+
+    assert stats.process_memory_growth is not None
+    assert stats.process_memory_growth >= 4 * 2**20
+    assert profiler.unreclaimed is not None
+    assert profiler.unreclaimed >= 4 * 2**20
+    assert any("test_voice_profiling.py" in line for line in profiler.unreclaimed_top)
+
+
+@pytest.mark.asyncio
+async def test_agent_accounts_webrtc_sessions() -> None:
+    """Test that WebRTC sessions get CPU time and tasks attributed."""
+    agent = WebRTCVoiceAgent(
+        google_api_key="",
+        llm_factory=FakeGeminiLiveLLMService,
+        ice_servers=[],
+    )
+    config = LoadConfig(sessions=1, turns=1, delay=0.5, pause=1.0)
+    try:
+        await run_load(config, send_offer=agent.create_connection)
+        await asyncio.sleep(0.5)
+        report = agent.resource_report()
+    finally:
+        await agent.cleanup()
+
+    sessions = report["sessions"] + report["ended"]
+    assert len(sessions) == 1
+    assert sessions[0]["cpu_seconds"] > 0
+    assert sessions[0]["peak_tasks"] > 5
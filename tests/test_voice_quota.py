@@ -0,0 +1,74 @@
+"""Tests for per-user voice minute quotas."""
+
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from bananavoice.services.voice.quota import QuotaExceededError, VoiceQuota
+from bananavoice.web.api.voice.views import check_voice_quota
+
+
+def transport(user_id: uuid.UUID, seconds: float) -> dict:
+    """Usage row of metered session time."""
+    return {
+        "kind": "transport",
+        "unit": "seconds",
+        "user_id": user_id,
+        "quantity": seconds,
+    }
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_debited_until_the_quota_is_used() -> None:
+    """Test that metered minutes drain the bucket of their user only."""
+    redis = FakeRedis()
+    quota = VoiceQuota(redis, minutes=10, period=86400, min_minutes=1, cache_ttl=0)
+    user, other = uuid.uuid4(), uuid.uuid4()
+
+    assert await quota.check(user) == pytest.approx(540, abs=1)
+    await quota.debit([transport(user, 500), transport(user, 50)])
+
+    with pytest.raises(QuotaExceededError) as rejected:
+        await quota.check(user)
+    assert rejected.value.remaining == pytest.approx(50, abs=1)
+    # Refilling the missing 10 seconds of the minute takes about 1440s.
+    assert rejected.value.retry_after == pytest.approx(1440, abs=20)
+    assert await quota.check(other) == pytest.approx(540, abs=1)
+
+    # A balance may go negative, the bucket refills towards the capacity.
+    await quota.debit([transport(user, 100)])
+    tokens = float(await redis.hget(f"voice:quota:{user}", "tokens"))
+    assert tokens == pytest.approx(-50, abs=1)
+    assert 0 < await redis.ttl(f"voice:quota:{user}") <= 93601
+
+
+@pytest.mark.asyncio
+async def test_cached_balance_bounds_bursts() -> None:
+    """Test that admissions reserve the cached balance between refreshes."""
+    redis = FakeRedis()
+    quota = VoiceQuota(redis, minutes=3, min_minutes=1, cache_ttl=60)
+    user = uuid.uuid4()
+
+    await quota.check(user)
+    await quota.check(user)
+    await quota.check(user)
+    with pytest.raises(QuotaExceededError):
+        await quota.check(user)
+
+    # Reservations are local, Redis is only debited with metered time.
+    tokens = float(await redis.hget(f"voice:quota:{user}", "tokens"))
+    assert tokens == 180
+
+
+@pytest.mark.asyncio
+async def test_quota_check_fails_open_without_redis() -> None:
+    """Test that sessions are admitted while Redis is unreachable."""
+    server = FakeServer()
+    server.connected = False
+    quota = VoiceQuota(FakeRedis(server=server), minutes=1, cache_ttl=0)
+    user = SimpleNamespace(id=uuid.uuid4())
+
+    assert await check_voice_quota(user=user, quota=quota) is user
@@ -0,0 +1,79 @@
+"""Tests for the reaper of idle and overlong voice sessions."""
+
+import asyncio
+import time
+from typing import List
+
+import pytest
+from pipecat.frames.frames import InputAudioRawFrame
+from pipecat.observers.base_observer import FramePushed
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from bananavoice.services.voice.observers import InboundAudioObserver
+from bananavoice.services.voice.reaper import SessionReaper, Teardown
+
+
+@pytest.mark.asyncio
+async def test_inbound_audio_observer() -> None:
+    """Test that inbound audio refreshes the activity timestamp."""
+    observer = InboundAudioObserver()
+    observer.last_audio_at = 0.0
+    processor = FrameProcessor()
+    await observer.on_push_frame(
+        FramePushed(
+            source=processor,
+            destination=processor,
+            frame=InputAudioRawFrame(b"\x00\x00" * 320, 16000, 1),
+            direction=FrameDirection.DOWNSTREAM,
+            timestamp=0,
+        ),
+    )
+    assert observer.last_audio_at > 0
+
+
+@pytest.mark.asyncio
+async def test_reaper_tears_down_idle_and_overlong_sessions() -> None:
+    """Test that idle and overlong sessions are reaped with their reason."""
+    reaper = SessionReaper("test", idle_timeout=10, max_duration=100)
+    torn_down: List[str] = []
+
+    def teardown(session_id: str) -> Teardown:
+        async def close(reason: str) -> None:
+            torn_down.append(f"{session_id}:{reason}")
+
+        return close
+
+    now = time.monotonic()
+    for session_id in ("active", "idle", "old"):
+        reaper.track(session_id, InboundAudioObserver(), teardown(session_id))
+    reaper.sessions["idle"].activity.last_audio_at = now - 20
+    reaper.sessions["old"].started_at = now - 200
+
+    reaped = await reaper.reap(now)
+
+    assert sorted(reaped) == [("idle", "idle"), ("old", "max_duration")]
+    assert sorted(torn_down) == ["idle:idle", "old:max_duration"]
+    assert list(reaper.sessions) == ["active"]
+    reaper.forget("active")
+    assert not reaper.sessions
+
+
+@pytest.mark.asyncio
+async def test_reaper_survives_failed_teardown() -> None:
+    """Test that a failing teardown doesn't stop the periodic checks."""
+    reaper = SessionReaper("test", idle_timeout=0, max_duration=100, interval=0.01)
+    closed = asyncio.Event()
+
+    async def broken(reason: str) -> None:
+        raise RuntimeError("connection already gone")
+
+    async def close(reason: str) -> None:
+        closed.set()
+
+    reaper.track("broken", InboundAudioObserver(), broken)
+    reaper.start()
+    await asyncio.sleep(0.05)
+    reaper.track("next", InboundAudioObserver(), close)
+    await asyncio.wait_for(closed.wait(), 1)
+    await reaper.stop()
+    assert not reaper.sessions
@@ -0,0 +1,74 @@
+"""Tests for the LLM response cache."""
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+
+from bananavoice.services.voice.response_cache import (
+    ResponseCache,
+    normalize_utterance,
+)
+
+
+def test_normalized_utterances_share_a_key() -> None:
+    """Test that small wording differences map to the same key."""
+    cache = ResponseCache(FakeRedis(), allow_patterns=["time"])
+    system = {"role": "system", "content": "Be brief."}
+
+    first = cache.key_for([system, {"role": "user", "content": "What time is it?"}])
+    second = cache.key_for([system, {"role": "user", "content": "what  time is it"}])
+    other_prompt = cache.key_for(
+        [
+            {"role": "system", "content": "Be verbose."},
+            {"role": "user", "content": "What time is it?"},
+        ],
+    )
+
+    assert normalize_utterance("What  time, is it?") == "what time is it"
+    assert first is not None
+    assert first == second
+    assert first != other_prompt
+
+
+def test_cache_policy() -> None:
+    """Test the allow-list and length policies."""
+    cache = ResponseCache(FakeRedis(), allow_patterns=[r"^what time"], max_words=5)
+
+    assert cache.is_allowed("what time is it")
+    assert not cache.is_allowed("who are you")
+    assert not cache.is_allowed("what time is it in new york")
+    assert cache.key_for([{"role": "assistant", "content": "Hello!"}]) is None
+    assert not ResponseCache(FakeRedis()).is_allowed("what time is it")
+
+
+def test_short_replies_depend_on_the_question() -> None:
+    """Test that the same reply to different questions gets different keys."""
+    cache = ResponseCache(FakeRedis(), allow_patterns=[r"^(yes|no)$"])
+    system = {"role": "system", "content": "Be brief."}
+    yes = {"role": "user", "content": "Yes."}
+
+    weather = cache.key_for(
+        [system, {"role": "assistant", "content": "Want the forecast?"}, yes],
+    )
+    booking = cache.key_for(
+        [system, {"role": "assistant", "content": "Shall I cancel it?"}, yes],
+    )
+    again = cache.key_for(
+        [system, {"role": "assistant", "content": "Want the forecast?"}, yes],
+    )
+
+    assert weather is not None
+    assert weather != booking
+    assert weather == again
+
+
+@pytest.mark.asyncio
+async def test_cache_round_trip() -> None:
+    """Test that stored answers are returned on lookup."""
+    redis = FakeRedis()
+    cache = ResponseCache(redis, ttl=60)
+
+    assert await cache.get("key") is None
+    await cache.set("key", "It is noon.")
+    assert await cache.get("key") == "It is noon."
+    assert 0 < await redis.ttl("key") <= 60
+    await redis.aclose()
@@ -0,0 +1,193 @@
+"""Tests for provider routing."""
+
+import asyncio
+import socket
+from pathlib import Path
+from typing import AsyncIterator, List
+
+import pytest
+from aiohttp import web
+from openai import AsyncOpenAI
+from pipecat.frames.frames import Frame, StartFrame, TTSAudioRawFrame
+from pydantic import ValidationError
+
+from bananavoice.services.voice.phrase_cache import (
+    CachedOpenAITTSService,
+    PhraseAudioCache,
+)
+from bananavoice.services.voice.router import (
+    CircuitBreaker,
+    NoProviderAvailableError,
+    ProviderRoute,
+    ProviderRouter,
+    RoutedOpenAITTSService,
+)
+from bananavoice.settings import Settings, VoiceProvider
+
+
+def _route(name: str, base_url: str = "http://127.0.0.1:1/v1") -> ProviderRoute:
+    return ProviderRoute(
+        "tts",
+        VoiceProvider(name=name, model="tts-1", voice="nova"),
+        AsyncOpenAI(api_key="test", base_url=base_url, max_retries=0),
+        CircuitBreaker(max_failures=2, reset_timeout=60),
+    )
+
+
+async def _fake_tts_server(delay: float, audio: bytes) -> AsyncIterator[str]:
+    async def speech(request: web.Request) -> web.StreamResponse:
+        await asyncio.sleep(delay)
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(audio)
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_post("/v1/audio/speech", speech)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    await web.SockSite(runner, sock).start()
+    port = sock.getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}/v1"
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_router_fails_over_and_opens_circuit() -> None:
+    """Test failover, latency ranking and the circuit breaker."""
+    broken, healthy = _route("broken"), _route("healthy")
+    router = ProviderRouter([broken, healthy])
+    calls: List[str] = []
+
+    async def request(route: ProviderRoute) -> str:
+        calls.append(route.name)
+        if route is broken:
+            raise ConnectionError("down")
+        return route.name
+
+    assert router.current_provider() == "broken"
+    for _ in range(3):
+        winner, result = await router.first(request)
+        assert winner is healthy
+        assert result == "healthy"
+    assert router.current_provider() == "healthy"
+
+    # Once measured, the healthy provider ranks before the unmeasured one.
+    assert calls == ["broken", "healthy", "healthy", "healthy"]
+    assert not broken.breaker.is_open
+
+    broken.breaker.record_failure()
+    assert broken.breaker.is_open
+    assert router.candidates() == [healthy]
+    broken.breaker.record_success()
+    assert router.candidates() == [healthy, broken]
+
+
+@pytest.mark.asyncio
+async def test_router_hedges_slow_provider() -> None:
+    """Test that a hedged request wins and the slow result is discarded."""
+    slow, fast = _route("slow"), _route("fast")
+    router = ProviderRouter([slow, fast], hedge_after=0.01)
+    discarded: List[str] = []
+
+    async def request(route: ProviderRoute) -> str:
+        await asyncio.sleep(1 if route is slow else 0)
+        return route.name
+
+    async def discard(result: str) -> None:
+        discarded.append(result)
+
+    winner, _ = await router.first(request, discard=discard)
+
+    assert winner is fast
+    # The slow request was cancelled before it produced a result.
+    assert discarded == []
+    assert fast.latency.p95() is not None
+    assert slow.latency.p95() is None
+    # The fast provider is measured now and ranked first.
+    assert router.candidates()[0] is fast
+
+
+@pytest.mark.asyncio
+async def test_router_raises_when_all_fail() -> None:
+    """Test that the errors of all providers are reported."""
+    router = ProviderRouter([_route("a"), _route("b")])
+
+    async def request(route: ProviderRoute) -> str:
+        raise ConnectionError(route.name)
+
+    with pytest.raises(NoProviderAvailableError, match="a: a; b: b"):
+        await router.first(request)
+
+
+def test_providers_are_required() -> None:
+    """Test that a stage without providers is refused up front."""
+    with pytest.raises(ValueError, match="at least one provider"):
+        ProviderRouter([])
+    with pytest.raises(ValidationError):
+        Settings(voice_tts_providers=[])
+
+
+@pytest.mark.asyncio
+async def test_routed_tts_with_fake_provider_servers() -> None:
+    """Test hedged speech synthesis against local fake providers."""
+    slow_server = _fake_tts_server(0.5, b"\x01\x00" * 100)
+    fast_server = _fake_tts_server(0.0, b"\x02\x00" * 100)
+    slow_url = await slow_server.__anext__()
+    fast_url = await fast_server.__anext__()
+    router = ProviderRouter(
+        [_route("slow", slow_url), _route("fast", fast_url)],
+        hedge_after=0.05,
+    )
+    tts = RoutedOpenAITTSService(api_key="test", router=router)
+    await tts.start(StartFrame(audio_out_sample_rate=24000))
+
+    audio = b"".join(
+        [
+            frame.audio
+            async for frame in tts.run_tts("Hello")
+            if isinstance(frame, TTSAudioRawFrame)
+        ],
+    )
+
+    assert audio == b"\x02\x00" * 100
+    await slow_server.aclose()
+    await fast_server.aclose()
+
+
+@pytest.mark.asyncio
+async def test_phrase_cache_keeps_only_the_primary_voice(tmp_path: Path) -> None:
+    """Test that audio spoken by a fallback voice is never cached."""
+    server = _fake_tts_server(0.0, b"\x02\x00" * 100)
+    url = await server.__anext__()
+    cache = PhraseAudioCache(tmp_path, phrases=["Hello"])
+
+    async def speak(primary: ProviderRoute) -> List[Frame]:
+        fallback = ProviderRoute(
+            "tts",
+            VoiceProvider(name="fallback", model="tts-1", voice="alloy"),
+            AsyncOpenAI(api_key="test", base_url=url, max_retries=0),
+            CircuitBreaker(),
+        )
+        tts = CachedOpenAITTSService(
+            api_key="test",
+            router=ProviderRouter([primary, fallback]),
+            phrase_cache=cache,
+        )
+        await tts.start(StartFrame(audio_out_sample_rate=24000))
+        return [frame async for frame in tts.run_tts("Hello")]
+
+    # The primary provider is down, the fallback speaks with another voice.
+    frames = await speak(_route("primary"))
+    assert any(isinstance(frame, TTSAudioRawFrame) for frame in frames)
+    assert not list(tmp_path.glob("*.pcm"))
+
+    await speak(_route("primary", url))
+    assert len(list(tmp_path.glob("*.pcm"))) == 1
+    cache.close()
+    await server.aclose()
@@ -0,0 +1,89 @@
+"""Tests for the voice bot bootstrap helpers."""
+
+import asyncio
+
+import pytest
+
+from bananavoice.services.voice.bot import VoiceBot
+from bananavoice.services.voice.startup import (
+    DeferredSileroVADAnalyzer,
+    StartupTimeline,
+)
+
+
+@pytest.mark.asyncio
+async def test_timeline_records_overlapping_phases() -> None:
+    """Test that concurrent phases overlap in the timeline."""
+    timeline = StartupTimeline("test")
+
+    await asyncio.gather(
+        timeline.track("join", asyncio.sleep(0.05)),
+        timeline.track("vad", asyncio.sleep(0.05)),
+    )
+    total = timeline.finish()
+
+    assert set(timeline.phases) == {"join", "vad"}
+    assert total < 0.1
+    assert "join=" in timeline.summary()
+
+
+@pytest.mark.asyncio
+async def test_deferred_vad_is_silent_until_loaded() -> None:
+    """Test that the VAD model loads in the background."""
+    vad = DeferredSileroVADAnalyzer()
+    vad.set_sample_rate(16000)
+    audio = b"\x00\x00" * vad.num_frames_required()
+
+    assert not vad.is_loaded
+    assert vad.voice_confidence(audio) == 0.0
+
+    await vad.load()
+    assert vad.is_loaded
+    assert vad.voice_confidence(audio) < 0.5
+
+
+class BrokenVADAnalyzer(DeferredSileroVADAnalyzer):
+    """VAD whose model fails to load a number of times."""
+
+    def __init__(self, failures: int) -> None:
+        super().__init__()
+        self.failures = failures
+        self.attempts = 0
+
+    async def load(self) -> None:
+        """Fail until no failures are left, then load the model."""
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise RuntimeError("model file is corrupt")
+        await super().load()
+
+
+class FakeTask:
+    """Pipeline task that remembers being cancelled."""
+
+    def __init__(self) -> None:
+        self.cancelled = False
+
+    async def cancel(self) -> None:
+        """Cancel the task."""
+        self.cancelled = True
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("failures", "ready"), [(1, True), (2, False)])
+async def test_bootstrap_retries_the_vad_or_leaves(failures: int, ready: bool) -> None:
+    """Test that a bot which can't load its VAD leaves the room."""
+    bot = VoiceBot("https://example.daily.co/room", "", "daily", "openai")
+    vad = BrokenVADAnalyzer(failures)
+    task = FakeTask()
+    bot.vad = vad
+    bot.task = task  # type: ignore[assignment]
+    bot.joined.set()
+    timeline = StartupTimeline("test")
+
+    await bot.bootstrap(timeline)
+
+    assert vad.attempts == 2
+    assert vad.is_loaded is ready
+    assert task.cancelled is not ready
+    assert set(timeline.phases) == {"join", "providers", "vad"}
@@ -0,0 +1,50 @@
+"""Tests for the LLM to TTS text aggregator."""
+
+from typing import List
+
+import pytest
+
+from bananavoice.services.voice.text_aggregator import ClauseTextAggregator
+
+
+async def _chunks(aggregator: ClauseTextAggregator, text: str) -> List[str]:
+    chunks = []
+    for token in text.split(" "):
+        chunk = await aggregator.aggregate(token + " ")
+        if chunk:
+            chunks.append(chunk)
+    return chunks
+
+
+@pytest.mark.asyncio
+async def test_first_chunk_flushes_at_clause() -> None:
+    """Test that the first chunk is short and later ones wait for sentences."""
+    aggregator = ClauseTextAggregator(first_min_chars=10, min_chars=40)
+    text = (
+        "Sure, the weather in Paris is mild today, around 3.5 degrees. "
+        "Tomorrow it should be warmer, with a little sun in the afternoon. "
+        "Bring a coat."
+    )
+
+    chunks = await _chunks(aggregator, text)
+
+    assert chunks[0] == "Sure, the weather in Paris is mild today,"
+    # The short sentence is merged with the next one.
+    assert chunks[1].strip().startswith("around 3.5 degrees. Tomorrow")
+    assert chunks[1].strip().endswith("afternoon.")
+    assert aggregator.text.strip() == "Bring a coat."
+
+
+@pytest.mark.asyncio
+async def test_long_text_is_split_and_reset() -> None:
+    """Test the max length split and the reset to a new first chunk."""
+    aggregator = ClauseTextAggregator(first_min_chars=5, min_chars=10, max_chars=30)
+    await aggregator.aggregate("Hello, ")
+    chunk = await aggregator.aggregate("one two three four five six seven eight ")
+
+    assert chunk is not None
+    assert len(chunk) <= 40
+
+    await aggregator.reset()
+    assert aggregator.text == ""
+    assert await aggregator.aggregate("Sure, ") == "Sure,"
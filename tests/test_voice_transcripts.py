@@ -0,0 +1,186 @@
+"""Tests for conversation transcripts written behind the pipelines."""
+
+import asyncio
+from typing import Any, List, Optional
+
+import pytest
+from pipecat.frames.frames import EndFrame
+from pipecat.pipeline.pipeline import Pipeline
+from pipecat.pipeline.runner import PipelineRunner
+from pipecat.pipeline.task import PipelineParams, PipelineTask
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+from prometheus_client import REGISTRY
+from sqlalchemy.exc import IntegrityError
+
+from bananavoice.services.voice.fakes import (
+    FakeLLMService,
+    FakeSTTService,
+    FakeTTSService,
+    LatencyDistribution,
+    LoopbackTransport,
+)
+from bananavoice.services.voice.transcripts import TranscriptRecorder, TranscriptWriter
+
+
+class RecordingSession:
+    """Database session that keeps the executed statements."""
+
+    def __init__(self, statements: List[Any]) -> None:
+        self.statements = statements
+
+    async def __aenter__(self) -> "RecordingSession":  # noqa: PYI034
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        return None
+
+    async def execute(self, statement: Any, params: Optional[Any] = None) -> None:
+        """Keep the table and the rows of a statement."""
+        if params is None:
+            # Rows of a multi-row insert, keyed by column.
+            values = statement._multi_values[0]  # noqa: SLF001
+            params = [
+                {column.name: value for column, value in row.items()} for row in values
+            ]
+        self.statements.append((statement.table.name, params))
+
+    async def commit(self) -> None:
+        """Nothing to commit."""
+
+
+def dropped() -> float:
+    """Turns dropped by all writers so far."""
+    return REGISTRY.get_sample_value("voice_transcript_turns_dropped_total") or 0
+
+
+@pytest.mark.asyncio
+async def test_writer_batches_turns_and_bounds_the_queue() -> None:
+    """Test that turns are inserted in batches and the oldest are dropped."""
+    statements: List[Any] = []
+    writer = TranscriptWriter(lambda: RecordingSession(statements), batch_size=2)
+    writer.open("session", "daily")
+    for index in range(3):
+        writer.add_turn("session", "user", f"turn {index}")
+    writer.close("session")
+
+    assert await writer.flush() == 3
+    assert [table for table, _ in statements] == [
+        "conversation",
+        "conversation_turn",
+        "conversation_turn",
+        "conversation",
+    ]
+    assert statements[-1][1][0]["id"] == "session"
+    assert writer.pending == 0
+
+    def unavailable() -> None:
+        raise ConnectionError("database is down")
+
+    before = dropped()
+    writer = TranscriptWriter(unavailable, max_pending=3)
+    writer.open("session", "webrtc")
+    for index in range(4):
+        writer.add_turn("session", "assistant", f"turn {index}")
+    assert await writer.flush() == 0
+    writer.add_turn("session", "user", "turn 4")
+
+    assert writer.pending == 3
+    assert writer.dropped == 2
+    assert dropped() - before == 2
+    writer.session_factory = lambda: RecordingSession(statements)
+    statements.clear()
+    assert await writer.flush() == 3
+    assert statements[0][0] == "conversation"
+
+
+@pytest.mark.asyncio
+async def test_writer_drops_refused_and_overflowing_transcripts() -> None:
+    """Test that refused batches aren't retried and every queue is bounded."""
+
+    def refusing() -> None:
+        raise IntegrityError("INSERT", {}, Exception("unknown user"))
+
+    before = dropped()
+    writer = TranscriptWriter(refusing)
+    writer.open("session", "daily")
+    writer.add_turn("session", "user", "hello")
+    writer.add_turn("session", "assistant", "hi")
+    writer.close("session")
+
+    assert await writer.flush() == 0
+    assert writer.pending == 0
+    assert writer.dropped == 2
+    assert dropped() - before == 2
+
+    def unavailable() -> None:
+        raise ConnectionError("database is down")
+
+    statements: List[Any] = []
+    writer = TranscriptWriter(unavailable, max_pending=2)
+    for index in range(3):
+        writer.open(f"session {index}", "daily")
+        writer.add_turn(f"session {index}", "user", "hello")
+    for index in range(3):
+        writer.close(f"session {index}")
+    assert await writer.flush() == 0
+    writer.open("session 3", "daily")
+
+    # The oldest conversations went with their turns and end times.
+    assert writer.pending == 1
+    assert writer.dropped == 2
+    writer.session_factory = lambda: RecordingSession(statements)
+    assert await writer.flush() == 1
+    conversations, turns, ended = (rows for _, rows in statements)
+    assert [row["id"] for row in conversations] == ["session 2", "session 3"]
+    assert [row["conversation_id"] for row in turns] == ["session 2"]
+    assert [row["id"] for row in ended] == ["session 2"]
+
+
+@pytest.mark.asyncio
+async def test_recorder_writes_the_turns_of_a_session() -> None:
+    """Test that the turns the context aggregators add are written."""
+    fast = LatencyDistribution(0.01)
+    transport = LoopbackTransport(turns=2, utterance_seconds=0.3)
+    llm = FakeLLMService(
+        ttfb=fast,
+        token_interval=LatencyDistribution(0.0),
+        answer="Sure, it is sunny.",
+    )
+    context = OpenAILLMContext([{"role": "user", "content": "Greet the user."}])
+    aggregator = llm.create_context_aggregator(context)
+    statements: List[Any] = []
+    writer = TranscriptWriter(lambda: RecordingSession(statements))
+    writer.start()
+    task = PipelineTask(
+        Pipeline(
+            [
+                transport.input(),
+                FakeSTTService(latency=fast, transcript="Is it sunny?"),
+                aggregator.user(),
+                llm,
+                FakeTTSService(ttfb=fast),
+                transport.output(),
+                aggregator.assistant(),
+                TranscriptRecorder(context, writer, "session", "daily"),
+            ],
+        ),
+        params=PipelineParams(audio_in_sample_rate=16000, audio_out_sample_rate=24000),
+    )
+    run = asyncio.create_task(PipelineRunner(handle_sigint=False).run(task))
+    await asyncio.wait_for(transport.done.wait(), 30)
+    await task.queue_frame(EndFrame())
+    await run
+    await writer.stop()
+
+    turns = [
+        row
+        for table, rows in statements
+        if table == "conversation_turn"
+        for row in rows
+    ]
+    assert [(turn["role"], turn["content"]) for turn in turns] == [
+        ("user", "Is it sunny?"),
+        ("assistant", "Sure, it is sunny."),
+    ] * 2
+    assert [turn["position"] for turn in turns] == [0, 1, 2, 3]
+    assert statements[-1][0] == "conversation"
@@ -0,0 +1,53 @@
+"""Tests for adaptive end-of-turn detection."""
+
+from typing import List
+
+from pipecat.audio.vad.vad_analyzer import VADState
+
+from bananavoice.services.voice.turn import TurnEndController
+
+QUIET = VADState.QUIET
+SPEAKING = VADState.SPEAKING
+STOPPING = VADState.STOPPING
+
+
+def _pause(controller: TurnEndController, now: float, pause: float) -> float:
+    controller.observe(SPEAKING, STOPPING, now)
+    controller.observe(STOPPING, SPEAKING, now + pause)
+    return now + pause + 1.0
+
+
+def _end_turn(controller: TurnEndController, now: float) -> List[float]:
+    controller.observe(SPEAKING, STOPPING, now)
+    stop_secs = controller.observe(STOPPING, QUIET, now + controller.stop_secs)
+    return [] if stop_secs is None else [stop_secs]
+
+
+def test_fast_talker_gets_shorter_stop_time() -> None:
+    """Test that short pauses shorten the stop time within bounds."""
+    controller = TurnEndController("test", stop_secs=0.8, min_stop_secs=0.3)
+    now = 0.0
+    for _ in range(5):
+        now = _pause(controller, now, 0.1)
+
+    assert _end_turn(controller, now) == [0.3]
+    assert controller.stop_secs == 0.3
+    # Nothing new was learned, so the next turn keeps the stop time.
+    assert _end_turn(controller, now + 10) == []
+
+
+def test_cut_off_speaker_gets_longer_stop_time() -> None:
+    """Test that resuming right after a turn end lengthens the stop time."""
+    controller = TurnEndController(
+        "test",
+        stop_secs=0.5,
+        max_stop_secs=1.2,
+        min_samples=1,
+    )
+    controller.observe(SPEAKING, STOPPING, 0.0)
+    controller.observe(STOPPING, QUIET, 0.5)
+    controller.observe(VADState.STARTING, SPEAKING, 0.9)
+
+    assert list(controller.pauses) == [0.9]
+    assert _end_turn(controller, 5.0) == [1.05]
+    assert controller.recommended_stop_secs() <= 1.2
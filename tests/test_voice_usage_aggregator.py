@@ -0,0 +1,91 @@
+"""Tests for the rolling voice usage totals."""
+
+import uuid
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+from prometheus_client import REGISTRY
+
+from bananavoice.services.voice.metering import SessionUsage, UsageWriter
+from bananavoice.services.voice.usage_aggregator import UsageAggregator
+
+NOW = 1_800_000_000.0
+
+
+def row(model: str, unit: str, quantity: float, cost: float, user: str = "") -> dict:
+    """Usage row as written by the usage writer."""
+    return {
+        "kind": "llm",
+        "model": model,
+        "unit": unit,
+        "quantity": quantity,
+        "cost": cost,
+        "user_id": user or None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_rolling_windows() -> None:
+    """Test that windows sum the buckets they cover."""
+    redis = FakeRedis()
+    aggregator = UsageAggregator(redis)
+    await aggregator.add([row("gpt", "input_tokens", 1000, 0.0004, "a")], now=NOW)
+    await aggregator.add([row("gpt", "input_tokens", 500, 0.0002, "b")], now=NOW - 600)
+    await aggregator.add([row("gpt", "output_tokens", 10, 0.5, "a")], now=NOW - 7200)
+
+    recent = await aggregator.totals(300, now=NOW)
+    hour = await aggregator.totals(3600, now=NOW)
+    day = await aggregator.totals(86400, now=NOW)
+
+    assert recent.quantities == {("llm", "gpt", "input_tokens"): 1000}
+    assert recent.cost == pytest.approx(0.0004)
+    assert recent.users == {"a": pytest.approx(0.0004)}
+    assert hour.quantities == {("llm", "gpt", "input_tokens"): 1500}
+    assert hour.users == {"a": pytest.approx(0.0004), "b": pytest.approx(0.0002)}
+    assert day.cost == pytest.approx(0.5006)
+    assert day.to_dict(top_users=1)["users"] == [{"user_id": "a", "cost": 0.5004}]
+
+    keys = await redis.keys("voice:usage:60:*")
+    assert keys
+    ttls = [await redis.ttl(key) for key in keys]
+    assert all(0 < ttl <= 7200 for ttl in ttls)
+
+
+@pytest.mark.asyncio
+async def test_export_resets_providers_that_left_the_window() -> None:
+    """Test that gauges of providers without recent usage drop to zero."""
+    aggregator = UsageAggregator(FakeRedis(), windows=[300])
+    await aggregator.add([row("exported", "input_tokens", 10, 0.25)])
+
+    labels = {"window": "300s", "kind": "llm", "model": "exported"}
+
+    await aggregator.export()
+    cost = REGISTRY.get_sample_value("voice_usage_cost_dollars", labels)
+    assert cost == pytest.approx(0.25)
+
+    await aggregator.redis.flushall()
+    await aggregator.export()
+    assert REGISTRY.get_sample_value("voice_usage_cost_dollars", labels) == 0
+
+
+@pytest.mark.asyncio
+async def test_writer_aggregates_new_rows_once() -> None:
+    """Test that rows retried after a failed write are not counted again."""
+
+    def unavailable() -> None:
+        raise ConnectionError("database is down")
+
+    aggregator = UsageAggregator(FakeRedis())
+    writer = UsageWriter(unavailable, aggregator=aggregator)
+    user_id = uuid.uuid4()
+    usage = SessionUsage("session", "webrtc", user_id=user_id)
+    writer.track(usage)
+    usage.add("llm", "gpt-4.1-mini", "output_tokens", 1_000_000)
+
+    await writer.flush()
+    await writer.flush()
+
+    totals = await aggregator.totals(300)
+    assert writer.backlog == 1
+    assert totals.quantities == {("llm", "gpt-4.1-mini", "output_tokens"): 1_000_000}
+    assert totals.users == {str(user_id): pytest.approx(1.6)}
@@ -0,0 +1,76 @@
+"""Tests for the WebRTC load generator."""
+
+import os
+from typing import List
+
+import httpx
+import pytest
+
+from bananavoice.services.voice.fakes import FakeGeminiLiveLLMService
+from bananavoice.services.voice.webrtc_bot import WebRTCVoiceAgent
+from bananavoice.services.voice.webrtc_load import (
+    AUTH_COOKIE,
+    LoadConfig,
+    http_offer_sender,
+    run_load,
+    server_cpu_seconds,
+)
+
+
+@pytest.mark.asyncio
+async def test_offer_sender_authenticates() -> None:
+    """Test that offers carry the credentials of the calling user."""
+    requests: List[httpx.Request] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"sdp": "answer", "type": "answer"})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handle)) as client:
+        url = "http://test/api/voice/webrtc/offer"
+        # Fake credentials of a test user.
+        await http_offer_sender(client, url, token="jwt")("offer", "offer")  # noqa: S106
+        await http_offer_sender(client, url, cookie="session")("offer", "offer")
+
+    assert requests[0].headers["Authorization"] == "Bearer jwt"
+    assert "Cookie" not in requests[0].headers
+    assert requests[1].headers["Cookie"] == f"{AUTH_COOKIE}=session"
+    assert "Authorization" not in requests[1].headers
+
+
+def test_server_cpu_seconds() -> None:
+    """Test reading the CPU time of server processes."""
+    assert server_cpu_seconds([]) is None
+    cpu = server_cpu_seconds([os.getpid()])
+    assert cpu is not None
+    assert cpu > 0
+
+
+@pytest.mark.asyncio
+async def test_load_against_fake_backend() -> None:
+    """Test that aiortc peers are answered by the fake Gemini backend."""
+    agent = WebRTCVoiceAgent(
+        google_api_key="",
+        llm_factory=FakeGeminiLiveLLMService,
+        ice_servers=[],
+    )
+    config = LoadConfig(
+        sessions=2,
+        turns=1,
+        delay=1.5,
+        pause=2.5,
+        server_pids=[os.getpid()],
+    )
+    try:
+        report = await run_load(config, send_offer=agent.create_connection)
+    finally:
+        await agent.cleanup()
+
+    assert report.failed == 0
+    latencies = report.latencies()
+    assert len(latencies["answer"]) == 2
+    # Greeting of the agent, then the answer to the single turn.
+    assert len(latencies["first_audio"]) == 2
+    assert len(latencies["response"]) == 2
+    assert report.packet_loss < 0.05
+    assert report.server_cores is not None